@@ -10,11 +10,16 @@ import sys
 import re
 import time
 import argparse
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 # Configuration
 SCOPES = ['https://www.googleapis.com/auth/presentations', 'https://www.googleapis.com/auth/drive']
 
+# Batches translated concurrently by default; requests mostly wait on the API
+DEFAULT_TRANSLATION_WORKERS = 5
+
 def authenticate_google():
     creds = None
     token_path = 'token.json'
@@ -372,9 +377,10 @@ def setup_recovery_system(presentation_id, text_dict, slide_metadata, source_lan
     
     return recovery_state, recovery_file, save_recovery_state
 
-def translate_batch(batch, batch_index, slide_metadata, source_language, target_language, max_retries=2):
+def translate_batch(batch, batch_index, slide_metadata, source_language, target_language, max_retries=2, api_key=None):
     """
     Translate a single batch with retry logic.
+    api_key overrides CLAUDE_API_KEY, so callers don't have to change the process environment.
     """
     batch_copy = batch.copy()
     
@@ -382,7 +388,7 @@ def translate_batch(batch, batch_index, slide_metadata, source_language, target_
         return text.replace('\\n', '\n').replace('\\u000b', '\v').replace('\\t', '\t')
     
     client = anthropic.Anthropic(
-        api_key=os.getenv("CLAUDE_API_KEY"),
+        api_key=api_key or os.getenv("CLAUDE_API_KEY"),
         default_headers={
             "anthropic-beta": "output-128k-2025-02-19"
         }
@@ -480,9 +486,9 @@ Reply ONLY with the translated JSON. The JSON MUST be valid and parseable.
                 print(f"All {max_retries + 1} attempts failed for batch {batch_index}: {e}")
                 raise e
 
-def translate_text(text_dict, slide_metadata, source_language, target_language, resume_file=None):
+def translate_text(text_dict, slide_metadata, source_language, target_language, resume_file=None, api_key=None, max_workers=DEFAULT_TRANSLATION_WORKERS):
     client = anthropic.Anthropic(
-        api_key=os.getenv("CLAUDE_API_KEY"),
+        api_key=api_key or os.getenv("CLAUDE_API_KEY"),
         default_headers={
             "anthropic-beta": "output-128k-2025-02-19"
         }
@@ -491,10 +497,7 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
     def deduplicate_content(input_dict):
         content_to_keys = {}
         for key, value in input_dict.items():
-            if value in content_to_keys:
-                content_to_keys[value].append(key)
-            else:
-                content_to_keys[value] = [key]
+            content_to_keys.setdefault(value, []).append(key)
         
         unique_content = {}
         duplicates_map = {}
@@ -536,7 +539,13 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
         
         unique_translated_dict = recovery_state["translated_items"].copy()
         
-        with tqdm(total=len(batches), desc="Translating", unit="batch") as pbar:
+        # Batches spend nearly all their time waiting on the API, so several are sent
+        # at once; results and recovery state are only touched from this thread.
+        # Each batch runs in a copy of the caller's context, so context variables set
+        # by the caller (e.g. the web UI's output capture) still apply inside the pool.
+        with tqdm(total=len(batches), desc="Translating", unit="batch") as pbar, \
+                ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {}
             for batch_index, batch in enumerate(batches):
                 batch_id = f"batch_{batch_index+1}"
                 if batch_id in recovery_state["completed_batches"]:
@@ -545,12 +554,17 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
                     continue
                 
                 print(f"\nProcessing batch {batch_index+1} of {len(batches)} with {len(batch)} items...")
-                
+                future = executor.submit(
+                    contextvars.copy_context().run, translate_batch,
+                    batch, batch_index+1, slide_metadata, 
+                    source_language, target_language, api_key=api_key
+                )
+                futures[future] = (batch_index, batch_id, batch)
+            
+            for future in as_completed(futures):
+                batch_index, batch_id, batch = futures[future]
                 try:
-                    batch_result = translate_batch(
-                        batch, batch_index+1, slide_metadata, 
-                        source_language, target_language
-                    )
+                    batch_result = future.result()
                     
                     unique_translated_dict.update(batch_result)
                     recovery_state["translated_items"].update(batch_result)
@@ -568,7 +582,7 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
                     print("Continuing with next batch...")
                 
                 pbar.update(1)
-                completion_percentage = int(100 * (batch_index + 1) / len(batches))
+                completion_percentage = int(100 * pbar.n / len(batches))
                 pbar.set_description(f"Translating: {completion_percentage}% complete")
         
         print(f"\nTranslation of unique content completed with {len(unique_translated_dict)} items out of {len(unique_text_dict)} unique items")
@@ -595,7 +609,7 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
                         print(f"Processing sub-batch {i+1}/{len(sub_batches)} for failed batch {batch_id}")
                         sub_result = translate_batch(
                             sub_batch, f"{batch_id}.{i+1}", slide_metadata, 
-                            source_language, target_language, max_retries=3
+                            source_language, target_language, max_retries=3, api_key=api_key
                         )
                         unique_translated_dict.update(sub_result)
                         recovery_state["translated_items"].update(sub_result)
@@ -717,6 +731,8 @@ if __name__ == "__main__":
     parser.add_argument("--presentation-id", help="Google Slides Presentation ID")
     parser.add_argument("--source-language", help="Source language code (e.g., en)")
     parser.add_argument("--target-language", help="Target language code (e.g., ja)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_TRANSLATION_WORKERS,
+                        help=f"Number of batches translated concurrently (default: {DEFAULT_TRANSLATION_WORKERS})")
     
     args = parser.parse_args()
     
@@ -743,7 +759,7 @@ if __name__ == "__main__":
     
     extracted_text, slide_metadata = extract_text(slides_service, presentation_id)
     
-    translated_texts = translate_text(extracted_text, slide_metadata, source_language, target_language, args.resume)
+    translated_texts = translate_text(extracted_text, slide_metadata, source_language, target_language, args.resume, max_workers=args.workers)
     
     new_presentation_id = update_slides(slides_service, drive_service, presentation_id, translated_texts, target_language)
     
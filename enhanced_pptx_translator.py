@@ -6,14 +6,20 @@ from pptx import Presentation
 import sys
 import re
 import time
+import random
 import argparse
+import threading
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Guards the shared cost tracker when batches are translated from several threads
+_cost_lock = threading.Lock()
+
 def extract_text(pptx_file):  
     """Extract text from PowerPoint presentation with comprehensive text extraction"""
     prs = Presentation(pptx_file)  
@@ -694,6 +700,32 @@ def setup_recovery_system(file_id, text_dict, slide_metadata, source_language, t
     
     return recovery_state, recovery_file, save_recovery_state
 
+def already_in_target(text, target_language, source_language=None):
+    """
+    Cheap script check for text that needs no translation: strings without any
+    letters (numbers, symbols, URLs) and strings already written in a CJK target script.
+    """
+    if not any(c.isalpha() for c in text):
+        return True
+    
+    if target_language not in ["ja", "zh", "ko"]:
+        # Latin-script targets can't be told apart from the source by script alone
+        return False
+    
+    # Latin letters mean there is still something to translate
+    if any(c.isascii() and c.isalpha() for c in text):
+        return False
+    
+    has_kana = any('\u3040' <= c <= '\u30ff' for c in text)
+    has_han = any('\u4e00' <= c <= '\u9fff' for c in text)
+    has_hangul = any('\uac00' <= c <= '\ud7af' for c in text)
+    
+    if target_language == "ja":
+        return has_kana or (has_han and source_language != "zh")
+    if target_language == "zh":
+        return has_han and not has_kana and not has_hangul and source_language != "ja"
+    return has_hangul
+
 def translate_batch(batch, batch_index, slide_metadata, source_language, target_language, api_key=None, max_retries=3, cost_tracker=None):
     """
     Translate a single batch with retry logic.
@@ -795,19 +827,21 @@ Reply ONLY with the translated JSON. The JSON MUST be valid and parseable.
             
             # Update the cost tracker if provided
             if cost_tracker is not None:
-                cost_tracker["total_input_tokens"] += prompt_tokens
-                cost_tracker["total_output_tokens"] += completion_tokens
-                cost_tracker["total_input_cost"] += batch_cost["input_cost"]
-                cost_tracker["total_output_cost"] += batch_cost["output_cost"]
-                cost_tracker["total_cost"] += batch_cost["total_cost"]
-                cost_tracker["api_calls"] += 1
+                with _cost_lock:
+                    cost_tracker["total_input_tokens"] += prompt_tokens
+                    cost_tracker["total_output_tokens"] += completion_tokens
+                    cost_tracker["total_input_cost"] += batch_cost["input_cost"]
+                    cost_tracker["total_output_cost"] += batch_cost["output_cost"]
+                    cost_tracker["total_cost"] += batch_cost["total_cost"]
+                    cost_tracker["api_calls"] += 1
+                    running_total = (cost_tracker["total_cost"], cost_tracker["api_calls"])
             
             print(f"Batch {batch_index} token usage: {prompt_tokens} input + {completion_tokens} output tokens")
             print(f"Batch {batch_index} cost: ${batch_cost['total_cost']:.4f} (${batch_cost['input_cost']:.4f} input + ${batch_cost['output_cost']:.4f} output)")
             
-            # Show running total cost
+            # Show running total cost (as read under the lock, so both numbers belong together)
             if cost_tracker is not None:
-                print(f"Running total: ${cost_tracker['total_cost']:.4f} for {cost_tracker['api_calls']} API calls")
+                print(f"Running total: ${running_total[0]:.4f} for {running_total[1]} API calls")
             
             translated_text = response.content[0].text
             
@@ -878,10 +912,7 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
     def deduplicate_content(input_dict):
         content_to_keys = {}
         for key, value in input_dict.items():
-            if value in content_to_keys:
-                content_to_keys[value].append(key)
-            else:
-                content_to_keys[value] = [key]
+            content_to_keys.setdefault(value, []).append(key)
         
         unique_content = {}
         duplicates_map = {}
@@ -897,6 +928,39 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
         
         return unique_content, duplicates_map
     
+    def split_failed_batch(batch, error_type, error_message):
+        """Split a failed batch according to how it failed."""
+        items = list(batch.items())
+        
+        # Rate limits are not caused by the content, so retry at the same size
+        if error_type == "RateLimitError":
+            return [batch]
+        
+        # A single item that keeps failing is left for the final batch
+        if len(items) < 2:
+            return []
+        
+        if error_type == "BadRequestError" and "token" in error_message.lower():
+            # Too many tokens: split where half of the text volume is reached
+            sizes = [len(k) + len(v) if isinstance(v, str) else len(k) for k, v in items]
+            half = sum(sizes) / 2
+            running = 0
+            split_at = 1
+            for i, size in enumerate(sizes):
+                running += size
+                if running >= half:
+                    split_at = max(1, min(i + 1, len(items) - 1))
+                    break
+        else:
+            # Parse errors and anything else: bisect to isolate the bad input
+            split_at = len(items) // 2
+        
+        return [dict(items[:split_at]), dict(items[split_at:])]
+    
+    max_retry_rounds = 6
+    max_retry_workers = 4
+    backoff_base = 5
+    
     # Use a simple file ID based on timestamp if not provided
     file_id = os.path.basename(str(time.time()).replace('.', ''))
     
@@ -914,12 +978,23 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
         duplicates_map = recovery_state["duplicates_map"]
         print(f"Resumed with {len(recovery_state['translated_items'])} already translated items")
     
+    # Text that is already in the target language is kept as is without an API call
+    passthrough = {k: v for k, v in unique_text_dict.items()
+                   if k not in recovery_state["translated_items"] and already_in_target(v, target_language, source_language)}
+    if passthrough:
+        print(f"Keeping {len(passthrough)} items that are already in {target_language} or contain no translatable text")
+        recovery_state["translated_items"].update(passthrough)
+        save_recovery_state()
+    
     remaining_dict = {k: v for k, v in unique_text_dict.items() 
                      if k not in recovery_state["translated_items"]}
     
     if not remaining_dict:
         print("All items have already been translated. Nothing to do.")
-        full_translated_dict = recovery_state["translated_items"].copy()
+        unique_translated_dict = recovery_state["translated_items"]
+        full_translated_dict = {key: unique_translated_dict[rep_key]
+                                for key, rep_key in duplicates_map.items()
+                                if rep_key in unique_translated_dict}
     else:
         # For Japanese or other multibyte languages, use smaller batches
         max_tokens = 60000 if target_language in ["ja", "zh", "ko"] else 120000
@@ -958,7 +1033,8 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
                     recovery_state["failed_batches"].append({
                         "batch_id": batch_id,
                         "keys": list(batch.keys()),
-                        "error": str(e)
+                        "error": str(e),
+                        "error_type": type(e).__name__
                     })
                     save_recovery_state()
                     print("Continuing with next batch...")
@@ -972,51 +1048,73 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
         print(f"\nTranslation of unique content completed with {len(unique_translated_dict)} items out of {len(unique_text_dict)} unique items")
         
         if recovery_state["failed_batches"]:
-            print(f"\nRetrying {len(recovery_state['failed_batches'])} failed batches with smaller chunks...")
+            print(f"\nRetrying {len(recovery_state['failed_batches'])} failed batches with adaptive splitting...")
             
             for failed_batch in list(recovery_state["failed_batches"]):
                 batch_id = failed_batch["batch_id"]
                 keys = failed_batch["keys"]
                 
                 retry_batch = {k: text_dict[k] for k in keys if k in text_dict}
-                # Use smaller chunks for CJK languages
-                divisor = 10 if target_language in ["ja", "zh", "ko"] else 5
-                chunk_size = max(3, len(retry_batch) // divisor)
-                retry_items = list(retry_batch.items())
-                sub_batches = [dict(retry_items[i:i+chunk_size]) 
-                               for i in range(0, len(retry_items), chunk_size)]
+                # Older recovery files have no error_type; those are simply bisected
+                sub_batches = split_failed_batch(retry_batch, failed_batch.get("error_type", ""), failed_batch.get("error", ""))
+                pending = [(f"{batch_id}.{i+1}", sub_batch) for i, sub_batch in enumerate(sub_batches)]
                 
-                print(f"Split failed batch {batch_id} into {len(sub_batches)} smaller chunks of size ~{chunk_size}")
+                print(f"Split failed batch {batch_id} into {len(pending)} chunks ({failed_batch.get('error_type') or 'unknown error'})")
                 
-                for i, sub_batch in enumerate(sub_batches):
-                    sub_id = f"{batch_id}_sub_{i+1}"
+                for attempt in range(max_retry_rounds):
+                    if not pending:
+                        break
                     
-                    try:
-                        print(f"Processing sub-batch {i+1}/{len(sub_batches)} for failed batch {batch_id}")
-                        sub_result = translate_batch(
-                            sub_batch, f"{batch_id}.{i+1}", slide_metadata, 
-                            source_language, target_language, api_key=api_key, 
-                            max_retries=3, cost_tracker=cost_tracker
-                        )
-                        unique_translated_dict.update(sub_result)
-                        recovery_state["translated_items"].update(sub_result)
-                        recovery_state["completed_batches"].append(sub_id)
-                        save_recovery_state()
+                    next_pending = []
+                    rate_limited = False
+                    
+                    # Sub-batches are independent, so each round runs them concurrently
+                    with ThreadPoolExecutor(max_workers=min(max_retry_workers, len(pending))) as executor:
+                        futures = {
+                            executor.submit(
+                                translate_batch, sub_batch, sub_id, slide_metadata,
+                                source_language, target_language, api_key=api_key,
+                                max_retries=3, cost_tracker=cost_tracker
+                            ): (sub_id, sub_batch)
+                            for sub_id, sub_batch in pending
+                        }
+                        print(f"Processing {len(pending)} sub-batches for failed batch {batch_id}")
                         
-                    except Exception as e:
-                        print(f"Error in sub-batch {i+1} of failed batch {batch_id}: {e}")
-                        continue
+                        for future in as_completed(futures):
+                            sub_id, sub_batch = futures[future]
+                            try:
+                                sub_result = future.result()
+                                unique_translated_dict.update(sub_result)
+                                recovery_state["translated_items"].update(sub_result)
+                                recovery_state["completed_batches"].append(sub_id)
+                                save_recovery_state()
+                                
+                            except Exception as e:
+                                error_type = type(e).__name__
+                                print(f"Error in sub-batch {sub_id} of failed batch {batch_id} ({error_type}): {e}")
+                                if error_type == "RateLimitError":
+                                    rate_limited = True
+                                for j, part in enumerate(split_failed_batch(sub_batch, error_type, str(e))):
+                                    next_pending.append((f"{sub_id}.{j+1}", part))
+                    
+                    pending = next_pending
+                    if pending and rate_limited:
+                        # Exponential backoff with jitter before retrying at the same size
+                        delay = random.uniform(1, 2) * (2 ** attempt) * backoff_base
+                        print(f"Rate limited, waiting {delay:.1f} seconds before retrying...")
+                        time.sleep(delay)
+                
+                if pending:
+                    print(f"Giving up on {len(pending)} sub-batches of failed batch {batch_id}; they will go to the final batch")
                 
                 recovery_state["failed_batches"].remove(failed_batch)
                 save_recovery_state()
         
-        full_translated_dict = {}
-        for key, value in unique_translated_dict.items():
-            full_translated_dict[key] = value
-        
-        for original_key, rep_key in duplicates_map.items():
-            if rep_key in unique_translated_dict and original_key != rep_key:
-                full_translated_dict[original_key] = unique_translated_dict[rep_key]
+        # duplicates_map maps every key (representatives included) to its
+        # representative, so one pass rebuilds the full dictionary
+        full_translated_dict = {key: unique_translated_dict[rep_key]
+                                for key, rep_key in duplicates_map.items()
+                                if rep_key in unique_translated_dict}
     
     print(f"Reconstructed full translation dictionary with {len(full_translated_dict)} items")
     
@@ -1093,12 +1191,13 @@ Reply ONLY with the translated JSON.
                 
                 batch_cost = estimate_cost(prompt_tokens, completion_tokens, "claude-3-7-sonnet")
                 
-                cost_tracker["total_input_tokens"] += prompt_tokens
-                cost_tracker["total_output_tokens"] += completion_tokens
-                cost_tracker["total_input_cost"] += batch_cost["input_cost"]
-                cost_tracker["total_output_cost"] += batch_cost["output_cost"]
-                cost_tracker["total_cost"] += batch_cost["total_cost"]
-                cost_tracker["api_calls"] += 1
+                with _cost_lock:
+                    cost_tracker["total_input_tokens"] += prompt_tokens
+                    cost_tracker["total_output_tokens"] += completion_tokens
+                    cost_tracker["total_input_cost"] += batch_cost["input_cost"]
+                    cost_tracker["total_output_cost"] += batch_cost["output_cost"]
+                    cost_tracker["total_cost"] += batch_cost["total_cost"]
+                    cost_tracker["api_calls"] += 1
                 
                 print(f"Final batch token usage: {prompt_tokens} input + {completion_tokens} output tokens")
                 print(f"Final batch cost: ${batch_cost['total_cost']:.4f} (${batch_cost['input_cost']:.4f} input + ${batch_cost['output_cost']:.4f} output)")
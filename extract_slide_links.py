@@ -1,149 +1,328 @@
 #!/usr/bin/env python3
 import os
 import sys
+import posixpath
+import hashlib
 from pptx import Presentation
-import xml.etree.ElementTree as ET
+from lxml import etree
 import zipfile
+import io
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-def extract_slide_links(pptx_file, slide_numbers=None):
-    """Extract links from specific slides in a PowerPoint presentation"""
+# The helpers below are annotated so the module can be compiled with mypyc
+# (mypyc extract_slide_links.py); it runs unchanged as plain Python.
+
+# Namespace-qualified tag names for the OOXML elements we read, resolved
+# once here instead of on every lookup
+HLINK_TAG = '{http://schemas.openxmlformats.org/drawingml/2006/main}hlinkClick'
+TEXT_TAG = '{http://schemas.openxmlformats.org/drawingml/2006/main}t'
+REL_TAG = '{http://schemas.openxmlformats.org/package/2006/relationships}Relationship'
+RID_ATTR = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+SLDID_TAG = '{http://schemas.openxmlformats.org/presentationml/2006/main}sldId'
+
+# Hyperlink relationship types (transitional and strict OOXML)
+HYPERLINK_TYPES = frozenset((
+    'http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink',
+    'http://purl.oclc.org/ooxml/officeDocument/relationships/hyperlink'
+))
+
+# Non-visual property elements; a click action found here belongs to the whole shape
+_NV_PROPS_TAGS = frozenset('{http://schemas.openxmlformats.org/presentationml/2006/main}' + tag
+                           for tag in ('nvSpPr', 'nvPicPr', 'nvCxnSpPr', 'nvGraphicFramePr', 'nvGrpSpPr'))
+
+# Drawing elements handled one at a time as the slide is streamed
+SHAPE_TAGS = tuple('{http://schemas.openxmlformats.org/presentationml/2006/main}' + tag
+                   for tag in ('sp', 'pic', 'cxnSp', 'graphicFrame', 'grpSp'))
+GRPSP_TAG = '{http://schemas.openxmlformats.org/presentationml/2006/main}grpSp'
+SPTREE_TAG = '{http://schemas.openxmlformats.org/presentationml/2006/main}spTree'
+
+# Text runs (plain and field) and where their hyperlinks live
+RUN_TAGS = ('{http://schemas.openxmlformats.org/drawingml/2006/main}r',
+            '{http://schemas.openxmlformats.org/drawingml/2006/main}fld')
+RUN_HLINK_PATH = '{http://schemas.openxmlformats.org/drawingml/2006/main}rPr/' + HLINK_TAG
+SHAPE_HLINK_PATH = '{http://schemas.openxmlformats.org/presentationml/2006/main}cNvPr/' + HLINK_TAG
+
+def _parse_rel_targets(rels_xml: bytes) -> Dict[str, str]:
+    """Map relationship IDs to hyperlink targets, streaming over the rels XML"""
+    rel_targets: Dict[str, str] = {}
+    for _, rel in etree.iterparse(io.BytesIO(rels_xml), events=('end',), tag=REL_TAG):
+        # Only interested in hyperlinks
+        if rel.get('Type') in HYPERLINK_TYPES:
+            rel_targets[rel.get('Id')] = rel.get('Target')
+        rel.clear()
+    return rel_targets
+
+def _joined_text(elem) -> str:
+    """Join the text of every a:t under an element"""
+    parts = [t.text for t in elem.iter(TEXT_TAG) if t.text]
+    return ' '.join(parts) if parts else "Unknown text"
+
+def _shape_links(shape, rel_targets: Dict[str, str]) -> List[Dict[str, str]]:
+    """Collect a shape's hyperlinks with a single downward walk"""
+    links = []
+    
+    # Click action on the shape itself, kept in its non-visual properties
+    for child in shape:
+        if child.tag in _NV_PROPS_TAGS:
+            hlink = child.find(SHAPE_HLINK_PATH)
+            if hlink is not None and hlink.get(RID_ATTR) in rel_targets:
+                links.append({
+                    "text": _joined_text(shape),
+                    "url": rel_targets[hlink.get(RID_ATTR)],
+                    "type": "xml_link"
+                })
+            break
+    
+    # Group members are streamed and report their own runs
+    if shape.tag == GRPSP_TAG:
+        return links
+    
+    # Hyperlinks on text runs
+    for run in shape.iter(*RUN_TAGS):
+        hlink = run.find(RUN_HLINK_PATH)
+        if hlink is not None and hlink.get(RID_ATTR) in rel_targets:
+            links.append({
+                "text": _joined_text(run),
+                "url": rel_targets[hlink.get(RID_ATTR)],
+                "type": "xml_link"
+            })
+    
+    return links
+
+def _iter_xml_links(slide_xml: bytes, rel_targets: Dict[str, str]) -> Iterator[Dict[str, str]]:
+    """Stream the slide XML shape by shape and yield hyperlinks with the text that carries them"""
+    for _, shape in etree.iterparse(io.BytesIO(slide_xml), events=('end',), tag=SHAPE_TAGS):
+        yield from _shape_links(shape, rel_targets)
+        
+        # Free top-level shapes once processed; group members stay until
+        # their group has been handled
+        parent = shape.getparent()
+        if parent is not None and parent.tag == SPTREE_TAG:
+            shape.clear()
+            while shape.getprevious() is not None:
+                del parent[0]
+
+def _slide_part_names(zip_ref: zipfile.ZipFile) -> List[str]:
+    """Return the slide part names in presentation order"""
+    # Slide order comes from presentation.xml, not from the part file names
+    rels_root = etree.fromstring(zip_ref.read('ppt/_rels/presentation.xml.rels'))
+    slide_targets = {}
+    for rel in rels_root.iter(REL_TAG):
+        if rel.get('Type', '').endswith('/slide'):
+            target = rel.get('Target')
+            if target.startswith('/'):
+                slide_targets[rel.get('Id')] = target[1:]
+            else:
+                slide_targets[rel.get('Id')] = posixpath.normpath(posixpath.join('ppt', target))
+    
+    pres_root = etree.fromstring(zip_ref.read('ppt/presentation.xml'))
+    return [slide_targets[sld.get(RID_ATTR)] for sld in pres_root.iter(SLDID_TAG)
+            if sld.get(RID_ATTR) in slide_targets]
+
+def _extract_via_xml(slide_xml: bytes, rels_xml: bytes,
+                     rel_target_cache: Optional[Dict[bytes, Dict[str, str]]] = None) -> List[Dict[str, str]]:
+    """Use direct XML access to find all hyperlinks on a slide"""
+    # Slide relationship XML contains the actual URLs; slides built from the
+    # same template often share identical rels, so parse each variant once
+    if rel_target_cache is None:
+        rel_targets = _parse_rel_targets(rels_xml)
+    else:
+        key = hashlib.blake2b(rels_xml, digest_size=16).digest()
+        rel_targets = rel_target_cache.get(key)
+        if rel_targets is None:
+            rel_targets = _parse_rel_targets(rels_xml)
+            rel_target_cache[key] = rel_targets
+    if not rel_targets:
+        return []
+    return list(_iter_xml_links(slide_xml, rel_targets))
+
+def _extract_via_pptx(slide) -> List[Dict[str, str]]:
+    """Extract links from python-pptx accessible elements"""
+    slide_links = []
+    
+    # Process shapes that might have hyperlinks; each attribute is fetched
+    # once instead of probing with hasattr and then reading it again
+    for shape in slide.shapes:
+        # Text hyperlinks
+        text_frame = getattr(shape, "text_frame", None)
+        if text_frame is not None:
+            for paragraph in text_frame.paragraphs:
+                for run in paragraph.runs:
+                    hyperlink = getattr(run, "hyperlink", None)
+                    address = hyperlink.address if hyperlink is not None else None
+                    if address:
+                        slide_links.append({
+                            "text": run.text,
+                            "url": address,
+                            "type": "text_link"
+                        })
+        
+        # Shape hyperlinks (group shapes raise TypeError for click_action)
+        try:
+            click_action = getattr(shape, "click_action", None)
+        except TypeError:
+            click_action = None
+        hyperlink = getattr(click_action, "hyperlink", None) if click_action is not None else None
+        address = hyperlink.address if hyperlink is not None else None
+        if address:
+            link_text = getattr(shape, "text", None)
+            if link_text is None:
+                link_text = "Shape link"
+            slide_links.append({
+                "text": link_text,
+                "url": address,
+                "type": "shape_link"
+            })
+    
+    return slide_links
+
+def iter_slide_links(pptx_file: str, slide_numbers: Optional[Iterable[int]] = None,
+                     use_pptx: bool = False) -> Iterator[Tuple[int, List[Dict[str, str]]]]:
+    """
+    Yield (slide_number, links) for each requested slide that has links, in slide order.
+    The slide XML is read directly; set use_pptx to also report the text and
+    shape links python-pptx sees (this loads the whole deck).
+    """
     
     if not os.path.exists(pptx_file):
         print(f"Error: File '{pptx_file}' not found.")
-        return None
+        return
     
-    prs = Presentation(pptx_file)
+    # Read the file once; both the zip pass and python-pptx work from these bytes
+    with open(pptx_file, 'rb') as f:
+        pptx_data = f.read()
     
-    # If no slide numbers provided, process all slides
-    if slide_numbers is None:
-        slide_numbers = list(range(1, len(prs.slides) + 1))
+    # Read every requested slide and its rels in a single pass over the archive
+    slide_bytes = {}
+    rels_bytes = {}
+    with zipfile.ZipFile(io.BytesIO(pptx_data), 'r') as zip_ref:
+        slide_parts = _slide_part_names(zip_ref)
+        
+        # If no slide numbers provided, process all slides; a set keeps the
+        # per-slide membership checks constant time
+        wanted = frozenset(slide_numbers) if slide_numbers is not None else None
+        
+        wanted_parts = {}
+        for slide_num, part_name in enumerate(slide_parts, 1):
+            if wanted is None or slide_num in wanted:
+                part_dir, part_file = posixpath.split(part_name)
+                wanted_parts[part_name] = (slide_bytes, slide_num)
+                wanted_parts[f"{part_dir}/_rels/{part_file}.rels"] = (rels_bytes, slide_num)
+        
+        for info in zip_ref.infolist():
+            if info.filename in wanted_parts:
+                target, slide_num = wanted_parts[info.filename]
+                target[slide_num] = zip_ref.read(info)
     
-    results = {}
+    # python-pptx is only loaded on request; it isn't thread-safe, so it
+    # walks the shapes on this thread while the XML pass runs in the pool
+    prs = Presentation(io.BytesIO(pptx_data)) if use_pptx else None
     
-    # Extract links from python-pptx accessible elements
-    for i, slide in enumerate(prs.slides):
-        slide_num = i + 1
+    # Parsed rels are read-only, so workers can share them
+    rel_target_cache = {}
+    
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        xml_futures = {slide_num: executor.submit(_extract_via_xml, slide_bytes[slide_num], rels_bytes[slide_num], rel_target_cache)
+                       for slide_num in slide_bytes if slide_num in rels_bytes}
         
-        if slide_num not in slide_numbers:
-            continue
+        for slide_num in range(1, len(slide_parts) + 1):
+            if wanted is not None and slide_num not in wanted:
+                continue
             
-        slide_links = []
-        
-        # Process shapes that might have hyperlinks
-        for shape in slide.shapes:
-            # Text hyperlinks
-            if hasattr(shape, "text_frame") and shape.text_frame:
-                for paragraph in shape.text_frame.paragraphs:
-                    for run in paragraph.runs:
-                        if hasattr(run, "hyperlink") and run.hyperlink and run.hyperlink.address:
-                            slide_links.append({
-                                "text": run.text,
-                                "url": run.hyperlink.address,
-                                "type": "text_link"
-                            })
+            found_links = []
+            if prs is not None:
+                found_links.extend(_extract_via_pptx(prs.slides[slide_num - 1]))
             
-            # Shape hyperlinks
-            if hasattr(shape, "click_action") and shape.click_action:
-                if hasattr(shape.click_action, "hyperlink") and shape.click_action.hyperlink.address:
-                    link_text = shape.text if hasattr(shape, "text") else "Shape link"
-                    slide_links.append({
-                        "text": link_text,
-                        "url": shape.click_action.hyperlink.address,
-                        "type": "shape_link"
-                    })
-        
-        # Now use direct XML access to find links that python-pptx might miss
-        try:
-            with zipfile.ZipFile(pptx_file, 'r') as zip_ref:
-                # Get slide's XML content
-                slide_xml_path = f"ppt/slides/slide{slide_num}.xml"
-                if slide_xml_path in zip_ref.namelist():
-                    slide_xml = zip_ref.read(slide_xml_path)
-                    root = ET.fromstring(slide_xml)
-                    
-                    # XML namespaces in PPTX files
-                    namespaces = {
-                        'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-                        'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
-                        'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
-                    }
-                    
-                    # Get slide relationship XML (contains actual URLs)
-                    rels_path = f"ppt/slides/_rels/slide{slide_num}.xml.rels"
-                    if rels_path in zip_ref.namelist():
-                        rels_xml = zip_ref.read(rels_path)
-                        rels_root = ET.fromstring(rels_xml)
-                        
-                        # Create a mapping of relationship IDs to targets (URLs)
-                        rel_targets = {}
-                        for rel in rels_root.findall('.//{http://schemas.openxmlformats.org/package/2006/relationships}Relationship'):
-                            rel_id = rel.get('Id')
-                            rel_target = rel.get('Target')
-                            rel_type = rel.get('Type')
-                            
-                            # Only interested in hyperlinks
-                            if 'hyperlink' in rel_type:
-                                rel_targets[rel_id] = rel_target
-                        
-                        # Find all hyperlink references in the slide XML
-                        for link_elem in root.findall('.//a:hlinkClick', namespaces):
-                            rel_id = link_elem.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id')
-                            if rel_id in rel_targets:
-                                # Try to find the text associated with this link
-                                parent = link_elem.getparent().getparent()
-                                link_text = "Unknown text"
-                                
-                                # Look for text in this element or its children
-                                text_elems = parent.findall('.//a:t', namespaces)
-                                if text_elems:
-                                    link_text = ' '.join(t.text for t in text_elems if t.text)
-                                
-                                slide_links.append({
-                                    "text": link_text,
-                                    "url": rel_targets[rel_id],
-                                    "type": "xml_link"
-                                })
-        except Exception as e:
-            print(f"Error processing slide {slide_num} XML: {e}")
+            if slide_num in xml_futures:
+                try:
+                    found_links.extend(xml_futures.pop(slide_num).result())
+                except Exception as e:
+                    print(f"Error processing slide {slide_num} XML: {e}")
+            
+            # The XML pass re-reports what python-pptx already found, so keep
+            # the first link for each (url, text) pair on the slide
+            slide_links = []
+            seen = set()
+            for link in found_links:
+                key = (link["url"], link["text"])
+                if key in seen:
+                    continue
+                seen.add(key)
+                slide_links.append(link)
             
-        # Store the results for this slide
-        if slide_links:
-            results[slide_num] = slide_links
+            if slide_links:
+                yield slide_num, slide_links
+
+def extract_slide_links(pptx_file: str, slide_numbers: Optional[Iterable[int]] = None,
+                        use_pptx: bool = False) -> Optional[Dict[int, List[Dict[str, str]]]]:
+    """Extract links from specific slides in a PowerPoint presentation"""
+    if not os.path.exists(pptx_file):
+        print(f"Error: File '{pptx_file}' not found.")
+        return None
     
-    return results
+    return dict(iter_slide_links(pptx_file, slide_numbers, use_pptx=use_pptx))
 
 def display_links(links_dict):
-    """Display the extracted links in a readable format"""
+    """
+    Display the extracted links in a readable format.
+    Also accepts the iter_slide_links generator, printing each slide as it arrives
+    and the totals at the end.
+    """
+    # Output is built up and written in one call per slide (or once for a
+    # dict) rather than a print per line
+    if links_dict is not None and not isinstance(links_dict, dict):
+        total_links = 0
+        total_slides = 0
+        for slide_num, links in links_dict:
+            sys.stdout.write(format_slide_links(slide_num, links))
+            total_links += len(links)
+            total_slides += 1
+        
+        if total_slides:
+            sys.stdout.write(f"Found {total_links} links across {total_slides} slides\n")
+        else:
+            sys.stdout.write("No links found in the specified slides.\n")
+        return
+    
     if not links_dict:
-        print("No links found in the specified slides.")
+        sys.stdout.write("No links found in the specified slides.\n")
         return
     
     total_links = sum(len(links) for links in links_dict.values())
-    print(f"Found {total_links} links across {len(links_dict)} slides:")
-    print()
-    
+    out = [f"Found {total_links} links across {len(links_dict)} slides:\n\n"]
     for slide_num, links in sorted(links_dict.items()):
-        print(f"Slide {slide_num}: {len(links)} links")
-        for i, link in enumerate(links, 1):
-            print(f"  {i}. \"{link['text']}\" -> {link['url']} ({link['type']})")
-        print()
+        out.append(format_slide_links(slide_num, links))
+    sys.stdout.write(''.join(out))
+
+def format_slide_links(slide_num: int, links: List[Dict[str, str]]) -> str:
+    """Format the links found on one slide"""
+    lines = [f"Slide {slide_num}: {len(links)} links"]
+    for i, link in enumerate(links, 1):
+        lines.append(f"  {i}. \"{link['text']}\" -> {link['url']} ({link['type']})")
+    lines.append("\n")
+    return '\n'.join(lines)
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python extract_slide_links.py <pptx_file> [slide_numbers]")
+    # --pptx also runs the python-pptx shape scan
+    args = [arg for arg in sys.argv[1:] if arg != "--pptx"]
+    use_pptx = len(args) != len(sys.argv) - 1
+    
+    if len(args) < 1:
+        print("Usage: python extract_slide_links.py <pptx_file> [slide_numbers] [--pptx]")
         print("Example: python extract_slide_links.py presentation.pptx 1 5 20")
         sys.exit(1)
     
-    pptx_file = sys.argv[1]
+    pptx_file = args[0]
     
     # If slide numbers are provided, convert them to integers
     slide_numbers = None
-    if len(sys.argv) > 2:
+    if len(args) > 1:
         try:
-            slide_numbers = [int(x) for x in sys.argv[2:]]
+            slide_numbers = [int(x) for x in args[1:]]
         except ValueError:
             print("Error: Slide numbers must be integers")
             sys.exit(1)
     
-    links = extract_slide_links(pptx_file, slide_numbers)
-    display_links(links)
\ No newline at end of file
+    # Stream the results so large decks are printed slide by slide
+    display_links(iter_slide_links(pptx_file, slide_numbers, use_pptx=use_pptx))
\ No newline at end of file
@@ -2,265 +2,496 @@ import os
 import json
 import anthropic
 from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
 import sys
 import re
 import time
 import argparse
+import atexit
+import shutil
+import zipfile
 from datetime import datetime
+from operator import itemgetter
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 from dotenv import load_dotenv
 
+# NumPy is optional; it only speeds up token estimates for large decks
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Numba is optional too; with NumPy it compiles the CJK count used by bulk token estimates
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# orjson is optional; it speeds up the JSON sent to and parsed from the API and the
+# recovery file writes, with the stdlib json module as the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _json_dumps(obj):
+    """Indented JSON text with non-ASCII characters kept as is"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+def _json_loads(text):
+    """Parse JSON text; raises json.JSONDecodeError (orjson's error subclasses it)"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+def _json_line(obj):
+    """Compact single-line JSON text, for append-only journals"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+def _write_json_file(path, obj):
+    """Write obj as indented UTF-8 JSON to path"""
+    if orjson is not None:
+        # orjson produces UTF-8 bytes directly, skipping the str -> bytes encode
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, ensure_ascii=False, indent=2)
+
 # Load environment variables from .env file
 load_dotenv()
 
-def extract_text(pptx_file):  
-    """Extract text from PowerPoint presentation with enhanced support for various text content types"""
-    prs = Presentation(pptx_file)  
-    text_dict = {}
-    slide_metadata = []  # Store structured context  
+# Decks need at least this many slides per worker process before extraction is parallelized
+PARALLEL_EXTRACTION_MIN_SLIDES = 25
+
+# Batches translated concurrently by default; requests mostly wait on the API
+DEFAULT_TRANSLATION_WORKERS = 5
+
+# The recovery journal is compacted into the snapshot once it grows past this multiple of the
+# snapshot size, or holds this many entries (which bounds the replay needed on resume)
+RECOVERY_COMPACT_RATIO = 5
+RECOVERY_SNAPSHOT_EVERY = 50
+
+# Target languages that get smaller batches and retry chunks: (max batch tokens, retry divisor)
+_CJK_LANGS = frozenset({"ja", "zh", "ko"})
+_BATCH_PARAMS = {True: (80000, 8), False: (150000, 4)}
+
+# Guards the shared cost tracker when batches are translated from several threads
+_cost_lock = threading.Lock()
+
+# Basic CJK Unified Ideographs, used for token estimates
+_CJK_RE = re.compile(r'[\u4E00-\u9FFF]')
+
+if njit is not None and np is not None:
+    @njit(cache=True)
+    def _count_cjk_segments(codepoints, offsets):
+        """CJK code points in each codepoints[offsets[i]:offsets[i+1]] segment"""
+        counts = np.zeros(len(offsets) - 1, dtype=np.int64)
+        for i in range(len(offsets) - 1):
+            n = 0
+            for j in range(offsets[i], offsets[i + 1]):
+                c = codepoints[j]
+                if c >= 0x4E00 and c <= 0x9FFF:
+                    n += 1
+            counts[i] = n
+        return counts
+else:
+    _count_cjk_segments = None
+
+class RunProps:
+    """Character formatting of a run, saved before its text is replaced"""
+    __slots__ = ('size', 'bold', 'italic', 'underline', 'name', 'color', 'hyperlink')
+
+    def __init__(self, run, keep_hyperlink=False):
+        font = getattr(run, "font", None)
+        self.size = getattr(font, "size", None) or None
+        self.bold = getattr(font, "bold", None)
+        self.italic = getattr(font, "italic", None)
+        self.underline = getattr(font, "underline", None)
+        self.name = getattr(font, "name", None) or None
+        # Only explicit RGB colors can be copied back; theme colors have no .rgb
+        self.color = getattr(getattr(font, "color", None), "rgb", None)
+        self.hyperlink = None
+        if keep_hyperlink:
+            hyperlink = getattr(run, "hyperlink", None)
+            self.hyperlink = getattr(hyperlink, "address", None)
+
+    def apply_to(self, run):
+        font = getattr(run, "font", None)
+        if not font:
+            return
+        if self.size:
+            font.size = self.size
+        if self.bold is not None:
+            font.bold = self.bold
+        if self.italic is not None:
+            font.italic = self.italic
+        if self.underline is not None:
+            font.underline = self.underline
+        if self.name:
+            font.name = self.name
+        if self.color:
+            font.color.rgb = self.color
+        if self.hyperlink and hasattr(run, "hyperlink"):
+            run.hyperlink.address = self.hyperlink
+
+
+class ParaProps:
+    """Paragraph alignment plus the RunProps of each of its runs"""
+    __slots__ = ('alignment', 'runs')
+
+    def __init__(self, para, keep_hyperlinks=False):
+        self.alignment = getattr(para, "alignment", None) or None
+        self.runs = [RunProps(run, keep_hyperlinks) for run in para.runs]
+
+    def apply_to(self, para):
+        if self.alignment is not None:
+            para.alignment = self.alignment
+        # Run formatting only maps back when the run count is unchanged
+        if len(para.runs) == len(self.runs):
+            for run, run_props in zip(para.runs, self.runs):
+                run_props.apply_to(run)
+
+
+def _replace_text_frame_preserving_format(text_frame, new_text, keep_hyperlinks=False):
+    """Replace the text of a text frame, restoring paragraph and run formatting where it still lines up"""
+    paragraphs = text_frame.paragraphs
+    # Fast path: a single-run paragraph keeps its run element (and with it all of its
+    # formatting and any hyperlink), so only the text needs swapping. Line breaks
+    # still need the full rebuild since a run cannot hold them, and so do paragraphs
+    # with fields (slide numbers, dates) or breaks, which `runs` doesn't list.
+    if len(paragraphs) == 1 and "\n" not in new_text and "\v" not in new_text:
+        runs = paragraphs[0].runs
+        if len(runs) == 1 and not paragraphs[0]._p.xpath("./a:fld | ./a:br"):
+            runs[0].text = new_text
+            return
+
+    # Save original text properties before replacement
+    para_properties = [ParaProps(para, keep_hyperlinks) for para in paragraphs]
     
-    # Extract text from a shape recursively, to handle grouped shapes
-    def extract_shape_text(shape, shape_type="shape", parent_id=""):
-        extracted_texts = {}
-        
-        # Get alt text if available (often contains important content)
-        try:
-            if hasattr(shape, "shape_properties") and hasattr(shape.shape_properties, "title") and shape.shape_properties.title:
-                alt_text_id = f"{parent_id}_alt_text"
-                extracted_texts[alt_text_id] = shape.shape_properties.title.strip()
-        except:
-            pass
-        
-        # Extract text from basic shape
-        if hasattr(shape, "text") and shape.text.strip():
-            shape_text = shape.text.strip()
-            extracted_texts[parent_id] = shape_text
+    # Replace the text, then try to restore formatting if the paragraph count is unchanged
+    text_frame.text = new_text
+    paragraphs = text_frame.paragraphs
+    if len(paragraphs) == len(para_properties):
+        for para, para_props in zip(paragraphs, para_properties):
+            para_props.apply_to(para)
+
+def _write_single_run_text(shape_element, new_text):
+    """
+    Write new_text straight into the a:t node of a shape whose text is a single
+    paragraph holding a single run, keeping that run's formatting. Returns False
+    (writing nothing) for any other layout, so the caller can fall back.
+    """
+    if "\n" in new_text or "\v" in new_text:
+        return False
+    paragraphs = shape_element.xpath("./p:txBody/a:p")
+    if len(paragraphs) != 1:
+        return False
+    text_nodes = paragraphs[0].xpath("./a:r/a:t")
+    if len(text_nodes) != 1 or paragraphs[0].xpath("./a:fld | ./a:br"):
+        return False
+    try:
+        text_nodes[0].text = new_text
+    except ValueError:
+        return False  # Characters XML can't hold; python-pptx escapes those
+    return True
+
+def _save_dirty_parts(prs, pptx_file, output_file, dirty_parts):
+    """
+    Write output_file as a copy of the source zip with only the dirty parts (and their
+    rels) re-serialized; every other member is copied over as is. Returns False without
+    writing anything when the package no longer matches the source (e.g. a part was
+    added), so the caller can fall back to prs.save.
+    """
+    tmp_file = f"{output_file}.tmp"
+    try:
+        with zipfile.ZipFile(pptx_file) as src:
+            member_names = set(src.namelist())
+            if any(part.partname.membername not in member_names for part in prs.part.package.iter_parts()):
+                return False
+            
+            replacements = {}
+            for part in dirty_parts:
+                replacements[part.partname.membername] = part.blob
+                if len(part.rels):
+                    replacements[part.partname.rels_uri.membername] = part.rels.xml
+            
+            # Write to a temp file and swap it in, so a failure never leaves a partial output
+            with zipfile.ZipFile(tmp_file, "w") as dst:
+                for item in src.infolist():
+                    data = replacements.get(item.filename)
+                    dst.writestr(item, data if data is not None else src.read(item))
+        os.replace(tmp_file, output_file)
+        return True
+    except (OSError, zipfile.BadZipFile, KeyError) as e:
+        print(f"Partial save failed ({e}), saving the full presentation")
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        return False
+
+def _iter_slide_shapes(slide, worklists=None):
+    """
+    Build a slide's shape worklist in one pass:
+    (shape_id, shape, is_placeholder, ph_type, has_table) per top-level shape.
+    When a worklists dict is given, it is cached there by slide id so the
+    extraction and update phases over one Presentation share it.
+    """
+    if worklists is not None and slide.slide_id in worklists:
+        return worklists[slide.slide_id]
+    worklist = []
+    for shape_id, shape in enumerate(slide.shapes):
+        is_placeholder = getattr(shape, "is_placeholder", False)
+        ph_type = None
+        if is_placeholder:
+            # Read once per shape and kept as a plain int; every title/header/footer
+            # check in both phases compares against this instead of the XML
+            try:
+                ph_type = int(shape.placeholder_format.type)
+            except (ValueError, AttributeError, TypeError):
+                pass  # Handle case where placeholder_format raises an error
+        worklist.append((shape_id, shape, is_placeholder, ph_type, getattr(shape, "has_table", False)))
+    if worklists is not None:
+        worklists[slide.slide_id] = worklist
+    return worklist
+
+def _extract_group_text(shape, parent_id):
+    """Extract text from any child shapes in a group"""
+    try:
+        for i, child in enumerate(shape.shapes):
+            child_id = f"{parent_id}_child_{i}"
+            yield from _extract_shape_text(child, "group_child", child_id)
+    except (AttributeError, TypeError, ValueError):
+        pass
+
+def _extract_ole_text(shape, parent_id):
+    """We can't directly extract text from OLE objects, but we can use alt text"""
+    alternative_text = getattr(shape, "alternative_text", None)
+    if alternative_text:
+        yield f"{parent_id}_ole", alternative_text.strip()
+
+def _extract_chart_text(shape, parent_id):
+    """Extract a chart's title and category names"""
+    chart_text = []
+    try:
+        chart = shape.chart
         
-        # Handle SmartArt and other grouped shapes
-        try:
-            if hasattr(shape, "element") and hasattr(shape, "shapes"):
-                # Extract text from any child shapes in a group or SmartArt
-                try:
-                    for i, child in enumerate(shape.shapes):
-                        child_id = f"{parent_id}_child_{i}"
-                        child_texts = extract_shape_text(child, "group_child", child_id)
-                        extracted_texts.update(child_texts)
-                except (AttributeError, TypeError, ValueError):
-                    pass
-        except:
-            pass
+        # Extract chart title (has_title first, as chart_title adds an empty title when missing)
+        if chart.has_title and chart.chart_title.has_text_frame:
+            chart_text.append(chart.chart_title.text_frame.text)
         
-        # Handle OLE objects (embedded Excel, etc.)
-        try:
-            if hasattr(shape, "shape_type") and shape.shape_type == 7:  # MSO_SHAPE_TYPE.OLE_OBJECT
-                ole_id = f"{parent_id}_ole"
-                # We can't directly extract text from OLE objects, but we can use alt text
-                if hasattr(shape, "alternative_text") and shape.alternative_text:
-                    extracted_texts[ole_id] = shape.alternative_text.strip()
-        except:
-            pass
-            
-        # Handle charts
+        # Extract category names
+        for plot in chart.plots:
+            for category in plot.categories:
+                if category and category.strip():
+                    chart_text.append(category)
+    except (AttributeError, TypeError, ValueError):
+        return
+    
+    if chart_text:
+        chart_id = f"{parent_id}_chart"
+        yield chart_id, " | ".join([t for t in chart_text if t])
+
+_SHAPE_TEXT_HANDLERS = {
+    MSO_SHAPE_TYPE.GROUP: _extract_group_text,
+    MSO_SHAPE_TYPE.EMBEDDED_OLE_OBJECT: _extract_ole_text,
+    MSO_SHAPE_TYPE.CHART: _extract_chart_text,
+}
+
+# Extract text from a shape recursively, to handle grouped shapes; yields (text_id, text)
+# pairs so nested groups are not merged dict by dict on the way up
+def _extract_shape_text(shape, shape_type="shape", parent_id=""):
+    # Get alt text if available (often contains important content)
+    shape_properties = getattr(shape, "shape_properties", None)
+    alt_text = getattr(shape_properties, "title", None)
+    if alt_text:
+        yield f"{parent_id}_alt_text", alt_text.strip()
+    
+    # Extract text from basic shape (each property access re-reads the XML, so read it once)
+    shape_text = getattr(shape, "text", None)
+    if shape_text:
+        shape_text = shape_text.strip()
+        if shape_text:
+            yield parent_id, shape_text
+    
+    # Groups, OLE objects and charts each need their own handling; one shape_type
+    # lookup picks it instead of probing every shape for each kind
+    try:
+        handler = _SHAPE_TEXT_HANDLERS.get(shape.shape_type)
+    except (AttributeError, NotImplementedError):
+        handler = None  # Unrecognized shape types raise NotImplementedError
+    if handler is not None:
+        yield from handler(shape, parent_id)
+
+def _extract_slide_text(slide, index, worklists=None):
+    """Extract the text of one slide; returns (text_dict, slide_info)"""
+    text_dict = {}
+    slide_info = {  
+        "slide_number": index + 1,  
+        "title": "",  
+        "content": []  
+    }
+    
+    # Extract slide notes if any (has_notes_slide avoids creating an empty notes slide)
+    if slide.has_notes_slide:
         try:
-            if hasattr(shape, "chart") and shape.chart:
-                try:
-                    chart_text = []
-                    
-                    # Extract chart title
-                    if hasattr(shape.chart, "chart_title") and shape.chart.chart_title and shape.chart.chart_title.text_frame:
-                        chart_text.append(shape.chart.chart_title.text_frame.text)
-                    
-                    # Extract category names
-                    if hasattr(shape.chart, "plots"):
-                        for plot in shape.chart.plots:
-                            if hasattr(plot, "categories"):
-                                for category in plot.categories:
-                                    if category and category.strip():
-                                        chart_text.append(category)
-                    
-                    if chart_text:
-                        chart_id = f"{parent_id}_chart"
-                        extracted_texts[chart_id] = " | ".join([t for t in chart_text if t])
-                except (AttributeError, TypeError):
-                    pass
-        except:
+            note_id = f"slide_{index+1}_notes"
+            for note_shape in slide.notes_slide.shapes:
+                note_text = getattr(note_shape, "text", None)
+                if note_text and note_text.strip():
+                    note_text = note_text.strip()
+                    text_dict[note_id] = note_text
+                    slide_info["content"].append(f"[Note: {note_text}]")
+        except (AttributeError, KeyError, ValueError):
             pass
+    
+    # Process all shapes on the slide in a single pass over the precomputed worklist
+    for shape_id, shape, is_placeholder, ph_type, has_table in _iter_slide_shapes(slide, worklists):
+        base_id = f"slide_{index+1}_shape_{shape_id}"
         
-        return extracted_texts
-      
-    for index, slide in enumerate(prs.slides):  
-        slide_info = {  
-            "slide_number": index + 1,  
-            "title": "",  
-            "content": []  
-        }
-        
-        # Extract slide notes if any
-        if hasattr(slide, "notes_slide") and slide.notes_slide:
-            try:
-                for note_shape in slide.notes_slide.shapes:
-                    if hasattr(note_shape, "text") and note_shape.text.strip():
-                        note_id = f"slide_{index+1}_notes"
-                        note_text = note_shape.text.strip()
-                        text_dict[note_id] = note_text
-                        slide_info["content"].append(f"[Note: {note_text}]")
-            except:
-                pass
+        # Extract text from this shape (and any grouped sub-shapes),
+        # and add all of it to our dictionaries as it is produced
+        base_text = None
+        for obj_id, text_content in _extract_shape_text(shape, "shape", base_id):
+            text_content = text_content.strip()
+            if text_content:
+                text_dict[obj_id] = text_content
+                slide_info["content"].append(text_content)
+                
+                # If this is the base shape and looks like a title
+                if obj_id == base_id:
+                    base_text = text_content
+                    # If this looks like a title shape, also add to slide title
+                    if getattr(shape, "is_title", False):
+                        slide_info["title"] = text_content
+                    # Alternatively check if it's a placeholder and has the right type
+                    elif is_placeholder:
+                        if ph_type == 1:  # 1 is title placeholder
+                            slide_info["title"] = text_content
+                    # Fallback for first shape on first slide
+                    elif index == 0 and shape_id == 0:
+                        slide_info["title"] = text_content
         
-        # Process all shapes on the slide
-        for shape_id, shape in enumerate(slide.shapes):
-            base_id = f"slide_{index+1}_shape_{shape_id}"
-            
-            # Extract text from this shape (and any grouped sub-shapes)
-            shape_texts = extract_shape_text(shape, "shape", base_id)
-            
-            # Add all extracted text to our dictionaries
-            for obj_id, text_content in shape_texts.items():
-                if text_content.strip():
-                    text_dict[obj_id] = text_content.strip()
-                    slide_info["content"].append(text_content.strip())
-                    
-                    # If this is the base shape and looks like a title
-                    if obj_id == base_id:
-                        # If this looks like a title shape, also add to slide title
-                        if hasattr(shape, "is_title") and shape.is_title:
-                            slide_info["title"] = text_content.strip()
-                        # Alternatively check if it's a placeholder and has the right type
-                        elif hasattr(shape, "is_placeholder") and shape.is_placeholder and hasattr(shape, "placeholder_format"):
-                            try:
-                                if shape.placeholder_format.type == 1:  # 1 is title placeholder
-                                    slide_info["title"] = text_content.strip()
-                            except (ValueError, AttributeError):
-                                pass  # Handle case where placeholder_format raises an error
-                        # Fallback for first shape on first slide
-                        elif index == 0 and shape_id == 0:
-                            slide_info["title"] = text_content.strip()
-            
-            # Handle tables separately
-            if hasattr(shape, "has_table") and shape.has_table:
-                for row_idx, row in enumerate(shape.table.rows):
-                    for col_idx, cell in enumerate(row.cells):
-                        if cell.text.strip():
-                            # Create a unique ID for the table cell
-                            cell_id = f"slide_{index+1}_table_{shape_id}_r{row_idx}_c{col_idx}"
-                            text_dict[cell_id] = cell.text.strip()
-                            slide_info["content"].append(cell.text.strip())
+        # Handle tables separately
+        if has_table:
+            for row_idx, row in enumerate(shape.table.rows):
+                for col_idx, cell in enumerate(row.cells):
+                    cell_text = cell.text.strip()
+                    if cell_text:
+                        # Create a unique ID for the table cell
+                        cell_id = f"slide_{index+1}_table_{shape_id}_r{row_idx}_c{col_idx}"
+                        text_dict[cell_id] = cell_text
+                        slide_info["content"].append(cell_text)
         
-        # Try to extract header and footer text if available
+        # Header and footer text: common placeholder types for header (3), footer (4), date (2)
+        if ph_type in (2, 3, 4) and base_text:
+            ph_id = f"slide_{index+1}_placeholder_{ph_type}"
+            text_dict[ph_id] = base_text
+            slide_info["content"].append(base_text)
+    
+    return text_dict, slide_info
+
+def _extract_slide_range(pptx_file, indices):
+    """Process-pool worker: reopen the deck and extract the given slides"""
+    slides = list(Presentation(pptx_file).slides)
+    return [_extract_slide_text(slides[index], index) for index in indices]
+
+def extract_text(pptx_file, prs=None, worklists=None):  
+    """
+    Extract text from PowerPoint presentation with enhanced support for various text content types.
+    Pass an already loaded prs (and a worklists dict) to reuse them in update_slides.
+    """
+    if prs is None:
+        prs = Presentation(pptx_file)
+    text_dict = {}
+    slide_metadata = []  # Store structured context  
+    
+    slides = list(prs.slides)
+    workers = min(os.cpu_count() or 1, len(slides) // PARALLEL_EXTRACTION_MIN_SLIDES)
+    per_slide = None
+    
+    # Slides are independent, so large decks are split across worker processes,
+    # each reopening the file; small decks aren't worth the process start-up
+    if workers > 1:
+        chunk_size = -(-len(slides) // workers)
+        chunks = [list(range(i, min(i + chunk_size, len(slides)))) for i in range(0, len(slides), chunk_size)]
         try:
-            # Check placeholder shapes for header/footer content
-            for shape in slide.shapes:
-                if hasattr(shape, "is_placeholder") and shape.is_placeholder and hasattr(shape, "placeholder_format"):
-                    try:
-                        ph_type = shape.placeholder_format.type
-                        # Common placeholder types for header (3), footer (4), date (2)
-                        if ph_type in [2, 3, 4]:
-                            if hasattr(shape, "text") and shape.text.strip():
-                                ph_id = f"slide_{index+1}_placeholder_{ph_type}"
-                                text_dict[ph_id] = shape.text.strip()
-                                slide_info["content"].append(shape.text.strip())
-                    except:
-                        pass
-        except:
-            pass
-            
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                per_slide = [result for chunk_results in executor.map(_extract_slide_range, [pptx_file] * len(chunks), chunks)
+                             for result in chunk_results]
+        except Exception as e:
+            print(f"Parallel extraction failed ({e}), falling back to sequential extraction")
+            per_slide = None
+    
+    if per_slide is None:
+        per_slide = [_extract_slide_text(slide, index, worklists) for index, slide in enumerate(slides)]
+    
+    for slide_texts, slide_info in per_slide:
+        text_dict.update(slide_texts)
         slide_metadata.append(slide_info)
     
     # Extract any text from master slides that might appear on all slides
     try:
         for idx, master in enumerate(prs.slide_masters):
             for shape_id, shape in enumerate(master.shapes):
-                if hasattr(shape, "text") and shape.text.strip():
+                master_text = getattr(shape, "text", None)
+                if master_text and master_text.strip():
                     master_id = f"master_{idx+1}_shape_{shape_id}"
-                    text_dict[master_id] = shape.text.strip()
-    except:
+                    text_dict[master_id] = master_text.strip()
+    except (AttributeError, KeyError, ValueError):
         pass
         
     print(f"Enhanced extraction found {len(text_dict)} text elements")
     return text_dict, slide_metadata
 
-def update_slides(pptx_file, output_file, translated_texts):
-    """Update PowerPoint presentation with translated text, handling various content types"""
-    prs = Presentation(pptx_file)
+def update_slides(pptx_file, output_file, translated_texts, prs=None, worklists=None):
+    """
+    Update PowerPoint presentation with translated text, handling various content types.
+    Pass the prs (and worklists) used by extract_text to skip reopening the file.
+    """
+    if prs is None:
+        prs = Presentation(pptx_file)
     updated_count = 0
+    # Parts whose XML changed; only these are re-serialized when saving
+    dirty_parts = set()
     total_slides = len(prs.slides)
     
+    # Every shape id with something translated under it (its own text, alt text,
+    # OLE/chart text or a group child), so untouched shapes are skipped before
+    # any of their key variants are built and looked up
+    translated_shape_ids = set()
+    for key in translated_texts:
+        base_id = key
+        for suffix in ("_alt_text", "_ole", "_chart"):
+            if base_id.endswith(suffix):
+                base_id = base_id[:-len(suffix)]
+                break
+        translated_shape_ids.add(base_id)
+        pos = base_id.find("_child_")
+        while pos != -1:
+            translated_shape_ids.add(base_id[:pos])
+            pos = base_id.find("_child_", pos + 1)
+    
     # Function to update shape text recursively for grouped shapes
     def update_shape_text(shape, shape_type="shape", parent_id=""):
         shape_updated = False
         
+        if parent_id not in translated_shape_ids:
+            return shape_updated
+        
         # Update basic shape text while preserving formatting
         if hasattr(shape, "text") and shape.text.strip():
             if parent_id in translated_texts:
                 # If it has a text_frame, use that to preserve formatting
                 if hasattr(shape, "text_frame"):
                     try:
-                        # Save original text properties before replacement
-                        para_properties = []
-                        for para in shape.text_frame.paragraphs:
-                            para_props = {
-                                'font_size': None,
-                                'font_bold': None,
-                                'font_italic': None,
-                                'font_underline': None,
-                                'font_name': None,
-                                'alignment': None,
-                                'runs': []
-                            }
-                            
-                            # Save paragraph level properties
-                            if hasattr(para, "alignment") and para.alignment:
-                                para_props['alignment'] = para.alignment
-                                
-                            # Save run level properties (character formatting)
-                            for run in para.runs:
-                                run_props = {}
-                                if hasattr(run, "font") and run.font:
-                                    if hasattr(run.font, "size") and run.font.size:
-                                        run_props['size'] = run.font.size
-                                    if hasattr(run.font, "bold") and run.font.bold is not None:
-                                        run_props['bold'] = run.font.bold
-                                    if hasattr(run.font, "italic") and run.font.italic is not None:
-                                        run_props['italic'] = run.font.italic
-                                    if hasattr(run.font, "underline") and run.font.underline is not None:
-                                        run_props['underline'] = run.font.underline
-                                    if hasattr(run.font, "name") and run.font.name:
-                                        run_props['name'] = run.font.name
-                                    if hasattr(run.font, "color") and run.font.color and hasattr(run.font.color, "rgb"):
-                                        run_props['color'] = run.font.color.rgb
-                                    
-                                para_props['runs'].append(run_props)
-                            
-                            para_properties.append(para_props)
-                        
-                        # Clear the text frame and add the translated text
-                        shape.text = ""
-                        shape.text = translated_texts[parent_id]
-                        
-                        # Try to restore formatting if possible
-                        if len(shape.text_frame.paragraphs) == len(para_properties):
-                            for i, para in enumerate(shape.text_frame.paragraphs):
-                                # Restore paragraph alignment
-                                if para_properties[i]['alignment'] is not None:
-                                    para.alignment = para_properties[i]['alignment']
-                                
-                                # Restore run level formatting if number of runs match
-                                if len(para.runs) == len(para_properties[i]['runs']):
-                                    for j, run in enumerate(para.runs):
-                                        if hasattr(run, "font") and run.font:
-                                            props = para_properties[i]['runs'][j]
-                                            if 'size' in props and props['size']:
-                                                run.font.size = props['size']
-                                            if 'bold' in props and props['bold'] is not None:
-                                                run.font.bold = props['bold']
-                                            if 'italic' in props and props['italic'] is not None:
-                                                run.font.italic = props['italic']
-                                            if 'underline' in props and props['underline'] is not None:
-                                                run.font.underline = props['underline']
-                                            if 'name' in props and props['name']:
-                                                run.font.name = props['name']
-                                            if 'color' in props and props['color']:
-                                                run.font.color.rgb = props['color']
+                        _replace_text_frame_preserving_format(shape.text_frame, translated_texts[parent_id])
                         shape_updated = True
                     except Exception as e:
                         # If detailed formatting preservation fails, fallback to simple replacement
@@ -273,51 +504,48 @@ def update_slides(pptx_file, output_file, translated_texts):
         
         # Handle alt text
         alt_text_id = f"{parent_id}_alt_text"
-        if alt_text_id in translated_texts and hasattr(shape, "shape_properties") and hasattr(shape.shape_properties, "title"):
-            try:
-                shape.shape_properties.title = translated_texts[alt_text_id]
-                shape_updated = True
-            except:
-                pass
-        
-        # Handle SmartArt and other grouped shapes
-        try:
-            if hasattr(shape, "element") and hasattr(shape, "shapes"):
-                # Update text from any child shapes in a group or SmartArt
+        if alt_text_id in translated_texts:
+            shape_properties = getattr(shape, "shape_properties", None)
+            if hasattr(shape_properties, "title"):
                 try:
-                    for i, child in enumerate(shape.shapes):
-                        child_id = f"{parent_id}_child_{i}"
-                        child_updated = update_shape_text(child, "group_child", child_id)
-                        shape_updated = shape_updated or child_updated
+                    shape_properties.title = translated_texts[alt_text_id]
+                    shape_updated = True
                 except (AttributeError, TypeError, ValueError):
                     pass
-        except:
-            pass
+        
+        # Handle SmartArt and other grouped shapes
+        child_shapes = getattr(shape, "shapes", None)
+        if child_shapes is not None:
+            # Update text from any child shapes in a group or SmartArt
+            try:
+                for i, child in enumerate(child_shapes):
+                    child_id = f"{parent_id}_child_{i}"
+                    child_updated = update_shape_text(child, "group_child", child_id)
+                    shape_updated = shape_updated or child_updated
+            except (AttributeError, TypeError, ValueError):
+                pass
         
         # Update OLE objects alt text if needed
-        try:
-            ole_id = f"{parent_id}_ole"
-            if ole_id in translated_texts and hasattr(shape, "alternative_text"):
+        ole_id = f"{parent_id}_ole"
+        if ole_id in translated_texts and hasattr(shape, "alternative_text"):
+            try:
                 shape.alternative_text = translated_texts[ole_id]
                 shape_updated = True
-        except:
-            pass
+            except (AttributeError, TypeError, ValueError):
+                pass
             
-        # Update chart text if possible
-        try:
-            chart_id = f"{parent_id}_chart"
-            if chart_id in translated_texts and hasattr(shape, "chart") and shape.chart:
-                try:
-                    # We might not be able to update all chart elements, but we can try the title
-                    if hasattr(shape.chart, "chart_title") and shape.chart.chart_title and shape.chart.chart_title.text_frame:
-                        # For chart titles, take just the first part of the translated text
-                        chart_title = translated_texts[chart_id].split(' | ')[0] if ' | ' in translated_texts[chart_id] else translated_texts[chart_id]
-                        shape.chart.chart_title.text_frame.text = chart_title
-                        shape_updated = True
-                except:
-                    pass
-        except:
-            pass
+        # Update chart text if possible (has_chart avoids the ValueError .chart raises otherwise)
+        chart_id = f"{parent_id}_chart"
+        if chart_id in translated_texts and getattr(shape, "has_chart", False):
+            try:
+                # We might not be able to update all chart elements, but we can try the title
+                chart_title_frame = shape.chart.chart_title.text_frame
+                # For chart titles, take just the first part of the translated text
+                chart_title = translated_texts[chart_id].split(' | ')[0] if ' | ' in translated_texts[chart_id] else translated_texts[chart_id]
+                chart_title_frame.text = chart_title
+                shape_updated = True
+            except (AttributeError, TypeError, ValueError):
+                pass
                 
         return shape_updated
     
@@ -326,33 +554,40 @@ def update_slides(pptx_file, output_file, translated_texts):
         for idx, master in enumerate(prs.slide_masters):
             for shape_id, shape in enumerate(master.shapes):
                 master_id = f"master_{idx+1}_shape_{shape_id}"
-                if master_id in translated_texts and hasattr(shape, "text") and shape.text.strip():
+                if master_id in translated_texts and getattr(shape, "text", "").strip():
                     try:
-                        shape.text = translated_texts[master_id]
+                        # Master text is usually a single run: write its a:t node directly
+                        if not _write_single_run_text(shape.element, translated_texts[master_id]):
+                            shape.text = translated_texts[master_id]
                         updated_count += 1
-                    except:
+                        dirty_parts.add(master.part)
+                    except (AttributeError, TypeError, ValueError):
                         pass
-    except:
+    except (AttributeError, KeyError, ValueError):
         pass
     
     # Update each slide with progress bar
     from tqdm import tqdm
     with tqdm(total=total_slides, desc="Updating slides", unit="slide") as pbar:
         for index, slide in enumerate(prs.slides):
-            # Update slide notes if any
-            if hasattr(slide, "notes_slide") and slide.notes_slide:
+            slide_start_count = updated_count
+            
+            # Update slide notes if any (has_notes_slide avoids creating an empty notes slide)
+            if slide.has_notes_slide:
                 try:
                     note_id = f"slide_{index+1}_notes"
                     if note_id in translated_texts:
                         for note_shape in slide.notes_slide.shapes:
-                            if hasattr(note_shape, "text") and note_shape.text.strip():
+                            note_text = getattr(note_shape, "text", None)
+                            if note_text and note_text.strip():
                                 note_shape.text = translated_texts[note_id]
                                 updated_count += 1
-            except:
-                pass
+                except (AttributeError, KeyError, ValueError):
+                    pass
                 
-            # Process all shapes on the slide
-            for shape_id, shape in enumerate(slide.shapes):
+            # Process all shapes on the slide in a single pass; the worklist is built
+            # before any text is replaced so placeholder types are read from the original
+            for shape_id, shape, is_placeholder, ph_type, has_table in _iter_slide_shapes(slide, worklists):
                 base_id = f"slide_{index+1}_shape_{shape_id}"
                 
                 # Update this shape (and any grouped sub-shapes)
@@ -360,106 +595,41 @@ def update_slides(pptx_file, output_file, translated_texts):
                     updated_count += 1
                 
                 # Handle tables separately
-                if hasattr(shape, "has_table") and shape.has_table:
+                if has_table:
                     for row_idx, row in enumerate(shape.table.rows):
                         for col_idx, cell in enumerate(row.cells):
-                            if cell.text.strip():
-                                # Reconstruct cell ID to match the extraction phase
-                                cell_id = f"slide_{index+1}_table_{shape_id}_r{row_idx}_c{col_idx}"
-                                if cell_id in translated_texts:
-                                    try:
-                                        # Save original text properties before replacement
-                                        para_properties = []
-                                        for para in cell.text_frame.paragraphs:
-                                        para_props = {
-                                            'alignment': None,
-                                            'runs': []
-                                        }
-                                        
-                                        # Save paragraph level properties
-                                        if hasattr(para, "alignment") and para.alignment:
-                                            para_props['alignment'] = para.alignment
-                                            
-                                        # Save run level properties (character formatting)
-                                        for run in para.runs:
-                                            run_props = {}
-                                            if hasattr(run, "font") and run.font:
-                                                if hasattr(run.font, "size") and run.font.size:
-                                                    run_props['size'] = run.font.size
-                                                if hasattr(run.font, "bold") and run.font.bold is not None:
-                                                    run_props['bold'] = run.font.bold
-                                                if hasattr(run.font, "italic") and run.font.italic is not None:
-                                                    run_props['italic'] = run.font.italic
-                                                if hasattr(run.font, "underline") and run.font.underline is not None:
-                                                    run_props['underline'] = run.font.underline
-                                                if hasattr(run.font, "name") and run.font.name:
-                                                    run_props['name'] = run.font.name
-                                                if hasattr(run.font, "color") and run.font.color and hasattr(run.font.color, "rgb"):
-                                                    run_props['color'] = run.font.color.rgb
-                                            
-                                            # Store hyperlink information if present
-                                            if hasattr(run, "hyperlink") and run.hyperlink:
-                                                run_props['hyperlink'] = run.hyperlink.address
-                                                
-                                            para_props['runs'].append(run_props)
-                                        
-                                        para_properties.append(para_props)
-                                    
-                                    # Clear the text and add the translated text
-                                    cell.text = ""
-                                    cell.text = translated_texts[cell_id]
-                                    
-                                    # Try to restore formatting if possible
-                                    if len(cell.text_frame.paragraphs) == len(para_properties):
-                                        for i, para in enumerate(cell.text_frame.paragraphs):
-                                            # Restore paragraph alignment
-                                            if para_properties[i]['alignment'] is not None:
-                                                para.alignment = para_properties[i]['alignment']
-                                            
-                                            # Restore run level formatting if number of runs match
-                                            if len(para.runs) == len(para_properties[i]['runs']):
-                                                for j, run in enumerate(para.runs):
-                                                    if hasattr(run, "font") and run.font:
-                                                        props = para_properties[i]['runs'][j]
-                                                        if 'size' in props and props['size']:
-                                                            run.font.size = props['size']
-                                                        if 'bold' in props and props['bold'] is not None:
-                                                            run.font.bold = props['bold']
-                                                        if 'italic' in props and props['italic'] is not None:
-                                                            run.font.italic = props['italic']
-                                                        if 'underline' in props and props['underline'] is not None:
-                                                            run.font.underline = props['underline']
-                                                        if 'name' in props and props['name']:
-                                                            run.font.name = props['name']
-                                                        if 'color' in props and props['color']:
-                                                            run.font.color.rgb = props['color']
-                                                            
-                                                        # Restore hyperlink if present
-                                                        if 'hyperlink' in props and props['hyperlink'] and hasattr(run, "hyperlink"):
-                                                            run.hyperlink.address = props['hyperlink']
+                            # Reconstruct cell ID to match the extraction phase
+                            cell_id = f"slide_{index+1}_table_{shape_id}_r{row_idx}_c{col_idx}"
+                            if cell_id in translated_texts and cell.text.strip():
+                                try:
+                                    # Run hyperlinks inside cells are kept as well
+                                    _replace_text_frame_preserving_format(cell.text_frame, translated_texts[cell_id],
+                                                                          keep_hyperlinks=True)
                                 except Exception as e:
                                     # Fall back to simple replacement if formatting preservation fails
                                     cell.text = translated_texts[cell_id]
                                 
                                 updated_count += 1
-        
-            # Try to update header and footer text if available
-            try:
-                # Check placeholder shapes for header/footer content
-                for shape in slide.shapes:
-                    if hasattr(shape, "is_placeholder") and shape.is_placeholder and hasattr(shape, "placeholder_format"):
-                        try:
-                            ph_type = shape.placeholder_format.type
-                            if ph_type in [2, 3, 4]:  # header, footer, date placeholders
-                                ph_id = f"slide_{index+1}_placeholder_{ph_type}"
-                                if ph_id in translated_texts and hasattr(shape, "text") and shape.text.strip():
-                                    shape.text = translated_texts[ph_id]
-                                    updated_count += 1
-                    except:
-                        pass
-            except:
-                pass
                 
+                # Header, footer and date placeholders
+                if ph_type in (2, 3, 4):
+                    ph_id = f"slide_{index+1}_placeholder_{ph_type}"
+                    if ph_id in translated_texts:
+                        ph_text = getattr(shape, "text", None)
+                        if ph_text and ph_text.strip():
+                            if not _write_single_run_text(shape.element, translated_texts[ph_id]):
+                                shape.text = translated_texts[ph_id]
+                            updated_count += 1
+            
+            # Changes to this slide can touch its own part, its notes and its charts
+            if updated_count > slide_start_count:
+                dirty_parts.add(slide.part)
+                if slide.has_notes_slide:
+                    dirty_parts.add(slide.notes_slide.part)
+                for rel in slide.part.rels.values():
+                    if rel.reltype == RT.CHART:
+                        dirty_parts.add(rel.target_part)
+            
             # Update progress bar after each slide
             completion_percentage = int(100 * (index + 1) / total_slides)
             pbar.set_description(f"Updating slides: {completion_percentage}% complete")
@@ -467,8 +637,14 @@ def update_slides(pptx_file, output_file, translated_texts):
             pbar.refresh()
     
     print(f"Updated {updated_count} text elements in the presentation")
-    # Save the updated presentation to a new file
-    prs.save(output_file)
+    # Save the updated presentation to a new file. With nothing translated the source is
+    # copied as is; otherwise only the changed parts are re-serialized into a copy of it
+    from_path = isinstance(pptx_file, (str, os.PathLike))
+    if from_path and updated_count == 0:
+        if os.path.abspath(pptx_file) != os.path.abspath(output_file):
+            shutil.copyfile(pptx_file, output_file)
+    elif not (from_path and _save_dirty_parts(prs, pptx_file, output_file, dirty_parts)):
+        prs.save(output_file)
     return output_file
 
 def split_dict_into_smart_batches(input_dict, max_input_tokens=150000, prompt_tokens=2000):
@@ -484,7 +660,8 @@ def split_dict_into_smart_batches(input_dict, max_input_tokens=150000, prompt_to
         text_str = str(text)
         
         # For Asian languages (CJK), use 1.5 characters per token as a conservative estimate
-        cjk_chars = sum(1 for c in text_str if ord(c) > 0x4E00 and ord(c) < 0x9FFF)  # Basic CJK Unified Ideographs
+        # (counted by the regex engine instead of a per-character Python loop)
+        cjk_chars = len(_CJK_RE.findall(text_str))
         ascii_chars = len(text_str) - cjk_chars
         
         # 4 ASCII chars per token, ~1.5 CJK chars per token (rough estimate)
@@ -492,17 +669,45 @@ def split_dict_into_smart_batches(input_dict, max_input_tokens=150000, prompt_to
         
         return int(token_estimate)
     
-    items = list(input_dict.items())
+    # Estimate the whole dict at once with NumPy when it is large enough to pay off
+    def estimate_tokens_bulk(texts):
+        texts = ["" if text is None else str(text) for text in texts]
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+        if _count_cjk_segments is not None:
+            # One UTF-32 buffer for all texts (one code point per element), scanned by the JIT kernel
+            codepoints = np.frombuffer("".join(texts).encode('utf-32-le', errors='surrogatepass'), dtype=np.uint32)
+            offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            cjk_lens = _count_cjk_segments(codepoints, offsets)
+        else:
+            cjk_lens = np.fromiter((len(_CJK_RE.findall(t)) for t in texts), dtype=np.int64, count=len(texts))
+        tokens = (lengths - cjk_lens) // 4 + np.floor(cjk_lens / 1.5).astype(np.int64) + 1
+        return tokens.tolist()
+    
+    # Estimate every item once: (key, value, value_tokens, item_tokens)
+    items = []
+    if np is not None and len(input_dict) >= 100:
+        keys = list(input_dict.keys())
+        values = list(input_dict.values())
+        key_tokens = estimate_tokens_bulk(keys)
+        value_tokens_list = estimate_tokens_bulk(values)
+        for key, value, key_est, value_est in zip(keys, values, key_tokens, value_tokens_list):
+            if value is None:
+                value_est = 0  # as in estimate_tokens
+            items.append((key, value, value_est, key_est + value_est + 10))  # +10 for JSON formatting
+    else:
+        for key, value in input_dict.items():
+            value_tokens = estimate_tokens(value)
+            items.append((key, value, value_tokens, estimate_tokens(key) + value_tokens + 10))  # +10 for JSON formatting
+    
     batches = []
     current_batch = {}
     current_token_count = prompt_tokens
     
     # Sort items by estimated token length (optional)
-    items.sort(key=lambda x: estimate_tokens(x[1]), reverse=True)
+    items.sort(key=itemgetter(2), reverse=True)
     
-    for key, value in items:
-        item_tokens = estimate_tokens(key) + estimate_tokens(value) + 10  # +10 for JSON formatting
-        
+    for key, value, _, item_tokens in items:
         if current_token_count + item_tokens > max_input_tokens and current_batch:
             batches.append(current_batch)
             current_batch = {}
@@ -524,11 +729,75 @@ def split_dict_into_smart_batches(input_dict, max_input_tokens=150000, prompt_to
     
     return batches
 
+# C0 control characters and DEL, stripped from model output before repairs
+_CONTROL_BYTES = bytes(range(0x20)) + b'\x7f'
+
+# Every regex fix-up repair_json applies, combined so the content is scanned once:
+# stray backslashes, trailing commas before } or ], and unquoted property names
+_JSON_FIXUP_RE = re.compile(
+    r'(?P<bad_escape>(?<!\\)\\(?!["\\/bfnrt]|u[0-9a-fA-F]{4}))'
+    r'|(?P<trailing_obj>,\s*})'
+    r'|(?P<trailing_arr>,\s*])'
+    r'|(?P<prop>[a-zA-Z0-9_]+):'
+)
+
+# Line/column numbers in json.JSONDecodeError messages
+_ERR_LINE_RE = re.compile(r'line (\d+)')
+_ERR_COL_RE = re.compile(r'column (\d+)')
+
+# Last-resort "key": "value" and "key": number extraction from unparseable output
+_KV_STRING_RE = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_KV_NUMBER_RE = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*([0-9]+(?:\.[0-9]+)?)')
+
+def _extract_string_pairs(text):
+    """Regex fallback: collect "key": "value" string pairs, unescaping escaped quotes"""
+    pairs = _KV_STRING_RE.findall(text)
+    # Captured strings are substrings of text, so they only need unescaping if text has \"
+    if '\\"' not in text:
+        return dict(pairs)
+    return {key.replace('\\"', '"'): value.replace('\\"', '"') for key, value in pairs}
+
+# Per-block fix-ups in extract_json_blocks
+_FLAT_OBJECT_RE = re.compile(r'({[^{]*?})')
+_TRAIL_OBJ_RE = re.compile(r',\s*}')
+_UNQUOTED_PROP_RE = re.compile(r'([a-zA-Z0-9_]+):')
+
+# Literal escape sequences the model sometimes leaves in translated values
+_ESCAPE_RE = re.compile(r'\\n|\\u000b|\\t')
+_ESCAPE_MAP = {'\\n': '\n', '\\u000b': '\v', '\\t': '\t'}
+
+# Payload of the first fenced code block in a model response (an unclosed fence runs to the end)
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)(?:```|\Z)', re.DOTALL)
+
+def _clean_translated_values(result):
+    """Turn literal \\n, \\u000b and \\t sequences in string values back into the real characters"""
+    return {key: (_ESCAPE_RE.sub(lambda m: _ESCAPE_MAP[m.group(0)], value)
+                  if isinstance(value, str) and '\\' in value else value)
+            for key, value in result.items()}
+
+def _fix_json_match(match):
+    kind = match.lastgroup
+    if kind == 'bad_escape':
+        return '\\\\'
+    if kind == 'trailing_obj':
+        return '}'
+    if kind == 'trailing_arr':
+        return ']'
+    # Ensure property names are properly quoted
+    return f'"{match.group("prop")}":'
+
 def repair_json(json_content):
     """
     More robust JSON repair function that can handle various common issues including Unicode.
     """
     original_content = json_content
+    # Most responses are valid JSON, so try the fast parser first. On failure the
+    # stdlib parser runs again below, as the repairs rely on its error messages.
+    if orjson is not None:
+        try:
+            return orjson.loads(json_content)
+        except orjson.JSONDecodeError:
+            pass
     try:
         return json.loads(json_content)
     except json.JSONDecodeError as e:
@@ -536,19 +805,21 @@ def repair_json(json_content):
         
         # Try to handle Unicode/multibyte character issues
         try:
-            # Ensure the content is properly encoded
+            # Remove invisible/control characters that might cause issues. This is done
+            # on the UTF-8 bytes, where bytes.translate deletes them in a single C pass
+            # (control bytes never occur inside multibyte sequences)
             if isinstance(json_content, bytes):
-                json_content = json_content.decode('utf-8', errors='replace')
-            
-            # Remove or replace invisible/control characters that might cause issues
-            json_content = re.sub(r'[\x00-\x1F\x7F]', '', json_content)
+                raw = json_content
+            else:
+                raw = json_content.encode('utf-8', errors='surrogatepass')
+            json_content = raw.translate(None, _CONTROL_BYTES).decode('utf-8', errors='replace')
         except Exception as enc_err:
             print(f"Error handling encoding: {enc_err}")
         
         if "Unterminated string" in str(e):
             error_info = str(e)
-            line_match = re.search(r'line (\d+)', error_info)
-            col_match = re.search(r'column (\d+)', error_info)
+            line_match = _ERR_LINE_RE.search(error_info)
+            col_match = _ERR_COL_RE.search(error_info)
             
             if line_match and col_match:
                 line_num = int(line_match.group(1))
@@ -563,9 +834,6 @@ def repair_json(json_content):
                     lines[line_num-1] = line
                     json_content = '\n'.join(lines)
         
-        # Handle improperly escaped characters and unicode escapes
-        json_content = re.sub(r'(?<!\\)\\(?!["\\/bfnrt]|u[0-9a-fA-F]{4})', r'\\\\', json_content)
-        
         # Fix unbalanced braces
         brace_count = json_content.count('{') - json_content.count('}')
         if brace_count > 0:
@@ -574,18 +842,8 @@ def repair_json(json_content):
             for _ in range(-brace_count):
                 json_content = json_content.rstrip().rstrip('}').rstrip()
         
-        # Fix common JSON syntax issues
-        json_content = re.sub(r',\s*}', '}', json_content)
-        json_content = re.sub(r',\s*]', ']', json_content)
-        
-        # Ensure property names are properly quoted
-        def fix_property_names(match):
-            prop = match.group(1)
-            if not (prop.startswith('"') and prop.endswith('"')):
-                return f'"{prop}":'
-            return match.group(0)
-        
-        json_content = re.sub(r'([a-zA-Z0-9_]+):', fix_property_names, json_content)
+        # Escape fixes, trailing commas and unquoted property names in a single scan
+        json_content = _JSON_FIXUP_RE.sub(_fix_json_match, json_content)
         
         # Try to parse the repaired JSON
         try:
@@ -594,25 +852,14 @@ def repair_json(json_content):
             print(f"JSON repair attempt failed: {e2}")
             
             # Fallback: extract key-value pairs using regex
-            result = {}
-            # Modified pattern to handle Unicode characters better
-            pattern = r'"((?:[^"\\]|\\.)*)"\s*:\s*"((?:[^"\\]|\\.)*)"'
-            for match in re.finditer(pattern, original_content):
-                try:
-                    key, value = match.groups()
-                    # Unescape escaped quotes in the extracted strings
-                    key = key.replace('\\"', '"')
-                    value = value.replace('\\"', '"')
-                    result[key] = value
-                except Exception as extract_err:
-                    print(f"Error extracting key-value pair: {extract_err}")
+            result = _extract_string_pairs(original_content)
             
             # Also try to capture numeric values
-            num_pattern = r'"((?:[^"\\]|\\.)*)"\s*:\s*([0-9]+(?:\.[0-9]+)?)'
-            for match in re.finditer(num_pattern, original_content):
+            has_escaped_quotes = '\\"' in original_content
+            for key, value in _KV_NUMBER_RE.findall(original_content):
                 try:
-                    key, value = match.groups()
-                    key = key.replace('\\"', '"')
+                    if has_escaped_quotes:
+                        key = key.replace('\\"', '"')
                     # Convert to int or float as appropriate
                     if '.' in value:
                         result[key] = float(value)
@@ -632,11 +879,24 @@ def extract_json_blocks(text):
     Extract valid JSON blocks from text that might contain multiple partial JSON objects.
     Enhanced to better handle Unicode and Japanese characters.
     """
+    # Usually the text is already one valid object; parse it directly before any block
+    # scanning (the per-block fix-ups below would also mangle "word:" inside values)
+    stripped = text.strip()
+    if stripped.startswith('{') and stripped.endswith('}'):
+        try:
+            parsed = json.loads(stripped)
+            if isinstance(parsed, dict):
+                return parsed
+        except json.JSONDecodeError:
+            pass
+    
     # First try to find complete JSON objects
     try:
         # Clean the text: remove any leading/trailing non-JSON content
-        text = re.sub(r'^[^{]*', '', text)  # Remove anything before the first {
-        text = re.sub(r'[^}]*$', '', text)  # Remove anything after the last }
+        # (plain slicing; a [^}]*$ regex rescans the tail from every position)
+        start = text.find('{')
+        text = text[start:] if start != -1 else ''  # Remove anything before the first {
+        text = text[:text.rfind('}') + 1]  # Remove anything after the last }
         
         # Try extracting json blocks with a more robust pattern
         # This pattern tries to match balanced { } pairs
@@ -644,28 +904,34 @@ def extract_json_blocks(text):
         start = -1
         blocks = []
         
-        for i, char in enumerate(text):
-            if char == '{':
+        # Jump between braces with str.find rather than stepping through every character;
+        # each side's next position is only searched again once it has been consumed
+        next_open = text.find('{')
+        next_close = text.find('}')
+        while next_open != -1 or next_close != -1:
+            if next_close == -1 or (next_open != -1 and next_open < next_close):
                 if depth == 0:
-                    start = i
+                    start = next_open
                 depth += 1
-            elif char == '}':
+                next_open = text.find('{', next_open + 1)
+            else:
                 depth -= 1
                 if depth == 0 and start != -1:
-                    blocks.append(text[start:i+1])
+                    blocks.append(text[start:next_close+1])
                     start = -1
+                next_close = text.find('}', next_close + 1)
         
         if not blocks:
             # Fallback to simpler regex if the balanced matching didn't work
-            potential_blocks = re.findall(r'({[^{]*?})', text)
+            potential_blocks = _FLAT_OBJECT_RE.findall(text)
             blocks = potential_blocks
         
         valid_blocks = []
         for block in blocks:
             try:
                 # Fix common issues that might occur in the JSON block
-                block = re.sub(r',\s*}', '}', block)  # Remove trailing commas
-                block = re.sub(r'([a-zA-Z0-9_]+):', r'"\1":', block)  # Quote unquoted keys
+                block = _TRAIL_OBJ_RE.sub('}', block)  # Remove trailing commas
+                block = _UNQUOTED_PROP_RE.sub(r'"\1":', block)  # Quote unquoted keys
                 
                 parsed = json.loads(block)
                 valid_blocks.append(parsed)
@@ -675,7 +941,7 @@ def extract_json_blocks(text):
                     repaired = repair_json(block)
                     if repaired:
                         valid_blocks.append(repaired)
-                except:
+                except Exception:
                     pass
         
         if valid_blocks:
@@ -689,15 +955,8 @@ def extract_json_blocks(text):
         
     # Fallback: just try a direct key-value extraction
     try:
-        result = {}
         # Look for key-value pairs directly, handling Unicode properly
-        pattern = r'"((?:[^"\\]|\\.)*)"\s*:\s*"((?:[^"\\]|\\.)*)"'
-        for match in re.finditer(pattern, text):
-            key, value = match.groups()
-            # Unescape escaped quotes
-            key = key.replace('\\"', '"')
-            value = value.replace('\\"', '"')
-            result[key] = value
+        result = _extract_string_pairs(text)
         
         if result:
             print(f"Direct key-value extraction found {len(result)} pairs")
@@ -707,16 +966,58 @@ def extract_json_blocks(text):
         
     return None
 
+def _apply_recovery_entry(recovery_state, entry):
+    """Fold one recovery journal entry into the recovery state"""
+    op = entry.get("op")
+    if op == "translated":
+        recovery_state["translated_items"].update(entry["items"])
+        recovery_state.setdefault("value_cache", {}).update(entry.get("cache", {}))
+        if entry.get("batch_id"):
+            recovery_state["completed_batches"].append(entry["batch_id"])
+    elif op == "failed":
+        # Replaying over a snapshot that already holds the failure must not duplicate it
+        if not any(f["batch_id"] == entry["batch_id"] for f in recovery_state["failed_batches"]):
+            recovery_state["failed_batches"].append({
+                "batch_id": entry["batch_id"],
+                "keys": entry["keys"],
+                "error": entry["error"]
+            })
+    elif op == "retried":
+        recovery_state["failed_batches"] = [f for f in recovery_state["failed_batches"]
+                                            if f["batch_id"] != entry["batch_id"]]
+
+def _load_and_replay(recovery_file):
+    """Load a recovery snapshot and replay its journal on top of it"""
+    with open(recovery_file, 'rb') as f:
+        recovery_state = _json_loads(f.read())
+    
+    journal_file = recovery_file + '.jsonl'
+    if os.path.exists(journal_file):
+        replayed = 0
+        with open(journal_file, 'rb') as f:
+            for line in f:
+                try:
+                    entry = _json_loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by a crash mid-write; everything before it is intact
+                    break
+                _apply_recovery_entry(recovery_state, entry)
+                replayed += 1
+        print(f"Replayed {replayed} journal entries from {journal_file}")
+    
+    return recovery_state
+
 def setup_recovery_system(file_id, text_dict, slide_metadata, source_language, target_language, resume_file=None):
     """
     Set up a recovery system for batch processing.
+    The state is kept as a JSON snapshot plus an append-only JSONL journal of the
+    updates made since, so each batch costs one short line instead of a full rewrite.
     """
     recovery_dir = "translation_recovery"
     os.makedirs(recovery_dir, exist_ok=True)
     
     if resume_file and os.path.exists(resume_file):
-        with open(resume_file, 'r', encoding='utf-8') as f:
-            recovery_state = json.load(f)
+        recovery_state = _load_and_replay(resume_file)
         print(f"Resuming translation from recovery file: {resume_file}")
         recovery_file = resume_file
     else:
@@ -733,26 +1034,69 @@ def setup_recovery_system(file_id, text_dict, slide_metadata, source_language, t
             "start_time": timestamp,
             "last_updated": timestamp
         }
-        with open(recovery_file, 'w', encoding='utf-8') as f:
-            json.dump(recovery_state, f, ensure_ascii=False, indent=2)
         print(f"Created new recovery file: {recovery_file}")
     
-    def save_recovery_state():
+    journal_file = recovery_file + '.jsonl'
+    journal = None
+    snapshot_size = [0]
+    journal_entries = [0]
+    
+    def write_snapshot():
+        nonlocal journal
         recovery_state["last_updated"] = datetime.now().strftime("%Y%m%d_%H%M%S")
-        with open(recovery_file, 'w', encoding='utf-8') as f:
-            json.dump(recovery_state, f, ensure_ascii=False, indent=2)
+        # Write to a temp file and swap it in so an interrupted write can't corrupt the state
+        tmp_file = f"{recovery_file}.tmp"
+        _write_json_file(tmp_file, recovery_state)
+        os.replace(tmp_file, recovery_file)
+        snapshot_size[0] = os.path.getsize(recovery_file)
+        journal_entries[0] = 0
+        # Everything in the journal is now in the snapshot (replaying it again is harmless)
+        if journal is not None:
+            journal.close()
+        journal = open(journal_file, 'w', encoding='utf-8', buffering=1)
+    
+    def save_recovery_state(entry=None, final=False):
+        """
+        Apply entry to the recovery state and append it to the journal; without an
+        entry (or when final) the whole state is written out as a new snapshot.
+        """
+        nonlocal journal
+        if entry is not None:
+            _apply_recovery_entry(recovery_state, entry)
+            journal.write(_json_line(entry) + '\n')
+            journal_entries[0] += 1
+        
+        if (entry is None or final or journal_entries[0] >= RECOVERY_SNAPSHOT_EVERY
+                or journal.tell() > RECOVERY_COMPACT_RATIO * snapshot_size[0]):
+            write_snapshot()
+        
+        if final:
+            journal.close()
+            os.remove(journal_file)
+            atexit.unregister(flush_recovery_state)
+    
+    def flush_recovery_state():
+        if journal is not None and not journal.closed:
+            write_snapshot()
+            journal.close()
+    
+    write_snapshot()
+    # Covers Ctrl-C and other early exits; the journal alone is enough to recover
+    # from a hard crash, but a fresh snapshot makes the next resume faster
+    atexit.register(flush_recovery_state)
     
     return recovery_state, recovery_file, save_recovery_state
 
-def translate_batch(batch, batch_index, slide_metadata, source_language, target_language, api_key=None, max_retries=2, cost_tracker=None):
+def translate_batch(batch, batch_index, structured_context, source_language, target_language, client, max_retries=2, cost_tracker=None):
     """
     Translate a single batch with retry logic.
+    structured_context is the slide metadata already serialized to JSON, so callers
+    serialize it once for all batches; raw metadata is still accepted.
+    client is the caller's anthropic.Anthropic instance, shared by every batch so
+    they reuse its connection pool.
     """
     batch_copy = batch.copy()
     
-    def clean_text(text):
-        return text.replace('\\n', '\n').replace('\\u000b', '\v').replace('\\t', '\t')
-        
     # Calculate estimated cost based on prompt and completion tokens
     def estimate_cost(prompt_tokens, completion_tokens, model="claude-3-7-sonnet"):
         # Claude 3.5 Sonnet pricing: $3 per 1M input tokens, $15 per 1M output tokens
@@ -777,19 +1121,8 @@ def translate_batch(batch, batch_index, slide_metadata, source_language, target_
             "total_cost": total_cost
         }
     
-    # Use provided API key or fall back to environment variable
-    api_key = api_key or os.getenv("CLAUDE_API_KEY")
-    if not api_key:
-        raise ValueError("Claude API key must be provided either as an argument or via CLAUDE_API_KEY environment variable")
-        
-    client = anthropic.Anthropic(
-        api_key=api_key,
-        default_headers={
-            "anthropic-beta": "output-128k-2025-02-19"
-        }
-    )
-    
-    structured_context = json.dumps(slide_metadata, ensure_ascii=False, indent=2)
+    if not isinstance(structured_context, str):
+        structured_context = _json_dumps(structured_context)
     
     system_prompt = f"""You are a professional translator. Translate from {source_language} to {target_language}.
 Ensure consistency in terminology and contextual meaning.
@@ -818,7 +1151,7 @@ Slide Context:
 {structured_context}
 
 Now translate the following structured JSON object while preserving its format:
-{json.dumps(batch_copy, ensure_ascii=False, indent=2)}
+{_json_dumps(batch_copy)}
 
 Reply ONLY with the translated JSON. The JSON MUST be valid and parseable.
 """
@@ -845,31 +1178,29 @@ Reply ONLY with the translated JSON. The JSON MUST be valid and parseable.
             
             # Update the cost tracker if provided
             if cost_tracker is not None:
-                cost_tracker["total_input_tokens"] += prompt_tokens
-                cost_tracker["total_output_tokens"] += completion_tokens
-                cost_tracker["total_input_cost"] += batch_cost["input_cost"]
-                cost_tracker["total_output_cost"] += batch_cost["output_cost"]
-                cost_tracker["total_cost"] += batch_cost["total_cost"]
-                cost_tracker["api_calls"] += 1
+                with _cost_lock:
+                    cost_tracker["total_input_tokens"] += prompt_tokens
+                    cost_tracker["total_output_tokens"] += completion_tokens
+                    cost_tracker["total_input_cost"] += batch_cost["input_cost"]
+                    cost_tracker["total_output_cost"] += batch_cost["output_cost"]
+                    cost_tracker["total_cost"] += batch_cost["total_cost"]
+                    cost_tracker["api_calls"] += 1
+                    running_total = (cost_tracker["total_cost"], cost_tracker["api_calls"])
             
             print(f"Batch {batch_index} token usage: {prompt_tokens} input + {completion_tokens} output tokens")
             print(f"Batch {batch_index} cost: ${batch_cost['total_cost']:.4f} (${batch_cost['input_cost']:.4f} input + ${batch_cost['output_cost']:.4f} output)")
             
-            # Show running total cost
+            # Show running total cost (as read under the lock, so both numbers belong together)
             if cost_tracker is not None:
-                print(f"Running total: ${cost_tracker['total_cost']:.4f} for {cost_tracker['api_calls']} API calls")
+                print(f"Running total: ${running_total[0]:.4f} for {running_total[1]} API calls")
 
             translated_text = response.content[0].text
             
-            if "```json" in translated_text:
-                json_content = translated_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in translated_text:
-                json_content = translated_text.split("```")[1].strip()
-            else:
-                json_content = translated_text.strip()
+            fence = _FENCE_RE.search(translated_text)
+            json_content = (fence.group(1) if fence else translated_text).strip()
             
             try:
-                batch_result = json.loads(json_content)
+                batch_result = _json_loads(json_content)
             except json.JSONDecodeError as e:
                 try:
                     batch_result = repair_json(json_content)
@@ -886,9 +1217,8 @@ Reply ONLY with the translated JSON. The JSON MUST be valid and parseable.
                         else:
                             raise e
             
-            for key, value in batch_result.items():
-                if isinstance(value, str):
-                    batch_result[key] = clean_text(value)
+            # One scan per value for all escape sequences
+            batch_result = _clean_translated_values(batch_result)
             
             print(f"Successfully processed batch {batch_index}")
             return batch_result
@@ -902,12 +1232,13 @@ Reply ONLY with the translated JSON. The JSON MUST be valid and parseable.
                 print(f"All {max_retries + 1} attempts failed for batch {batch_index}: {e}")
                 raise e
 
-def translate_text(text_dict, slide_metadata, source_language, target_language, resume_file=None, api_key=None):
+def translate_text(text_dict, slide_metadata, source_language, target_language, resume_file=None, api_key=None, max_workers=DEFAULT_TRANSLATION_WORKERS):
     # Use provided API key or fall back to environment variable
     api_key = api_key or os.getenv("CLAUDE_API_KEY")
     if not api_key:
         raise ValueError("Claude API key must be provided either as an argument or via CLAUDE_API_KEY environment variable")
         
+    # One client (and connection pool) for every batch, retry and the final batch
     client = anthropic.Anthropic(
         api_key=api_key,
         default_headers={
@@ -926,20 +1257,18 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
     }
     
     def deduplicate_content(input_dict):
-        content_to_keys = {}
-        for key, value in input_dict.items():
-            if value in content_to_keys:
-                content_to_keys[value].append(key)
-            else:
-                content_to_keys[value] = [key]
-        
+        # One pass: the first key seen with a value represents it, later keys map to it
+        representative_keys = {}
         unique_content = {}
         duplicates_map = {}
         
-        for content, keys in content_to_keys.items():
-            representative_key = keys[0]
-            unique_content[representative_key] = content
-            for key in keys:
+        for key, value in input_dict.items():
+            representative_key = representative_keys.get(value)
+            if representative_key is None:
+                representative_keys[value] = key
+                unique_content[key] = value
+                duplicates_map[key] = key
+            else:
                 duplicates_map[key] = representative_key
         
         print(f"Found {len(input_dict) - len(unique_content)} duplicate content items")
@@ -947,6 +1276,19 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
         
         return unique_content, duplicates_map
     
+    # Source text -> translation, kept in the recovery state so text already translated
+    # under another key (e.g. resuming against an edited deck, or keys missed by a batch)
+    # is reused instead of being sent to the API again
+    def source_translations(source_items, translated):
+        return {source_items[k]: v for k, v in translated.items()
+                if isinstance(source_items.get(k), str)}
+    
+    def reuse_translations(pending):
+        reused = {k: value_cache[v] for k, v in pending.items() if v in value_cache}
+        if reused:
+            print(f"Reusing {len(reused)} existing translations of identical text")
+        return reused
+    
     # Use a simple file ID based on timestamp if not provided
     file_id = os.path.basename(str(time.time()).replace('.', ''))
     
@@ -954,67 +1296,105 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
         file_id, text_dict, slide_metadata, source_language, target_language, resume_file
     )
     
+    # Recovery files from before the cache existed are seeded from their translated items
+    value_cache = recovery_state.setdefault("value_cache", {})
+    if not value_cache:
+        value_cache.update(source_translations(text_dict, recovery_state["translated_items"]))
+    
     if not recovery_state["translated_items"]:
         unique_text_dict, duplicates_map = deduplicate_content(text_dict)
         recovery_state["duplicates_map"] = duplicates_map
         save_recovery_state()
     else:
-        unique_text_dict = {k: text_dict[k] for k in text_dict.keys() 
-                          if k not in [rep_key for rep_key in recovery_state["duplicates_map"].values()]}
+        # Representative keys are the ones sent for translation; build the set once
+        # instead of a list per key
         duplicates_map = recovery_state["duplicates_map"]
+        rep_keys = set(duplicates_map.values())
+        unique_text_dict = {k: v for k, v in text_dict.items() if k in rep_keys}
         print(f"Resumed with {len(recovery_state['translated_items'])} already translated items")
     
     remaining_dict = {k: v for k, v in unique_text_dict.items() 
                      if k not in recovery_state["translated_items"]}
+    reused = reuse_translations(remaining_dict)
+    if reused:
+        recovery_state["translated_items"].update(reused)
+        remaining_dict = {k: v for k, v in remaining_dict.items() if k not in reused}
     
     if not remaining_dict:
         print("All items have already been translated. Nothing to do.")
-        full_translated_dict = recovery_state["translated_items"].copy()
+        translated_items = recovery_state["translated_items"]
+        full_translated_dict = {original_key: translated_items[rep_key]
+                                for original_key, rep_key in duplicates_map.items()
+                                if rep_key in translated_items}
     else:
-        # For Japanese or other multibyte languages, use smaller batches
-        max_tokens = 80000 if target_language in ["ja", "zh", "ko"] else 150000
+        # For Japanese or other multibyte languages, use smaller batches and retry chunks
+        is_cjk = target_language in _CJK_LANGS
+        max_tokens, divisor = _BATCH_PARAMS[is_cjk]
         prompt_tokens = 2000
         
-        print(f"Using smaller batch size for {target_language} translation" if target_language in ["ja", "zh", "ko"] else "Using standard batch size")
+        print(f"Using smaller batch size for {target_language} translation" if is_cjk else "Using standard batch size")
         batches = split_dict_into_smart_batches(remaining_dict, max_input_tokens=max_tokens, prompt_tokens=prompt_tokens)
         print(f"Splitting translation into {len(batches)} batches")
         
+        # A resumed run splits only the remaining items, so its batches are numbered after
+        # those of earlier runs; reusing batch_1.. would wrongly match their completed ids
+        batch_offset = recovery_state.get("batch_count", 0)
+        recovery_state["batch_count"] = batch_offset + len(batches)
+        save_recovery_state()
+        # Membership is checked once per batch, so use a set rather than the stored list
+        completed_batches = set(recovery_state["completed_batches"])
+        
         unique_translated_dict = recovery_state["translated_items"].copy()
         
-        with tqdm(total=len(batches), desc="Translating", unit="batch") as pbar:
+        # The slide context is identical for every batch and retry, so serialize it once
+        structured_context = _json_dumps(slide_metadata)
+        
+        # Batches spend nearly all their time waiting on the API, so several are sent
+        # at once; results and recovery state are only touched from this thread
+        with tqdm(total=len(batches), desc="Translating", unit="batch") as pbar, \
+                ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {}
             for batch_index, batch in enumerate(batches):
-                batch_id = f"batch_{batch_index+1}"
-                if batch_id in recovery_state["completed_batches"]:
+                batch_id = f"batch_{batch_offset+batch_index+1}"
+                if batch_id in completed_batches:
                     print(f"Skipping already completed batch {batch_id}")
                     pbar.update(1)
                     continue
                 
                 print(f"\nProcessing batch {batch_index+1} of {len(batches)} with {len(batch)} items...")
-                
+                future = executor.submit(
+                    translate_batch,
+                    batch, batch_index+1, structured_context, 
+                    source_language, target_language, client,
+                    cost_tracker=cost_tracker
+                )
+                futures[future] = (batch_index, batch_id, batch)
+            
+            for future in as_completed(futures):
+                batch_index, batch_id, batch = futures[future]
                 try:
-                    batch_result = translate_batch(
-                        batch, batch_index+1, slide_metadata, 
-                        source_language, target_language, api_key=api_key,
-                        cost_tracker=cost_tracker
-                    )
+                    batch_result = future.result()
                     
                     unique_translated_dict.update(batch_result)
-                    recovery_state["translated_items"].update(batch_result)
-                    recovery_state["completed_batches"].append(batch_id)
-                    save_recovery_state()
+                    save_recovery_state({
+                        "op": "translated",
+                        "batch_id": batch_id,
+                        "items": batch_result,
+                        "cache": source_translations(batch, batch_result)
+                    })
                     
                 except Exception as e:
                     print(f"Error in batch {batch_index+1}: {e}")
-                    recovery_state["failed_batches"].append({
+                    save_recovery_state({
+                        "op": "failed",
                         "batch_id": batch_id,
                         "keys": list(batch.keys()),
                         "error": str(e)
                     })
-                    save_recovery_state()
                     print("Continuing with next batch...")
                 
                 pbar.update(1)
-                completion_percentage = int(100 * (batch_index + 1) / len(batches))
+                completion_percentage = int(100 * pbar.n / len(batches))
                 pbar.set_description(f"Translating: {completion_percentage}% complete")
                 # Force refresh the progress bar display
                 pbar.refresh()
@@ -1029,8 +1409,6 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
                 keys = failed_batch["keys"]
                 
                 retry_batch = {k: text_dict[k] for k in keys if k in text_dict}
-                # Use smaller chunks for CJK languages
-                divisor = 8 if target_language in ["ja", "zh", "ko"] else 4
                 chunk_size = max(5, len(retry_batch) // divisor)
                 retry_items = list(retry_batch.items())
                 sub_batches = [dict(retry_items[i:i+chunk_size]) 
@@ -1044,33 +1422,38 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
                     try:
                         print(f"Processing sub-batch {i+1}/{len(sub_batches)} for failed batch {batch_id}")
                         sub_result = translate_batch(
-                            sub_batch, f"{batch_id}.{i+1}", slide_metadata, 
-                            source_language, target_language, api_key=api_key, 
+                            sub_batch, f"{batch_id}.{i+1}", structured_context, 
+                            source_language, target_language, client, 
                             max_retries=3, cost_tracker=cost_tracker
                         )
                         unique_translated_dict.update(sub_result)
-                        recovery_state["translated_items"].update(sub_result)
-                        recovery_state["completed_batches"].append(sub_id)
-                        save_recovery_state()
+                        save_recovery_state({
+                            "op": "translated",
+                            "batch_id": sub_id,
+                            "items": sub_result,
+                            "cache": source_translations(sub_batch, sub_result)
+                        })
                         
                     except Exception as e:
                         print(f"Error in sub-batch {i+1} of failed batch {batch_id}: {e}")
                         continue
                 
-                recovery_state["failed_batches"].remove(failed_batch)
-                save_recovery_state()
+                save_recovery_state({"op": "retried", "batch_id": batch_id})
         
-        full_translated_dict = {}
-        for key, value in unique_translated_dict.items():
-            full_translated_dict[key] = value
-        
-        for original_key, rep_key in duplicates_map.items():
-            if rep_key in unique_translated_dict and original_key != rep_key:
-                full_translated_dict[original_key] = unique_translated_dict[rep_key]
+        # duplicates_map covers every original key (representatives map to themselves),
+        # so one comprehension expands the unique translations back to all of them
+        full_translated_dict = {original_key: unique_translated_dict[rep_key]
+                                for original_key, rep_key in duplicates_map.items()
+                                if rep_key in unique_translated_dict}
     
     print(f"Reconstructed full translation dictionary with {len(full_translated_dict)} items")
     
     missing_keys = set(text_dict.keys()) - set(full_translated_dict.keys())
+    if missing_keys:
+        reused = reuse_translations({k: text_dict[k] for k in missing_keys})
+        if reused:
+            full_translated_dict.update(reused)
+            missing_keys -= reused.keys()
     if missing_keys:
         print(f"Warning: {len(missing_keys)} keys were not translated: {list(missing_keys)[:5]}...")
         if len(missing_keys) > 0:
@@ -1078,8 +1461,6 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
             missing_dict = {k: text_dict[k] for k in missing_keys if k in text_dict}
             
             try:
-                structured_context = json.dumps(slide_metadata, ensure_ascii=False, indent=2)
-                
                 system_prompt = f"""You are a professional translator. Translate from {source_language} to {target_language}.
 Ensure consistency in terminology and contextual meaning.
 
@@ -1097,7 +1478,7 @@ IMPORTANT INSTRUCTIONS:
 - Return VALID JSON format with all keys and values properly enclosed in double quotes.
 
 Now translate the following structured JSON object:
-{json.dumps(missing_dict, ensure_ascii=False, indent=2)}
+{_json_dumps(missing_dict)}
 
 Reply ONLY with the translated JSON.
 """
@@ -1126,48 +1507,44 @@ Reply ONLY with the translated JSON.
                 }
                 
                 # Update cost tracker
-                cost_tracker["total_input_tokens"] += prompt_tokens
-                cost_tracker["total_output_tokens"] += completion_tokens
-                cost_tracker["total_input_cost"] += final_cost["input_cost"]
-                cost_tracker["total_output_cost"] += final_cost["output_cost"]
-                cost_tracker["total_cost"] += final_cost["total_cost"]
-                cost_tracker["api_calls"] += 1
+                with _cost_lock:
+                    cost_tracker["total_input_tokens"] += prompt_tokens
+                    cost_tracker["total_output_tokens"] += completion_tokens
+                    cost_tracker["total_input_cost"] += final_cost["input_cost"]
+                    cost_tracker["total_output_cost"] += final_cost["output_cost"]
+                    cost_tracker["total_cost"] += final_cost["total_cost"]
+                    cost_tracker["api_calls"] += 1
+                    running_total = (cost_tracker["total_cost"], cost_tracker["api_calls"])
                 
                 print(f"Final batch token usage: {prompt_tokens} input + {completion_tokens} output tokens")
                 print(f"Final batch cost: ${final_cost['total_cost']:.4f}")
-                print(f"Running total: ${cost_tracker['total_cost']:.4f} for {cost_tracker['api_calls']} API calls")
+                print(f"Running total: ${running_total[0]:.4f} for {running_total[1]} API calls")
                 
                 translated_text = response.content[0].text
                 
-                if "```json" in translated_text:
-                    json_content = translated_text.split("```json")[1].split("```")[0].strip()
-                elif "```" in translated_text:
-                    json_content = translated_text.split("```")[1].strip()
-                else:
-                    json_content = translated_text.strip()
+                fence = _FENCE_RE.search(translated_text)
+                json_content = (fence.group(1) if fence else translated_text).strip()
                 
                 try:
-                    final_batch = json.loads(json_content)
+                    final_batch = _json_loads(json_content)
                 except json.JSONDecodeError:
                     try:
                         final_batch = repair_json(json_content)
-                    except:
+                    except Exception:
                         extracted = extract_json_blocks(json_content)
                         if extracted:
                             final_batch = extracted
                         else:
                             raise
                 
-                def clean_text(text):
-                    return text.replace('\\n', '\n').replace('\\u000b', '\v').replace('\\t', '\t')
-                
-                for key, value in final_batch.items():
-                    if isinstance(value, str):
-                        final_batch[key] = clean_text(value)
+                final_batch = _clean_translated_values(final_batch)
                 
                 full_translated_dict.update(final_batch)
-                recovery_state["translated_items"].update(final_batch)
-                save_recovery_state()
+                save_recovery_state({
+                    "op": "translated",
+                    "items": final_batch,
+                    "cache": source_translations(missing_dict, final_batch)
+                })
                 
                 print(f"Successfully processed final batch with {len(final_batch)} additional items")
                 
@@ -1192,19 +1569,25 @@ Reply ONLY with the translated JSON.
     print(f"Output cost: ${cost_tracker['total_output_cost']:.4f}")
     print(f"Total cost: ${cost_tracker['total_cost']:.4f}")
     
+    save_recovery_state(final=True)
+    
     return full_translated_dict
 
-def translate_pptx(input_file, output_file, source_language="en", target_language="fr", resume_file=None, api_key=None):
+def translate_pptx(input_file, output_file, source_language="en", target_language="fr", resume_file=None, api_key=None, max_workers=DEFAULT_TRANSLATION_WORKERS):
     """Main function to translate PowerPoint files"""
+    # Load the deck once; extraction and update share it and its shape worklists
+    prs = Presentation(input_file)
+    worklists = {}
+    
     print(f"Extracting text from {input_file}...")
-    text_dict, slide_metadata = extract_text(input_file)
+    text_dict, slide_metadata = extract_text(input_file, prs=prs, worklists=worklists)
     print(f"Found {len(text_dict)} text elements across {len(slide_metadata)} slides")
     
     print(f"Translating from {source_language} to {target_language}...")
-    translated_texts = translate_text(text_dict, slide_metadata, source_language, target_language, resume_file, api_key=api_key)
+    translated_texts = translate_text(text_dict, slide_metadata, source_language, target_language, resume_file, api_key=api_key, max_workers=max_workers)
     
     print(f"Updating PowerPoint with translated text...")
-    update_slides(input_file, output_file, translated_texts)
+    update_slides(input_file, output_file, translated_texts, prs=prs, worklists=worklists)
     
     print(f"Translation completed!")
     print(f"Translated presentation saved as: {output_file}")
@@ -1253,6 +1636,8 @@ if __name__ == "__main__":
     parser.add_argument("--source-language", help="Source language code (e.g., en)")
     parser.add_argument("--target-language", help="Target language code (e.g., ja)")
     parser.add_argument("--api-key", help="Claude API Key (can also be set as CLAUDE_API_KEY environment variable)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_TRANSLATION_WORKERS,
+                        help=f"Number of batches translated concurrently (default: {DEFAULT_TRANSLATION_WORKERS})")
     
     args = parser.parse_args()
     
@@ -1289,4 +1674,4 @@ if __name__ == "__main__":
     else:
         target_language = input("Enter target language (e.g., fr for French): ")
     
-    translate_pptx(input_file, output_file, source_language, target_language, args.resume, api_key=args.api_key)
\ No newline at end of file
+    translate_pptx(input_file, output_file, source_language, target_language, args.resume, api_key=args.api_key, max_workers=args.workers)
\ No newline at end of file
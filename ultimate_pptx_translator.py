@@ -1,21 +1,122 @@
 #!/usr/bin/env python3
 import os
 import json
+import atexit
 import anthropic
 import sys
 import re
 import time
 import argparse
+import threading
+import logging
 from datetime import datetime
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 from dotenv import load_dotenv
 import zipfile
-import xml.etree.ElementTree as ET
 from pptx import Presentation
 
+# lxml (already required by python-pptx) parses slide XML in C; the stdlib parser is the fallback
+try:
+    from lxml import etree as ET
+    # The stdlib parser drops comments and processing instructions, so lxml does too;
+    # otherwise they would show up as children and split element text around them
+    _xml_parser = ET.XMLParser(remove_comments=True, remove_pis=True)
+except ImportError:
+    import xml.etree.ElementTree as ET
+    _xml_parser = None
+
+# NumPy and Numba are optional; together they compile the CJK count used for token estimates
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# orjson is optional; it speeds up the JSON sent to and parsed from the API and the
+# recovery file writes, with the stdlib json module as the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _json_compact(obj):
+    """Single-line JSON text with non-ASCII characters kept as is; indentation in the
+    API messages only costs input tokens"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+def _json_loads(text):
+    """Parse JSON text; raises json.JSONDecodeError (orjson's error subclasses it)"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+def _write_json_file(path, obj):
+    """Write obj as indented UTF-8 JSON to path"""
+    if orjson is not None:
+        # orjson produces UTF-8 bytes directly, skipping the str -> bytes encode
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, ensure_ascii=False, indent=2)
+
 # Load environment variables from .env file
 load_dotenv()
 
+# Batches translated concurrently by default; requests mostly wait on the API
+DEFAULT_TRANSLATION_WORKERS = int(os.getenv("TRANSLATE_CONCURRENCY", "5"))
+
+# Target languages that get smaller batches and chunks:
+# (max batch tokens, failed-batch retry divisor, final chunk size)
+_CJK_LANGS = frozenset({"ja", "zh", "ko", "zh-CN", "zh-TW"})
+_BATCH_PARAMS = {True: (50000, 20, 50), False: (100000, 10, 100)}
+
+# Seconds a streamed response may go without new data before the attempt is abandoned and retried
+STREAM_STALL_TIMEOUT = float(os.getenv("TRANSLATE_STREAM_TIMEOUT", "60"))
+
+# Per-batch progress goes through this logger (to stderr, so it doesn't fight the tqdm bar);
+# TRANSLATE_LOG=DEBUG shows every batch's details, WARNING keeps only problems
+log = logging.getLogger("translate")
+_log_level = logging.getLevelName(os.getenv("TRANSLATE_LOG", "INFO").upper())
+# An unknown name comes back as a "Level ..." string rather than a number; fall back to INFO
+log.setLevel(_log_level if isinstance(_log_level, int) else logging.INFO)
+
+class _TqdmLogHandler(logging.Handler):
+    """Writes log records with tqdm.write so they print above a live progress bar instead of tearing it"""
+    def emit(self, record):
+        try:
+            tqdm.write(self.format(record), file=sys.stderr)
+        except Exception:
+            self.handleError(record)
+
+# Guards the shared cost tracker when batches are translated from several threads
+_cost_lock = threading.Lock()
+
+# Minimum seconds between recovery file rewrites; changes in between are written by the
+# next save after the interval, a forced save, or at exit
+RECOVERY_FLUSH_INTERVAL = 2.0
+
+# (epoch second, formatted timestamp) of the last _recovery_timestamp() call
+_last_timestamp = (None, "")
+
+def _recovery_timestamp():
+    """Current local time as YYYYmmdd_HHMMSS, formatted at most once per second"""
+    global _last_timestamp
+    now = int(time.time())
+    second, formatted = _last_timestamp
+    if second != now:
+        formatted = datetime.fromtimestamp(now).strftime("%Y%m%d_%H%M%S")
+        _last_timestamp = (now, formatted)
+    return formatted
+
 # XML namespaces used in PPTX files
 namespaces = {
     'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
@@ -28,120 +129,511 @@ namespaces = {
     'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
 }
 
+# Elements the deep extraction pass collects from each slide, in Clark notation
+_GRAPHIC_DATA_TAG = f"{{{namespaces['a']}}}graphicData"
+_PARAGRAPH_TAG = f"{{{namespaces['a']}}}p"
+_TABLE_CELL_TAG = f"{{{namespaces['a']}}}tc"
+_COMMENT_TAG = f"{{{namespaces['p']}}}cm"
+_NV_PROPS_TAG = f"{{{namespaces['p']}}}nvPr"
+_DEEP_SCAN_TAGS = (_GRAPHIC_DATA_TAG, _PARAGRAPH_TAG, _TABLE_CELL_TAG, _COMMENT_TAG, _NV_PROPS_TAG)
+_REL_ID_ATTR = f"{{{namespaces['r']}}}id"
+
+# Decks need at least this many slides per worker process before the deep XML scan is parallelized
+PARALLEL_EXTRACTION_MIN_SLIDES = 25
+
+# Descendant lookups run for every extracted element: a compiled XPath under lxml,
+# otherwise a C-level iter() over the Clark-notation tag
+def _descendant_finder(prefix, local):
+    if _xml_parser is not None:
+        return ET.XPath(f'.//{prefix}:{local}', namespaces=namespaces)
+    tag = f"{{{namespaces[prefix]}}}{local}"
+    return lambda element: [e for e in element.iter(tag) if e is not element]
+
+_find_a_t = _descendant_finder('a', 't')
+_find_r_t = _descendant_finder('r', 't')
+_find_mc_t = _descendant_finder('mc', 't')
+_find_a_dgm = _descendant_finder('a', 'dgm')
+
+# Alt text of a shape's nvPr: the first a:altTxt or a14:alt in document order, as a list
+# of at most one element. One XPath evaluation under lxml
+if _xml_parser is not None:
+    _find_alt_text = ET.XPath('(.//a:altTxt|.//p:extLst//p:ext//a14:alt)[1]', namespaces=namespaces)
+else:
+    def _find_alt_text(element):
+        hits = element.findall('.//a:altTxt', namespaces) + element.findall('.//p:extLst//p:ext//a14:alt', namespaces)
+        if len(hits) > 1:
+            order = {e: i for i, e in enumerate(element.iter())}
+            hits.sort(key=order.__getitem__)
+        return hits[:1]
+
+# Regexes used per zip entry / per slide and on every API response, compiled once
+_SLIDE_RE = re.compile(r'ppt/slides/slide[0-9]+\.xml')
+_SLIDE_NUM_RE = re.compile(r'slide([0-9]+)\.xml')
+_ERR_LINE_RE = re.compile(r'line (\d+)')
+_ERR_COL_RE = re.compile(r'column (\d+)')
+_BAD_ESCAPE_RE = re.compile(r'(?<!\\)\\(?!["\\/bfnrt]|u[0-9a-fA-F]{4})')
+_TRAILING_COMMA_OBJ_RE = re.compile(r',\s*}')
+_TRAILING_COMMA_ARR_RE = re.compile(r',\s*]')
+_PROP_NAME_RE = re.compile(r'([a-zA-Z0-9_]+):')
+_KV_RE = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_NUM_KV_RE = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*([0-9]+(?:\.[0-9]+)?)')
+_LEADING_NON_JSON_RE = re.compile(r'^[^{]*')
+_TRAILING_NON_JSON_RE = re.compile(r'[^}]*$')
+_FLAT_OBJECT_RE = re.compile(r'({[^{]*?})')
+_JSON_STRUCTURAL_RE = re.compile(r'[{}"\\]')
+# Payload of the first fenced code block in a model response (an unclosed fence runs to the end)
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)(?:```|\Z)', re.DOTALL)
+# Text with nothing to translate: digits/punctuation/whitespace only, a bare URL or an email address
+_SKIP_RE = re.compile(r'[\d\W_]*|https?://\S+|[\w.+-]+@[\w.-]+')
+
+# Literal escape sequences left in translated values, mapped to the characters they stand for
+_CLEAN_RE = re.compile(r'\\n|\\u000b|\\t')
+_CLEAN_MAP = {'\\n': '\n', '\\u000b': '\v', '\\t': '\t'}
+
+# str.translate table deleting control characters (U+0000-U+001F and U+007F)
+_CTRL_TABLE = dict.fromkeys([*range(0x20), 0x7F])
+
+# Basic CJK Unified Ideographs (range ends excluded), used for token estimates
+_CJK_RE = re.compile(r'[\u4E01-\u9FFE]')
+
+if njit is not None and np is not None:
+    @njit(cache=True)
+    def _count_cjk_segments(codepoints, offsets):
+        """CJK code points in each codepoints[offsets[i]:offsets[i+1]] segment"""
+        counts = np.zeros(len(offsets) - 1, dtype=np.int64)
+        for i in range(len(offsets) - 1):
+            n = 0
+            for j in range(offsets[i], offsets[i + 1]):
+                c = codepoints[j]
+                if c > 0x4E00 and c < 0x9FFF:
+                    n += 1
+            counts[i] = n
+        return counts
+else:
+    _count_cjk_segments = None
+
+# Token estimates by text, shared across batching calls in this process
+# (emptied when it would grow past _TOKEN_CACHE_SIZE entries)
+_TOKEN_CACHE_SIZE = 65536
+_token_cache = {}
+
+def _compute_token_estimates(strings):
+    """
+    Estimated token count of each string: 4 ASCII chars or ~1.5 CJK chars per token.
+    Large lists are counted in one pass over a single UTF-32 buffer by the JIT kernel;
+    otherwise the regex engine counts the CJK characters of each string.
+    """
+    if _count_cjk_segments is not None and len(strings) >= 100:
+        lengths = np.fromiter((len(t) for t in strings), dtype=np.int64, count=len(strings))
+        offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        codepoints = np.frombuffer("".join(strings).encode('utf-32-le', errors='surrogatepass'), dtype=np.uint32)
+        cjk_counts = _count_cjk_segments(codepoints, offsets).tolist()
+    else:
+        cjk_counts = [len(_CJK_RE.findall(t)) for t in strings]
+    
+    # Same arithmetic as the original per-string estimate
+    return [int(((len(text) - cjk_chars) // 4) + (cjk_chars // 1.5) + 1)
+            for text, cjk_chars in zip(strings, cjk_counts)]
+
+def _estimate_tokens_bulk(texts):
+    """
+    Estimated token count of each text (None counts as 0 tokens). Only texts not
+    already in the token cache are counted.
+    """
+    texts = [None if text is None else str(text) for text in texts]
+    counts = {}
+    for text in texts:
+        if text is not None and text not in counts:
+            counts[text] = _token_cache.get(text)
+    
+    misses = [text for text, count in counts.items() if count is None]
+    if misses:
+        estimates = _compute_token_estimates(misses)
+        counts.update(zip(misses, estimates))
+        if len(_token_cache) + len(misses) > _TOKEN_CACHE_SIZE:
+            _token_cache.clear()
+        _token_cache.update(zip(misses, estimates))
+    
+    return [0 if text is None else counts[text] for text in texts]
+
 def extract_text_from_element(element):
     """Extract text from an XML element and its children."""
-    text = ""
+    parts = []
     
     # Extract text from a:t elements (text runs)
-    for t in element.findall('.//a:t', namespaces):
+    for t in _find_a_t(element):
         if t.text:
-            text += t.text + " "
+            parts.append(t.text)
     
     # Extract text from r:t elements (some older PPT formats)
-    for t in element.findall('.//r:t', namespaces):
+    for t in _find_r_t(element):
         if t.text:
-            text += t.text + " "
+            parts.append(t.text)
             
     # Extract text from mc:t elements (compat mode text)
-    for t in element.findall('.//mc:t', namespaces):
+    for t in _find_mc_t(element):
         if t.text:
-            text += t.text + " "
+            parts.append(t.text)
             
     # Also check direct text content of element and children
     if element.text and element.text.strip():
-        text += element.text.strip() + " "
+        parts.append(element.text.strip())
         
     for child in element:
         if child.text and child.text.strip():
-            text += child.text.strip() + " "
+            parts.append(child.text.strip())
         if child.tail and child.tail.strip():
-            text += child.tail.strip() + " "
+            parts.append(child.tail.strip())
     
-    return text.strip()
+    return " ".join(parts).strip()
 
-def extract_from_smartart(pptx_file, rels_path, rel_id):
-    """Extract text from SmartArt diagrams using direct XML processing."""
-    with zipfile.ZipFile(pptx_file, 'r') as zip_ref:
-        # Find the relationship target for the SmartArt
-        rels_xml = zip_ref.read(rels_path)
-        rels_root = ET.fromstring(rels_xml)
-        
-        # Find the target for this relationship ID
-        target = None
-        for rel in rels_root.findall('.//Relationship', namespaces):
-            if rel.get('Id') == rel_id and rel.get('Type').endswith('diagramData'):
-                target = rel.get('Target')
-                break
+def extract_from_smartart(zip_ref, rels_path, rel_id, zip_names=None):
+    """Extract text from SmartArt diagrams using direct XML processing.
+    zip_ref is the already open PPTX archive, shared across all SmartArt shapes;
+    zip_names, if given, is the set of its member names."""
+    # Find the relationship target for the SmartArt
+    rels_xml = zip_ref.read(rels_path)
+    rels_root = ET.XML(rels_xml, _xml_parser)
+    
+    # Find the target for this relationship ID
+    target = None
+    for rel in rels_root.findall('.//Relationship', namespaces):
+        if rel.get('Id') == rel_id and rel.get('Type').endswith('diagramData'):
+            target = rel.get('Target')
+            break
+    
+    if not target:
+        return ""
+    
+    # Convert the target path to the correct format. Zip member names always use '/',
+    # so plain string operations rather than os.path (which would use '\\' on Windows)
+    if target.startswith('../'):
+        target = target.replace('../', '')
+    else:
+        slide_dir = rels_path.rsplit('/', 1)[0]
+        target = f"{slide_dir.rsplit('/', 1)[0]}/{target}"
+    
+    # Read the diagram data
+    try:
+        diagram_xml = zip_ref.read(target)
+        diagram_root = ET.XML(diagram_xml, _xml_parser)
         
-        if not target:
-            return ""
+        # Extract text more comprehensively from the diagram
+        all_text = []
         
-        # Convert the target path to the correct format
-        if target.startswith('../'):
-            target = target.replace('../', '')
-        else:
-            slide_dir = os.path.dirname(rels_path)
-            target = os.path.join(os.path.dirname(slide_dir), target)
+        # Standard text elements
+        for t_element in diagram_root.findall('.//a:t', namespaces):
+            if t_element.text:
+                all_text.append(t_element.text)
         
-        # Read the diagram data
-        try:
-            diagram_xml = zip_ref.read(target)
-            diagram_root = ET.fromstring(diagram_xml)
+        # Text in data model
+        for text_elem in diagram_root.findall('.//dgm:t', {'dgm': 'http://schemas.openxmlformats.org/drawingml/2006/diagram'}):
+            if text_elem.text:
+                all_text.append(text_elem.text)
+                
+        # Text in properties
+        for prop in diagram_root.findall('.//dgm:p', {'dgm': 'http://schemas.openxmlformats.org/drawingml/2006/diagram'}):
+            val = prop.get('val')
+            if val and not any(val in t for t in all_text):
+                all_text.append(val)
+                
+        # Get the layout information - it might have more text
+        data_model_target = None
+        for data_rel in diagram_root.findall('.//{http://schemas.openxmlformats.org/officeDocument/2006/relationships}dm'):
+            data_model_id = data_rel.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}r')
+            if data_model_id:
+                # Find the data model relationship
+                dm_path = f"ppt/diagrams/_rels/{target.rsplit('/', 1)[-1]}.rels"
+                if dm_path in (zip_names if zip_names is not None else zip_ref.namelist()):
+                    dm_rels = ET.XML(zip_ref.read(dm_path), _xml_parser)
+                    for rel in dm_rels.findall('.//Relationship'):
+                        if rel.get('Id') == data_model_id:
+                            data_model_target = rel.get('Target')
+                            if data_model_target.startswith('../'):
+                                data_model_target = data_model_target.replace('../', '')
+                            else:
+                                data_model_target = f"ppt/diagrams/{data_model_target}"
+                            
+                            # Extract text from the data model
+                            try:
+                                dm_xml = zip_ref.read(data_model_target)
+                                dm_root = ET.XML(dm_xml, _xml_parser)
+                                for pt in dm_root.findall('.//*[@val]'):
+                                    val = pt.get('val')
+                                    if val and not any(val in t for t in all_text):
+                                        all_text.append(val)
+                            except:
+                                pass
             
-            # Extract text more comprehensively from the diagram
-            all_text = []
+        return " ".join(all_text).strip()
+    except Exception as e:
+        print(f"Error extracting SmartArt text: {e}")
+        return ""
+
+# Raw-bytes scan for the catch-all pass, which otherwise visits every element of the slide
+# tree for its .text. Only used when NumPy and Numba are installed
+_XML_ENCODING_RE = re.compile(rb'<\?xml[^>]*encoding=["\']([A-Za-z0-9._-]+)')
+
+if njit is not None and np is not None:
+    @njit(cache=True)
+    def _scan_element_texts(buf, out, char_starts, char_ends):
+        """
+        Copy the own text (what .text holds) of every element but the root of a UTF-8 XML
+        document into out, with line breaks normalized and character references expanded
+        as the parser does. Text interrupted by comments or processing instructions is
+        joined; texts that are only ASCII whitespace are dropped. Element k's text is
+        out.decode()[char_starts[k]:char_ends[k]]. Returns (element count, bytes used in out),
+        or (-1, 0) for markup it doesn't handle (CDATA, DOCTYPE, unknown entities).
+        """
+        n = len(buf)
+        count = 0
+        size = 0
+        chars = 0
+        elements = 0
+        active = False
+        nonblank = False
+        begin_size = 0
+        begin_chars = 0
+        i = 0
+        while i < n:
+            b = buf[i]
+            if b != 60:  # text up to the next '<'
+                if not active:
+                    while i < n and buf[i] != 60:
+                        i += 1
+                    continue
+                if b == 13:  # '\r' and '\r\n' become '\n'
+                    code = 10
+                    i += 1
+                    if i < n and buf[i] == 10:
+                        i += 1
+                elif b == 38:  # '&' reference
+                    j = i + 1
+                    while j < n and j - i < 12 and buf[j] != 59:
+                        j += 1
+                    if j >= n or buf[j] != 59 or j == i + 1:
+                        return -1, 0
+                    code = 0
+                    if buf[i + 1] == 35:  # '&#'
+                        if j - i > 2 and (buf[i + 2] == 120):  # '&#x'
+                            if j == i + 3:
+                                return -1, 0
+                            for k in range(i + 3, j):
+                                d = buf[k]
+                                if 48 <= d <= 57:
+                                    code = code * 16 + d - 48
+                                elif 97 <= d <= 102:
+                                    code = code * 16 + d - 87
+                                elif 65 <= d <= 70:
+                                    code = code * 16 + d - 55
+                                else:
+                                    return -1, 0
+                        else:
+                            if j == i + 2:
+                                return -1, 0
+                            for k in range(i + 2, j):
+                                d = buf[k]
+                                if 48 <= d <= 57:
+                                    code = code * 10 + d - 48
+                                else:
+                                    return -1, 0
+                        if code > 0x10FFFF:
+                            return -1, 0
+                    else:
+                        length = j - i - 1
+                        c1 = buf[i + 1]
+                        if length == 3 and c1 == 97 and buf[i + 2] == 109 and buf[i + 3] == 112:
+                            code = 38  # &amp;
+                        elif length == 2 and c1 == 108 and buf[i + 2] == 116:
+                            code = 60  # &lt;
+                        elif length == 2 and c1 == 103 and buf[i + 2] == 116:
+                            code = 62  # &gt;
+                        elif length == 4 and c1 == 113 and buf[i + 2] == 117 and buf[i + 3] == 111 and buf[i + 4] == 116:
+                            code = 34  # &quot;
+                        elif length == 4 and c1 == 97 and buf[i + 2] == 112 and buf[i + 3] == 111 and buf[i + 4] == 115:
+                            code = 39  # &apos;
+                        else:
+                            return -1, 0
+                    i = j + 1
+                    
+                    # Write the code point as UTF-8
+                    if code >= 0x80:
+                        if code < 0x800:
+                            out[size] = 0xC0 | (code >> 6)
+                            out[size + 1] = 0x80 | (code & 0x3F)
+                            size += 2
+                        elif code < 0x10000:
+                            out[size] = 0xE0 | (code >> 12)
+                            out[size + 1] = 0x80 | ((code >> 6) & 0x3F)
+                            out[size + 2] = 0x80 | (code & 0x3F)
+                            size += 3
+                        else:
+                            out[size] = 0xF0 | (code >> 18)
+                            out[size + 1] = 0x80 | ((code >> 12) & 0x3F)
+                            out[size + 2] = 0x80 | ((code >> 6) & 0x3F)
+                            out[size + 3] = 0x80 | (code & 0x3F)
+                            size += 4
+                        chars += 1
+                        nonblank = True
+                        continue
+                else:
+                    code = b
+                    i += 1
+                out[size] = code
+                size += 1
+                if code & 0xC0 != 0x80:
+                    chars += 1
+                if code != 32 and code != 9 and code != 10 and code != 13:
+                    nonblank = True
+                continue
+            if i + 1 >= n:
+                return -1, 0
+            c = buf[i + 1]
+            if c == 33:  # '<!': only comments are handled
+                if i + 3 < n and buf[i + 2] == 45 and buf[i + 3] == 45:
+                    j = i + 4
+                    while j + 2 < n and not (buf[j] == 45 and buf[j + 1] == 45 and buf[j + 2] == 62):
+                        j += 1
+                    if j + 2 >= n:
+                        return -1, 0
+                    i = j + 3
+                    continue
+                return -1, 0
+            if c == 63:  # '<?' processing instruction or XML declaration
+                j = i + 2
+                while j + 1 < n and not (buf[j] == 63 and buf[j + 1] == 62):
+                    j += 1
+                if j + 1 >= n:
+                    return -1, 0
+                i = j + 2
+                continue
             
-            # Standard text elements
-            for t_element in diagram_root.findall('.//a:t', namespaces):
-                if t_element.text:
-                    all_text.append(t_element.text)
+            # A start or end tag ends the current element's text
+            if active:
+                if nonblank:
+                    char_starts[count] = begin_chars
+                    char_ends[count] = chars
+                    count += 1
+                else:
+                    size = begin_size
+                    chars = begin_chars
+                active = False
             
-            # Text in data model
-            for text_elem in diagram_root.findall('.//dgm:t', {'dgm': 'http://schemas.openxmlformats.org/drawingml/2006/diagram'}):
-                if text_elem.text:
-                    all_text.append(text_elem.text)
-                    
-            # Text in properties
-            for prop in diagram_root.findall('.//dgm:p', {'dgm': 'http://schemas.openxmlformats.org/drawingml/2006/diagram'}):
-                val = prop.get('val')
-                if val and not any(val in t for t in all_text):
-                    all_text.append(val)
-                    
-            # Get the layout information - it might have more text
-            data_model_target = None
-            for data_rel in diagram_root.findall('.//{http://schemas.openxmlformats.org/officeDocument/2006/relationships}dm'):
-                data_model_id = data_rel.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}r')
-                if data_model_id:
-                    # Find the data model relationship
-                    dm_path = os.path.join('ppt/diagrams/_rels', os.path.basename(target) + '.rels')
-                    if dm_path in zip_ref.namelist():
-                        dm_rels = ET.fromstring(zip_ref.read(dm_path))
-                        for rel in dm_rels.findall('.//Relationship'):
-                            if rel.get('Id') == data_model_id:
-                                data_model_target = rel.get('Target')
-                                if data_model_target.startswith('../'):
-                                    data_model_target = data_model_target.replace('../', '')
-                                else:
-                                    data_model_target = os.path.join('ppt/diagrams', data_model_target)
-                                
-                                # Extract text from the data model
-                                try:
-                                    dm_xml = zip_ref.read(data_model_target)
-                                    dm_root = ET.fromstring(dm_xml)
-                                    for pt in dm_root.findall('.//*[@val]'):
-                                        val = pt.get('val')
-                                        if val and not any(val in t for t in all_text):
-                                            all_text.append(val)
-                                except:
-                                    pass
-                
-            return " ".join(all_text).strip()
-        except Exception as e:
-            print(f"Error extracting SmartArt text: {e}")
-            return ""
+            # Find the tag's '>'; it may also appear inside quoted attribute values
+            j = i + 2
+            quote = 0
+            while j < n:
+                d = buf[j]
+                if quote != 0:
+                    if d == quote:
+                        quote = 0
+                elif d == 34 or d == 39:
+                    quote = d
+                elif d == 62:
+                    break
+                j += 1
+            if j >= n:
+                return -1, 0
+            if c != 47:  # start tag; self-closing ones have no text
+                if buf[j - 1] != 47 and elements > 0:
+                    active = True
+                    nonblank = False
+                    begin_size = size
+                    begin_chars = chars
+                elements += 1
+            i = j + 1
+        return count, size
+else:
+    _scan_element_texts = None
 
-def extract_text(pptx_file):  
-    """Extract text from PowerPoint presentation with ultimate text extraction"""
+def _special_texts_from_bytes(slide_content):
+    """
+    The catch-all texts of a slide (every non-blank element .text, stripped, in document
+    order) read straight from the XML bytes. Returns None when the document needs the
+    parser (non-UTF-8 encoding, CDATA, DOCTYPE); the caller then walks the tree instead.
+    """
+    if slide_content.startswith(b'\xef\xbb\xbf'):
+        slide_content = slide_content[3:]
+    encoding = _XML_ENCODING_RE.match(slide_content)
+    if not slide_content.startswith(b'<') or (encoding and encoding.group(1).lower() not in (b'utf-8', b'utf8')):
+        return None
+    
+    out = np.empty(len(slide_content), dtype=np.uint8)
+    slots = slide_content.count(b'<') + 1
+    char_starts = np.empty(slots, dtype=np.int64)
+    char_ends = np.empty(slots, dtype=np.int64)
+    count, size = _scan_element_texts(np.frombuffer(slide_content, dtype=np.uint8), out, char_starts, char_ends)
+    if count < 0:
+        return None
+    
+    data = out[:size].tobytes().decode('utf-8')
+    texts = (data[start:end].strip() for start, end in zip(char_starts[:count].tolist(), char_ends[:count].tolist()))
+    return [text for text in texts if text]
+
+def _scan_slide_xml(slide_content):
+    """
+    Parse one slide's XML and collect the candidate texts for each deep-extraction pass,
+    in the order extract_text considers them. Kept free of shared state so it can run in
+    worker processes; returns None if the slide can't be read or parsed.
+    """
+    if slide_content is None:
+        return None
+    try:
+        slide_root = ET.XML(slide_content, _xml_parser)
+    except Exception:
+        return None
+    
+    # The catch-all texts come from the raw bytes when the scanner is available
+    special = _special_texts_from_bytes(slide_content) if _scan_element_texts is not None else None
+    
+    # Walk the slide tree once, sorting out the elements each pass needs
+    elements_by_tag = {tag: [] for tag in _DEEP_SCAN_TAGS}
+    if special is not None and _xml_parser is not None:
+        # Nothing else needs every element, so let lxml filter the tags in C
+        for elem in slide_root.iter(*_DEEP_SCAN_TAGS):
+            elements_by_tag[elem.tag].append(elem)
+    else:
+        all_elements = []
+        for elem in slide_root.iter():
+            all_elements.append(elem)
+            tagged = elements_by_tag.get(elem.tag)
+            if tagged is not None:
+                tagged.append(elem)
+        del all_elements[0]  # the slide root itself, which './/*' never matched
+        if special is None:
+            special = [elem.text.strip() for elem in all_elements if elem.text and elem.text.strip()]
+    
+    # SmartArt needs the relationship files from the archive, so only its ids are collected
+    graphics = []
+    for graphic in elements_by_tag[_GRAPHIC_DATA_TAG]:
+        uri = graphic.get('uri', '')
+        if 'smartArt' in uri:
+            graphics.append(("smartart", [dgm.attrib[_REL_ID_ATTR] for dgm in _find_a_dgm(graphic)
+                                          if _REL_ID_ATTR in dgm.attrib]))
+        elif 'wordArt' in uri or 'diagram' in uri:
+            graphics.append(("wordart", extract_text_from_element(graphic)))
+    
+    alt_text = []
+    for elem in elements_by_tag[_NV_PROPS_TAG]:
+        for alt_text_elem in _find_alt_text(elem):
+            if alt_text_elem.text and alt_text_elem.text.strip():
+                alt_text.append(alt_text_elem.text.strip())
+    
+    return {
+        "graphics": graphics,
+        "paragraphs": [extract_text_from_element(para) for para in elements_by_tag[_PARAGRAPH_TAG]],
+        "table_cells": [extract_text_from_element(tc) for tc in elements_by_tag[_TABLE_CELL_TAG]],
+        "comments": [extract_text_from_element(comment) for comment in elements_by_tag[_COMMENT_TAG]],
+        "special": special,
+        "alt_text": alt_text
+    }
+
+def extract_text(pptx_file, prs=None):  
+    """
+    Extract text from PowerPoint presentation with ultimate text extraction.
+    Pass an already loaded prs to reuse it in update_slides.
+    """
     # Standard extraction first
     text_dict = {}
     slide_metadata = []
@@ -152,7 +644,8 @@ def extract_text(pptx_file):
     }
     
     # Standard python-pptx extraction
-    prs = Presentation(pptx_file)
+    if prs is None:
+        prs = Presentation(pptx_file)
     for index, slide in enumerate(prs.slides):
         slide_info = {
             "slide_number": index + 1,
@@ -160,35 +653,39 @@ def extract_text(pptx_file):
             "content": []
         }
         
-        # Extract slide notes if any
+        # Extract slide notes if any. Extraction must not change the deck (translate_pptx
+        # writes into the same prs), so check has_notes_slide/has_text_frame rather than
+        # touching notes_slide/text_frame, which python-pptx creates when missing
         try:
-            if hasattr(slide, "notes_slide") and slide.notes_slide:
+            if slide.has_notes_slide:
                 for note_shape in slide.notes_slide.shapes:
-                    if hasattr(note_shape, "text_frame") and note_shape.text_frame and note_shape.text.strip():
+                    note_text = note_shape.text.strip() if note_shape.has_text_frame else ""
+                    if note_text:
                         note_id = f"slide_{index+1}_notes"
-                        note_text = note_shape.text.strip()
                         text_dict[note_id] = note_text
                         slide_info["content"].append(f"[Note: {note_text}]")
                         extraction_stats["standard_elements"] += 1
         except:
             pass
         
-        # Process all shapes on the slide
+        # Process all shapes on the slide. shape.text and cell.text rebuild the string from
+        # the XML on every access, so each is read once
         for shape_id, shape in enumerate(slide.shapes):
             # Basic text extraction
-            if hasattr(shape, "text") and shape.text.strip():
+            shape_text = shape.text.strip() if shape.has_text_frame else ""
+            if shape_text:
                 object_id = f"slide_{index+1}_shape_{shape_id}"
-                text_dict[object_id] = shape.text.strip()
-                slide_info["content"].append(shape.text.strip())
+                text_dict[object_id] = shape_text
+                slide_info["content"].append(shape_text)
                 extraction_stats["standard_elements"] += 1
                 
                 # Handle titles
                 if hasattr(shape, "is_title") and shape.is_title:
-                    slide_info["title"] = shape.text.strip()
-                elif hasattr(shape, "is_placeholder") and shape.is_placeholder and hasattr(shape, "placeholder_format"):
+                    slide_info["title"] = shape_text
+                elif shape.is_placeholder:
                     try:
                         if shape.placeholder_format.type == 1:  # Title placeholder
-                            slide_info["title"] = shape.text.strip()
+                            slide_info["title"] = shape_text
                     except:
                         pass
             
@@ -196,17 +693,18 @@ def extract_text(pptx_file):
             if hasattr(shape, "has_table") and shape.has_table:
                 for row_idx, row in enumerate(shape.table.rows):
                     for col_idx, cell in enumerate(row.cells):
-                        if cell.text.strip():
+                        cell_text = cell.text.strip()
+                        if cell_text:
                             cell_id = f"slide_{index+1}_table_{shape_id}_r{row_idx}_c{col_idx}"
-                            text_dict[cell_id] = cell.text.strip()
-                            slide_info["content"].append(cell.text.strip())
+                            text_dict[cell_id] = cell_text
+                            slide_info["content"].append(cell_text)
                             extraction_stats["standard_elements"] += 1
             
             # Try to get text from charts
             try:
                 if hasattr(shape, "chart") and shape.chart:
-                    # Get chart title
-                    if hasattr(shape.chart, "chart_title") and shape.chart.chart_title and shape.chart.chart_title.text_frame:
+                    # Get chart title (has_title first, as chart_title adds an empty title when missing)
+                    if shape.chart.has_title and shape.chart.chart_title.has_text_frame:
                         chart_title_id = f"slide_{index+1}_chart_{shape_id}_title"
                         chart_title = shape.chart.chart_title.text_frame.text
                         text_dict[chart_title_id] = chart_title
@@ -217,128 +715,149 @@ def extract_text(pptx_file):
         
         slide_metadata.append(slide_info)
     
+    # Deep-extraction hits are appended to their slide's metadata by number
+    slide_by_num = {slide_data["slide_number"]: slide_data for slide_data in slide_metadata}
+    
+    # The deep pass skips text that is already part of an extracted value. Rather than
+    # scanning every value in Python for each candidate, exact repeats are caught by a set
+    # and the substring test runs in C over all values joined by NUL (which XML text can't contain)
+    seen_text = set(text_dict.values())
+    unsearched = list(text_dict.values())
+    search_text = [""]
+    
+    def add_text(object_id, text):
+        text_dict[object_id] = text
+        seen_text.add(text)
+        unsearched.append(text)
+    
+    def already_captured(text):
+        if text in seen_text:
+            return True
+        if unsearched:
+            search_text[0] = "\x00".join([search_text[0]] + unsearched)
+            unsearched.clear()
+        return text in search_text[0]
+    
     # Deep XML extraction for elements that python-pptx might miss
     with zipfile.ZipFile(pptx_file, 'r') as zip_ref:
         # Process each slide
-        slide_xmls = [f for f in zip_ref.namelist() if re.match(r'ppt/slides/slide[0-9]+\.xml', f)]
+        # Membership checks against a set instead of rescanning namelist()
+        names = zip_ref.namelist()
+        zip_names = frozenset(names)
+        slide_xmls = [f for f in names if _SLIDE_RE.match(f)]
         
+        slide_contents = []
         for slide_xml in slide_xmls:
+            try:
+                slide_contents.append(zip_ref.read(slide_xml))
+            except Exception:
+                slide_contents.append(None)
+        
+        # Parsing and scanning each slide is independent of the others, so large decks
+        # spread it over worker processes; small decks aren't worth the process start-up.
+        # Only the de-duplication and id assignment below has to run in slide order
+        workers = min(os.cpu_count() or 1, len(slide_xmls) // PARALLEL_EXTRACTION_MIN_SLIDES)
+        slide_scans = None
+        if workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    slide_scans = list(executor.map(_scan_slide_xml, slide_contents,
+                                                    chunksize=PARALLEL_EXTRACTION_MIN_SLIDES))
+            except Exception as e:
+                print(f"Parallel extraction failed ({e}), falling back to sequential extraction")
+                slide_scans = None
+        
+        if slide_scans is None:
+            slide_scans = [_scan_slide_xml(slide_content) for slide_content in slide_contents]
+        
+        for slide_index, slide_xml in enumerate(slide_xmls):
             # Extract slide number from filename
-            slide_num = int(re.search(r'slide([0-9]+)\.xml', slide_xml).group(1))
+            slide_num = int(_SLIDE_NUM_RE.search(slide_xml).group(1))
+            # Slide parts python-pptx didn't list get a throwaway content list
+            slide_content = slide_by_num[slide_num]["content"] if slide_num in slide_by_num else []
             
             # Get slide relationships file
             slide_rels = slide_xml.replace('.xml', '.xml.rels')
-            if slide_rels not in zip_ref.namelist():
+            if slide_rels not in zip_names:
                 slide_rels = f"ppt/slides/_rels/slide{slide_num}.xml.rels"
             
-            # Parse slide XML
-            try:
-                slide_content = zip_ref.read(slide_xml)
-                slide_root = ET.fromstring(slide_content)
-            except:
+            scan = slide_scans[slide_index]
+            if scan is None:
                 continue
             
             # Find all graphicData elements
-            for graphic in slide_root.findall('.//a:graphicData', namespaces):
-                uri = graphic.get('uri', '')
-                
+            for kind, found in scan["graphics"]:
                 # Process SmartArt
-                if 'smartArt' in uri:
-                    # Find the SmartArt relationship
-                    for dgm in graphic.findall('.//a:dgm', namespaces):
-                        if '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id' in dgm.attrib:
-                            rel_id = dgm.attrib['{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id']
-                            smartart_text = extract_from_smartart(pptx_file, slide_rels, rel_id)
-                            if smartart_text:
-                                object_id = f"slide_{slide_num}_smartart_{len(text_dict)}"
-                                text_dict[object_id] = smartart_text
-                                extraction_stats["deep_elements"] += 1
-                                
-                                # Add to slide metadata
-                                for slide_data in slide_metadata:
-                                    if slide_data["slide_number"] == slide_num:
-                                        slide_data["content"].append(smartart_text)
-                                        break
+                if kind == "smartart":
+                    for rel_id in found:
+                        smartart_text = extract_from_smartart(zip_ref, slide_rels, rel_id, zip_names)
+                        if smartart_text:
+                            object_id = f"slide_{slide_num}_smartart_{len(text_dict)}"
+                            add_text(object_id, smartart_text)
+                            extraction_stats["deep_elements"] += 1
+                            
+                            # Add to slide metadata
+                            slide_content.append(smartart_text)
                 
                 # Process WordArt and other graphics
-                elif 'wordArt' in uri or 'diagram' in uri:
-                    text = extract_text_from_element(graphic)
+                else:
+                    text = found
                     if text:
                         object_id = f"slide_{slide_num}_wordart_{len(text_dict)}"
-                        text_dict[object_id] = text
+                        add_text(object_id, text)
                         extraction_stats["deep_elements"] += 1
                         
                         # Add to slide metadata
-                        for slide_data in slide_metadata:
-                            if slide_data["slide_number"] == slide_num:
-                                slide_data["content"].append(text)
-                                break
+                        slide_content.append(text)
             
             # Find all text in the slide, including those that might be missed by python-pptx
-            for para in slide_root.findall('.//a:p', namespaces):
-                text = extract_text_from_element(para)
+            for text in scan["paragraphs"]:
                 # Only add text not already captured (avoid duplication)
-                if text and not any(text in v for v in text_dict.values()):
+                if text and not already_captured(text):
                     object_id = f"slide_{slide_num}_text_{len(text_dict)}"
-                    text_dict[object_id] = text
+                    add_text(object_id, text)
                     extraction_stats["deep_elements"] += 1
                     
             # Look for text in table cells (often missed)
-            for tc in slide_root.findall('.//a:tc', namespaces):
-                text = extract_text_from_element(tc)
-                if text and not any(text in v for v in text_dict.values()):
+            for text in scan["table_cells"]:
+                if text and not already_captured(text):
                     object_id = f"slide_{slide_num}_table_cell_{len(text_dict)}"
-                    text_dict[object_id] = text
+                    add_text(object_id, text)
                     extraction_stats["deep_elements"] += 1
                     
                     # Add to slide metadata
-                    for slide_data in slide_metadata:
-                        if slide_data["slide_number"] == slide_num:
-                            slide_data["content"].append(text)
-                            break
+                    slide_content.append(text)
             
             # Look for text in comments
-            for comment in slide_root.findall('.//p:cm', namespaces):
-                text = extract_text_from_element(comment)
-                if text and not any(text in v for v in text_dict.values()):
+            for text in scan["comments"]:
+                if text and not already_captured(text):
                     object_id = f"slide_{slide_num}_comment_{len(text_dict)}"
-                    text_dict[object_id] = text
+                    add_text(object_id, text)
                     extraction_stats["deep_elements"] += 1
                     
                     # Add to slide metadata
-                    for slide_data in slide_metadata:
-                        if slide_data["slide_number"] == slide_num:
-                            slide_data["content"].append(text)
-                            break
+                    slide_content.append(text)
                     
             # Comprehensive scanning for ALL slides - ensures we don't miss any text
             # Look for any text content in any element
-            for elem in slide_root.findall('.//*'):
-                if elem.text and elem.text.strip() and not any(elem.text.strip() in v for v in text_dict.values()):
+            for text in scan["special"]:
+                if not already_captured(text):
                     special_id = f"slide_{slide_num}_special_{len(text_dict)}"
-                    text_dict[special_id] = elem.text.strip()
+                    add_text(special_id, text)
                     extraction_stats["special_elements"] += 1
                     
                     # Add to slide metadata
-                    for slide_data in slide_metadata:
-                        if slide_data["slide_number"] == slide_num:
-                            slide_data["content"].append(elem.text.strip())
-                            break
+                    slide_content.append(text)
                             
             # Handle the special case of alt text on images and shapes
-            for elem in slide_root.findall('.//p:nvPr', namespaces):
-                alt_text_elem = elem.find('.//a:altTxt', namespaces) or elem.find('.//p:extLst//p:ext//a14:alt', namespaces)
-                if alt_text_elem is not None and alt_text_elem.text and alt_text_elem.text.strip():
-                    if not any(alt_text_elem.text.strip() in v for v in text_dict.values()):
-                        alt_id = f"slide_{slide_num}_alt_{len(text_dict)}"
-                        text_dict[alt_id] = alt_text_elem.text.strip()
-                        extraction_stats["special_elements"] += 1
-                        
-                        # Add to slide metadata
-                        for slide_data in slide_metadata:
-                            if slide_data["slide_number"] == slide_num:
-                                slide_data["content"].append(alt_text_elem.text.strip())
-                                break
+            for text in scan["alt_text"]:
+                if not already_captured(text):
+                    alt_id = f"slide_{slide_num}_alt_{len(text_dict)}"
+                    add_text(alt_id, text)
+                    extraction_stats["special_elements"] += 1
+                    
+                    # Add to slide metadata
+                    slide_content.append(text)
     
     print(f"Ultimate extraction found {len(text_dict)} text elements")
     print(f"  - Standard extraction: {extraction_stats['standard_elements']} elements")
@@ -347,9 +866,13 @@ def extract_text(pptx_file):
     
     return text_dict, slide_metadata
 
-def update_slides(pptx_file, output_file, translated_texts):
-    """Update PowerPoint presentation with translated text while preserving formatting"""
-    prs = Presentation(pptx_file)
+def update_slides(pptx_file, output_file, translated_texts, prs=None):
+    """
+    Update PowerPoint presentation with translated text while preserving formatting.
+    Pass the prs used by extract_text to skip reopening the file.
+    """
+    if prs is None:
+        prs = Presentation(pptx_file)
     updated_count = 0
     total_slides = len(prs.slides)
     
@@ -359,6 +882,19 @@ def update_slides(pptx_file, output_file, translated_texts):
         if not text_frame or not new_text:
             return False
         
+        # Single paragraph made only of runs (no line breaks or fields) and a one-line
+        # translation: write into the runs in place, which keeps every run property and
+        # skips the snapshot and rebuild below. The first run takes the whole translation
+        paragraphs = text_frame.paragraphs
+        if len(paragraphs) == 1 and "\n" not in new_text and "\v" not in new_text:
+            runs = paragraphs[0].runs
+            if runs and paragraphs[0].text == "".join(run.text for run in runs):
+                runs[0].text = new_text
+                for run in runs[1:]:
+                    run.text = ""
+                updated_count += 1
+                return True
+        
         # Save formatting details from each paragraph
         formatting = []
         for para in text_frame.paragraphs:
@@ -445,7 +981,7 @@ def update_slides(pptx_file, output_file, translated_texts):
             if hasattr(shape, "chart") and shape.chart:
                 # Update chart title
                 chart_title_id = f"slide_{slide_idx+1}_chart_{shape_id}_title"
-                if chart_title_id in translated_texts and hasattr(shape.chart, "chart_title") and hasattr(shape.chart.chart_title, "text_frame"):
+                if chart_title_id in translated_texts and shape.chart.has_title and shape.chart.chart_title.has_text_frame:
                     update_text_frame(shape.chart.chart_title.text_frame, translated_texts[chart_title_id])
                     updated = True
         except:
@@ -466,8 +1002,8 @@ def update_slides(pptx_file, output_file, translated_texts):
         return updated
     
     # Update each slide with progress bar
-    from tqdm import tqdm
-    with tqdm(total=total_slides, desc="Updating slides", unit="slide") as pbar:
+    # tqdm redraws at most every 0.2s on its own; no per-slide description or refresh
+    with tqdm(total=total_slides, desc="Updating slides", unit="slide", mininterval=0.2) as pbar:
         for slide_idx, slide in enumerate(prs.slides):
             # Update slide notes if any
             try:
@@ -482,12 +1018,8 @@ def update_slides(pptx_file, output_file, translated_texts):
             # Update each shape on the slide
             for shape_idx, shape in enumerate(slide.shapes):
                 process_shape(shape, shape_idx, slide_idx)
-                
-            # Update progress bar
-            completion_percentage = int(100 * (slide_idx + 1) / total_slides)
-            pbar.set_description(f"Updating slides: {completion_percentage}% complete")
+            
             pbar.update(1)
-            pbar.refresh()
     
     print(f"Updated {updated_count} text elements in the presentation")
     
@@ -500,44 +1032,46 @@ def split_dict_into_smart_batches(input_dict, max_input_tokens=150000, prompt_to
     """
     Split a dictionary into batches based on estimated token count to optimize API usage.
     """
-    # Function to estimate tokens in a string with better Unicode/multibyte handling
-    def estimate_tokens(text):
-        if text is None:
-            return 0
-            
-        # Convert to string if not already
-        text_str = str(text)
-        
-        # For Asian languages (CJK), use 1.5 characters per token as a conservative estimate
-        cjk_chars = sum(1 for c in text_str if ord(c) > 0x4E00 and ord(c) < 0x9FFF)  # Basic CJK Unified Ideographs
-        ascii_chars = len(text_str) - cjk_chars
-        
-        # 4 ASCII chars per token, ~1.5 CJK chars per token (rough estimate)
-        token_estimate = (ascii_chars // 4) + (cjk_chars // 1.5) + 1  # Add 1 to round up
-        
-        return int(token_estimate)
+    # Estimate every key and value once
+    keys = list(input_dict.keys())
+    values = list(input_dict.values())
+    item_tokens = [key_tokens + value_tokens + 10  # +10 for JSON formatting
+                   for key_tokens, value_tokens in zip(_estimate_tokens_bulk(keys), _estimate_tokens_bulk(values))]
     
-    items = list(input_dict.items())
-    batches = []
-    current_batch = {}
-    current_token_count = prompt_tokens
+    capacity = max_input_tokens - prompt_tokens
     
-    # Sort items by estimated token length (optional)
-    items.sort(key=lambda x: estimate_tokens(x[1]), reverse=True)
+    # Largest items first (ties keep their original order). When everything fits in one
+    # batch there is nothing to pack, so the items stay in document order
+    if sum(item_tokens) <= capacity:
+        order = list(range(len(item_tokens)))
+    elif np is not None and len(item_tokens) >= 100:
+        order = np.argsort(-np.array(item_tokens, dtype=np.int64), kind='stable').tolist()
+    else:
+        order = sorted(range(len(item_tokens)), key=item_tokens.__getitem__, reverse=True)
     
-    for key, value in items:
-        item_tokens = estimate_tokens(key) + estimate_tokens(value) + 10  # +10 for JSON formatting
-        
-        if current_token_count + item_tokens > max_input_tokens and current_batch:
-            batches.append(current_batch)
-            current_batch = {}
-            current_token_count = prompt_tokens
+    # First-fit decreasing: each item goes into the first batch with room left for it, so
+    # small items fill the gaps behind large ones instead of opening new batches. An item
+    # too large for any batch still gets a batch of its own
+    smallest = min(item_tokens, default=0)
+    batch_items = []
+    remaining = []
+    open_batches = []  # batches that can still take at least the smallest item
+    for i in order:
+        tokens = item_tokens[i]
+        b = next((b for b in open_batches if remaining[b] >= tokens), None)
+        if b is None:
+            b = len(batch_items)
+            batch_items.append([])
+            remaining.append(capacity)
+            open_batches.append(b)
         
-        current_batch[key] = value
-        current_token_count += item_tokens
+        batch_items[b].append(i)
+        remaining[b] -= tokens
+        if remaining[b] < smallest:
+            open_batches.remove(b)
     
-    if current_batch:
-        batches.append(current_batch)
+    # Build the batch dicts only once packing is done
+    batches = [{keys[i]: values[i] for i in indices} for indices in batch_items]
     
     total_items = len(input_dict)
     batch_sizes = [len(batch) for batch in batches]
@@ -554,6 +1088,13 @@ def repair_json(json_content):
     More robust JSON repair function that can handle various common issues including Unicode.
     """
     original_content = json_content
+    if orjson is not None:
+        # orjson is stricter (no NaN, 64-bit ints), and the repairs below key on the stdlib
+        # error messages, so anything it rejects goes through json.loads as before
+        try:
+            return orjson.loads(json_content)
+        except orjson.JSONDecodeError:
+            pass
     try:
         return json.loads(json_content)
     except json.JSONDecodeError as e:
@@ -566,14 +1107,14 @@ def repair_json(json_content):
                 json_content = json_content.decode('utf-8', errors='replace')
             
             # Remove or replace invisible/control characters that might cause issues
-            json_content = re.sub(r'[\x00-\x1F\x7F]', '', json_content)
+            json_content = json_content.translate(_CTRL_TABLE)
         except Exception as enc_err:
             print(f"Error handling encoding: {enc_err}")
         
         if "Unterminated string" in str(e):
             error_info = str(e)
-            line_match = re.search(r'line (\d+)', error_info)
-            col_match = re.search(r'column (\d+)', error_info)
+            line_match = _ERR_LINE_RE.search(error_info)
+            col_match = _ERR_COL_RE.search(error_info)
             
             if line_match and col_match:
                 line_num = int(line_match.group(1))
@@ -589,7 +1130,7 @@ def repair_json(json_content):
                     json_content = '\n'.join(lines)
         
         # Handle improperly escaped characters and unicode escapes
-        json_content = re.sub(r'(?<!\\)\\(?!["\\/bfnrt]|u[0-9a-fA-F]{4})', r'\\\\', json_content)
+        json_content = _BAD_ESCAPE_RE.sub(r'\\\\', json_content)
         
         # Fix unbalanced braces
         brace_count = json_content.count('{') - json_content.count('}')
@@ -600,8 +1141,8 @@ def repair_json(json_content):
                 json_content = json_content.rstrip().rstrip('}').rstrip()
         
         # Fix common JSON syntax issues
-        json_content = re.sub(r',\s*}', '}', json_content)
-        json_content = re.sub(r',\s*]', ']', json_content)
+        json_content = _TRAILING_COMMA_OBJ_RE.sub('}', json_content)
+        json_content = _TRAILING_COMMA_ARR_RE.sub(']', json_content)
         
         # Ensure property names are properly quoted
         def fix_property_names(match):
@@ -610,7 +1151,7 @@ def repair_json(json_content):
                 return f'"{prop}":'
             return match.group(0)
         
-        json_content = re.sub(r'([a-zA-Z0-9_]+):', fix_property_names, json_content)
+        json_content = _PROP_NAME_RE.sub(fix_property_names, json_content)
         
         # Try to parse the repaired JSON
         try:
@@ -621,8 +1162,7 @@ def repair_json(json_content):
             # Fallback: extract key-value pairs using regex
             result = {}
             # Modified pattern to handle Unicode characters better
-            pattern = r'"((?:[^"\\]|\\.)*)"\s*:\s*"((?:[^"\\]|\\.)*)"'
-            for match in re.finditer(pattern, original_content):
+            for match in _KV_RE.finditer(original_content):
                 try:
                     key, value = match.groups()
                     # Unescape escaped quotes in the extracted strings
@@ -633,8 +1173,7 @@ def repair_json(json_content):
                     print(f"Error extracting key-value pair: {extract_err}")
             
             # Also try to capture numeric values
-            num_pattern = r'"((?:[^"\\]|\\.)*)"\s*:\s*([0-9]+(?:\.[0-9]+)?)'
-            for match in re.finditer(num_pattern, original_content):
+            for match in _NUM_KV_RE.finditer(original_content):
                 try:
                     key, value = match.groups()
                     key = key.replace('\\"', '"')
@@ -660,37 +1199,50 @@ def extract_json_blocks(text):
     # First try to find complete JSON objects
     try:
         # Clean the text: remove any leading/trailing non-JSON content
-        text = re.sub(r'^[^{]*', '', text)  # Remove anything before the first {
-        text = re.sub(r'[^}]*$', '', text)  # Remove anything after the last }
+        text = _LEADING_NON_JSON_RE.sub('', text)  # Remove anything before the first {
+        text = _TRAILING_NON_JSON_RE.sub('', text)  # Remove anything after the last }
         
-        # Try extracting json blocks with a more robust pattern
-        # This pattern tries to match balanced { } pairs
+        # Match balanced { } pairs, ignoring braces inside string literals. Only braces,
+        # quotes and backslashes matter, so the regex skips everything else in C
         depth = 0
         start = -1
         blocks = []
+        in_string = False
+        escaped_pos = -1  # position of a character escaped by the preceding backslash
         
-        for i, char in enumerate(text):
-            if char == '{':
+        for match in _JSON_STRUCTURAL_RE.finditer(text):
+            i = match.start()
+            char = match.group()
+            if in_string:
+                if i == escaped_pos:
+                    continue
+                if char == '\\':
+                    escaped_pos = i + 1
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == '{':
                 if depth == 0:
                     start = i
                 depth += 1
-            elif char == '}':
+            elif char == '}' and depth > 0:
                 depth -= 1
-                if depth == 0 and start != -1:
+                if depth == 0:
                     blocks.append(text[start:i+1])
                     start = -1
         
         if not blocks:
             # Fallback to simpler regex if the balanced matching didn't work
-            potential_blocks = re.findall(r'({[^{]*?})', text)
+            potential_blocks = _FLAT_OBJECT_RE.findall(text)
             blocks = potential_blocks
         
         valid_blocks = []
         for block in blocks:
             try:
                 # Fix common issues that might occur in the JSON block
-                block = re.sub(r',\s*}', '}', block)  # Remove trailing commas
-                block = re.sub(r'([a-zA-Z0-9_]+):', r'"\1":', block)  # Quote unquoted keys
+                block = _TRAILING_COMMA_OBJ_RE.sub('}', block)  # Remove trailing commas
+                block = _PROP_NAME_RE.sub(r'"\1":', block)  # Quote unquoted keys
                 
                 parsed = json.loads(block)
                 valid_blocks.append(parsed)
@@ -716,8 +1268,7 @@ def extract_json_blocks(text):
     try:
         result = {}
         # Look for key-value pairs directly, handling Unicode properly
-        pattern = r'"((?:[^"\\]|\\.)*)"\s*:\s*"((?:[^"\\]|\\.)*)"'
-        for match in re.finditer(pattern, text):
+        for match in _KV_RE.finditer(text):
             key, value = match.groups()
             # Unescape escaped quotes
             key = key.replace('\\"', '"')
@@ -740,12 +1291,12 @@ def setup_recovery_system(file_id, text_dict, slide_metadata, source_language, t
     os.makedirs(recovery_dir, exist_ok=True)
     
     if resume_file and os.path.exists(resume_file):
-        with open(resume_file, 'r', encoding='utf-8') as f:
-            recovery_state = json.load(f)
+        with open(resume_file, 'rb') as f:
+            recovery_state = _json_loads(f.read())
         print(f"Resuming translation from recovery file: {resume_file}")
         recovery_file = resume_file
     else:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = _recovery_timestamp()
         recovery_file = os.path.join(recovery_dir, f"recovery_ultimate_{file_id}_{timestamp}.json")
         recovery_state = {
             "file_id": file_id,
@@ -758,25 +1309,61 @@ def setup_recovery_system(file_id, text_dict, slide_metadata, source_language, t
             "start_time": timestamp,
             "last_updated": timestamp
         }
-        with open(recovery_file, 'w', encoding='utf-8') as f:
-            json.dump(recovery_state, f, ensure_ascii=False, indent=2)
+        _write_json_file(recovery_file, recovery_state)
         print(f"Created new recovery file: {recovery_file}")
     
-    def save_recovery_state():
-        recovery_state["last_updated"] = datetime.now().strftime("%Y%m%d_%H%M%S")
-        with open(recovery_file, 'w', encoding='utf-8') as f:
-            json.dump(recovery_state, f, ensure_ascii=False, indent=2)
+    dirty = [False]
+    last_flush = [0.0]
+    
+    def write_state():
+        recovery_state["last_updated"] = _recovery_timestamp()
+        # Write to a temp file and swap it in so an interrupted write can't corrupt the state
+        tmp_file = f"{recovery_file}.tmp"
+        _write_json_file(tmp_file, recovery_state)
+        os.replace(tmp_file, recovery_file)
+        # Small sidecar with just the totals, so listing recovery files doesn't parse whole states
+        _write_json_file(f"{recovery_file}.summary", {
+            "total_items": recovery_state.get("total_items", 0),
+            "translated": len(recovery_state["translated_items"]),
+            "failed": len(recovery_state["failed_batches"]),
+            "start_time": recovery_state.get("start_time", "unknown"),
+            "last_updated": recovery_state["last_updated"]
+        })
+        dirty[0] = False
+        last_flush[0] = time.monotonic()
+    
+    def save_recovery_state(force=False, final=False):
+        """
+        Record that the recovery state changed; it is rewritten at most once per
+        RECOVERY_FLUSH_INTERVAL unless force (or final, for the last save) is set.
+        """
+        dirty[0] = True
+        if force or final or time.monotonic() - last_flush[0] >= RECOVERY_FLUSH_INTERVAL:
+            write_state()
+        if final:
+            atexit.unregister(flush_recovery_state)
+    
+    def flush_recovery_state():
+        if dirty[0]:
+            write_state()
+    
+    # Covers Ctrl-C and other early exits between coalesced writes
+    atexit.register(flush_recovery_state)
     
     return recovery_state, recovery_file, save_recovery_state
 
-def translate_batch(batch, batch_index, slide_metadata, source_language, target_language, api_key=None, max_retries=3, cost_tracker=None):
+def translate_batch(batch, batch_index, structured_context, source_language, target_language, api_key=None, max_retries=3, cost_tracker=None, client=None):
     """
     Translate a single batch with retry logic.
+    structured_context is the slide metadata already serialized to JSON, so callers
+    serialize it once for all batches; raw metadata is still accepted.
+    client is the caller's anthropic.Anthropic instance, shared by every batch so
+    they reuse its connection pool; without one a client is created for this batch.
     """
     batch_copy = batch.copy()
     
     def clean_text(text):
-        return text.replace('\\n', '\n').replace('\\u000b', '\v').replace('\\t', '\t')
+        return _CLEAN_RE.sub(lambda m: _CLEAN_MAP[m.group(0)], text)
         
     # Calculate estimated cost based on prompt and completion tokens
     def estimate_cost(prompt_tokens, completion_tokens, model="claude-3-7-sonnet"):
@@ -802,19 +1389,21 @@ def translate_batch(batch, batch_index, slide_metadata, source_language, target_
             "total_cost": total_cost
         }
     
-    # Use provided API key or fall back to environment variable
-    api_key = api_key or os.getenv("CLAUDE_API_KEY")
-    if not api_key:
-        raise ValueError("Claude API key must be provided either as an argument or via CLAUDE_API_KEY environment variable")
-        
-    client = anthropic.Anthropic(
-        api_key=api_key,
-        default_headers={
-            "anthropic-beta": "output-128k-2025-02-19"
-        }
-    )
+    if client is None:
+        # Use provided API key or fall back to environment variable
+        api_key = api_key or os.getenv("CLAUDE_API_KEY")
+        if not api_key:
+            raise ValueError("Claude API key must be provided either as an argument or via CLAUDE_API_KEY environment variable")
+            
+        client = anthropic.Anthropic(
+            api_key=api_key,
+            default_headers={
+                "anthropic-beta": "output-128k-2025-02-19"
+            }
+        )
     
-    structured_context = json.dumps(slide_metadata, ensure_ascii=False, indent=2)
+    if not isinstance(structured_context, str):
+        structured_context = _json_compact(structured_context)
     
     system_prompt = f"""You are a professional translator. Translate from {source_language} to {target_language}.
 Ensure consistency in terminology and contextual meaning.
@@ -843,14 +1432,16 @@ Slide Context:
 {structured_context}
 
 Now translate the following structured JSON object while preserving its format:
-{json.dumps(batch_copy, ensure_ascii=False, indent=2)}
+{_json_compact(batch_copy)}
 
 Reply ONLY with the translated JSON. The JSON MUST be valid and parseable.
 """
 
     for retry in range(max_retries + 1):
         try:
-            response = client.messages.create(
+            # Stream the reply so a stalled connection times out (read timeout between chunks)
+            # instead of blocking this worker until the whole response would have arrived
+            with client.messages.stream(
                 model="claude-3-7-sonnet-20250219",
                 system=system_prompt,
                 max_tokens=4000,
@@ -859,8 +1450,11 @@ Reply ONLY with the translated JSON. The JSON MUST be valid and parseable.
                 ],
                 metadata={
                     "user_id": "anonymous_user"
-                }
-            )
+                },
+                timeout=anthropic.Timeout(600.0, read=STREAM_STALL_TIMEOUT)
+            ) as stream:
+                translated_text = "".join(stream.text_stream)
+                response = stream.get_final_message()
 
             # Track token usage and cost
             prompt_tokens = response.usage.input_tokens
@@ -869,32 +1463,26 @@ Reply ONLY with the translated JSON. The JSON MUST be valid and parseable.
             batch_cost = estimate_cost(prompt_tokens, completion_tokens, "claude-3-7-sonnet")
             
             # Update the cost tracker if provided
+            running_total = ""
             if cost_tracker is not None:
-                cost_tracker["total_input_tokens"] += prompt_tokens
-                cost_tracker["total_output_tokens"] += completion_tokens
-                cost_tracker["total_input_cost"] += batch_cost["input_cost"]
-                cost_tracker["total_output_cost"] += batch_cost["output_cost"]
-                cost_tracker["total_cost"] += batch_cost["total_cost"]
-                cost_tracker["api_calls"] += 1
+                with _cost_lock:
+                    cost_tracker["total_input_tokens"] += prompt_tokens
+                    cost_tracker["total_output_tokens"] += completion_tokens
+                    cost_tracker["total_input_cost"] += batch_cost["input_cost"]
+                    cost_tracker["total_output_cost"] += batch_cost["output_cost"]
+                    cost_tracker["total_cost"] += batch_cost["total_cost"]
+                    cost_tracker["api_calls"] += 1
+                    running_total = f" (running total ${cost_tracker['total_cost']:.4f} for {cost_tracker['api_calls']} API calls)"
             
-            print(f"Batch {batch_index} token usage: {prompt_tokens} input + {completion_tokens} output tokens")
-            print(f"Batch {batch_index} cost: ${batch_cost['total_cost']:.4f} (${batch_cost['input_cost']:.4f} input + ${batch_cost['output_cost']:.4f} output)")
+            log.debug("Batch %s token usage: %d input + %d output tokens", batch_index, prompt_tokens, completion_tokens)
+            log.info("Batch %s cost: $%.4f ($%.4f input + $%.4f output)%s", batch_index,
+                     batch_cost['total_cost'], batch_cost['input_cost'], batch_cost['output_cost'], running_total)
             
-            # Show running total cost
-            if cost_tracker is not None:
-                print(f"Running total: ${cost_tracker['total_cost']:.4f} for {cost_tracker['api_calls']} API calls")
-            
-            translated_text = response.content[0].text
-            
-            if "```json" in translated_text:
-                json_content = translated_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in translated_text:
-                json_content = translated_text.split("```")[1].strip()
-            else:
-                json_content = translated_text.strip()
+            fence = _FENCE_RE.search(translated_text)
+            json_content = (fence.group(1) if fence else translated_text).strip()
             
             try:
-                batch_result = json.loads(json_content)
+                batch_result = _json_loads(json_content)
             except json.JSONDecodeError as e:
                 try:
                     batch_result = repair_json(json_content)
@@ -902,10 +1490,10 @@ Reply ONLY with the translated JSON. The JSON MUST be valid and parseable.
                     extracted_result = extract_json_blocks(json_content)
                     if extracted_result:
                         batch_result = extracted_result
-                        print(f"Extracted {len(batch_result)} items through JSON block extraction")
+                        log.debug("Extracted %d items through JSON block extraction", len(batch_result))
                     else:
                         if retry < max_retries:
-                            print(f"JSON parsing failed on attempt {retry+1}, retrying...")
+                            log.warning("JSON parsing failed for batch %s on attempt %d, retrying...", batch_index, retry+1)
                             time.sleep(3)
                             continue
                         else:
@@ -915,24 +1503,24 @@ Reply ONLY with the translated JSON. The JSON MUST be valid and parseable.
                 if isinstance(value, str):
                     batch_result[key] = clean_text(value)
             
-            print(f"Successfully processed batch {batch_index}")
+            log.debug("Successfully processed batch %s", batch_index)
             return batch_result
                 
         except Exception as e:
             if retry < max_retries:
-                print(f"Error in batch {batch_index} (attempt {retry+1}): {e}")
-                print(f"Retrying in 5 seconds...")
+                log.warning("Error in batch %s (attempt %d): %s; retrying in 5 seconds...", batch_index, retry+1, e)
                 time.sleep(5)
             else:
-                print(f"All {max_retries + 1} attempts failed for batch {batch_index}: {e}")
+                log.error("All %d attempts failed for batch %s: %s", max_retries + 1, batch_index, e)
                 raise e
 
-def translate_text(text_dict, slide_metadata, source_language, target_language, resume_file=None, api_key=None):
+def translate_text(text_dict, slide_metadata, source_language, target_language, resume_file=None, api_key=None, max_workers=DEFAULT_TRANSLATION_WORKERS):
     # Use provided API key or fall back to environment variable
     api_key = api_key or os.getenv("CLAUDE_API_KEY")
     if not api_key:
         raise ValueError("Claude API key must be provided either as an argument or via CLAUDE_API_KEY environment variable")
         
+    # One client (and connection pool) for every batch, retry and the final batch
     client = anthropic.Anthropic(
         api_key=api_key,
         default_headers={
@@ -950,27 +1538,29 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
         "api_calls": 0
     }
     
+    def is_untranslatable(text):
+        return _SKIP_RE.fullmatch(text.strip()) is not None
+    
     def deduplicate_content(input_dict):
-        content_to_keys = {}
+        # Untranslatable items are passed through unchanged instead of being sent to the API
+        passthrough = {}
+        content_to_keys = defaultdict(list)
         for key, value in input_dict.items():
-            if value in content_to_keys:
-                content_to_keys[value].append(key)
+            if is_untranslatable(value):
+                passthrough[key] = value
             else:
-                content_to_keys[value] = [key]
-        
-        unique_content = {}
-        duplicates_map = {}
+                content_to_keys[value].append(key)
         
-        for content, keys in content_to_keys.items():
-            representative_key = keys[0]
-            unique_content[representative_key] = content
-            for key in keys:
-                duplicates_map[key] = representative_key
+        # The first key with each text represents it
+        unique_content = {keys[0]: content for content, keys in content_to_keys.items()}
+        rep_to_originals = {keys[0]: keys for keys in content_to_keys.values()}
+        duplicates_map = {key: keys[0] for keys in content_to_keys.values() for key in keys}
         
-        print(f"Found {len(input_dict) - len(unique_content)} duplicate content items")
+        print(f"Skipping {len(passthrough)} items with nothing to translate (numbers, URLs, emails)")
+        print(f"Found {len(duplicates_map) - len(unique_content)} duplicate content items")
         print(f"Reduced from {len(input_dict)} to {len(unique_content)} unique content items to translate")
         
-        return unique_content, duplicates_map
+        return unique_content, duplicates_map, passthrough, rep_to_originals
     
     # Use a simple file ID based on timestamp if not provided
     file_id = os.path.basename(str(time.time()).replace('.', ''))
@@ -979,70 +1569,100 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
         file_id, text_dict, slide_metadata, source_language, target_language, resume_file
     )
     
+    # The slide context is the same for every batch, so it is serialized only once
+    structured_context = _json_compact(slide_metadata)
+    
     if not recovery_state["translated_items"]:
-        unique_text_dict, duplicates_map = deduplicate_content(text_dict)
+        unique_text_dict, duplicates_map, passthrough, rep_to_originals = deduplicate_content(text_dict)
         recovery_state["duplicates_map"] = duplicates_map
         save_recovery_state()
     else:
-        unique_text_dict = {k: text_dict[k] for k in text_dict.keys() 
-                          if k not in [rep_key for rep_key in recovery_state["duplicates_map"].values()]}
+        # Only the representative keys are sent for translation; their duplicates are filled in afterwards
         duplicates_map = recovery_state["duplicates_map"]
+        rep_to_originals = defaultdict(list)
+        for original_key, rep_key in duplicates_map.items():
+            rep_to_originals[rep_key].append(original_key)
+        passthrough = {k: v for k, v in text_dict.items() if is_untranslatable(v)}
+        unique_text_dict = {k: v for k, v in text_dict.items() if k in rep_to_originals and k not in passthrough}
         print(f"Resumed with {len(recovery_state['translated_items'])} already translated items")
     
     remaining_dict = {k: v for k, v in unique_text_dict.items() 
                      if k not in recovery_state["translated_items"]}
     
+    # For Japanese or other multibyte languages, use smaller batches and chunks
+    is_cjk = target_language in _CJK_LANGS
+    max_tokens, retry_divisor, final_chunk_size = _BATCH_PARAMS[is_cjk]
+    
     if not remaining_dict:
         print("All items have already been translated. Nothing to do.")
-        full_translated_dict = recovery_state["translated_items"].copy()
+        unique_translated_dict = recovery_state["translated_items"].copy()
     else:
-        # For Japanese or other multibyte languages, use smaller batches
-        max_tokens = 50000 if target_language in ["ja", "zh", "ko"] else 100000
         prompt_tokens = 2000
         
-        print(f"Using smaller batch size for {target_language} translation" if target_language in ["ja", "zh", "ko"] else "Using standard batch size")
+        print(f"Using smaller batch size for {target_language} translation" if is_cjk else "Using standard batch size")
         batches = split_dict_into_smart_batches(remaining_dict, max_input_tokens=max_tokens, prompt_tokens=prompt_tokens)
         print(f"Splitting translation into {len(batches)} batches")
         
+        # A resumed run splits only the remaining items, so its batches are numbered after
+        # those of earlier runs; reusing batch_1.. would wrongly match their completed ids
+        batch_offset = recovery_state.get("batch_count", 0)
+        recovery_state["batch_count"] = batch_offset + len(batches)
+        save_recovery_state()
+        # Membership is checked once per batch, so use a set rather than the stored list
+        completed_batches = set(recovery_state["completed_batches"])
+        
         unique_translated_dict = recovery_state["translated_items"].copy()
         
-        with tqdm(total=len(batches), desc="Translating", unit="batch") as pbar:
-            for batch_index, batch in enumerate(batches):
-                batch_id = f"batch_{batch_index+1}"
-                if batch_id in recovery_state["completed_batches"]:
-                    print(f"Skipping already completed batch {batch_id}")
-                    pbar.update(1)
-                    continue
-                
-                print(f"\nProcessing batch {batch_index+1} of {len(batches)} with {len(batch)} items...")
-                
-                try:
-                    batch_result = translate_batch(
-                        batch, batch_index+1, slide_metadata, 
+        try:
+            # Batches spend nearly all their time waiting on the API, so several are sent
+            # at once; results and recovery state are only touched from this thread
+            # Redraws are throttled by tqdm itself (at most every 0.5s)
+            with tqdm(total=len(batches), desc="Translating", unit="batch", mininterval=0.5, smoothing=0.1) as pbar, \
+                    ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+                futures = {}
+                for batch_index, batch in enumerate(batches):
+                    batch_id = f"batch_{batch_offset+batch_index+1}"
+                    if batch_id in completed_batches:
+                        log.debug("Skipping already completed batch %s", batch_id)
+                        pbar.update(1)
+                        continue
+                    
+                    log.debug("Processing batch %d of %d with %d items...", batch_index+1, len(batches), len(batch))
+                    future = executor.submit(
+                        translate_batch,
+                        batch, batch_index+1, structured_context, 
                         source_language, target_language, api_key=api_key, 
-                        cost_tracker=cost_tracker
+                        cost_tracker=cost_tracker, client=client
                     )
-                    
-                    unique_translated_dict.update(batch_result)
-                    recovery_state["translated_items"].update(batch_result)
-                    recovery_state["completed_batches"].append(batch_id)
-                    save_recovery_state()
-                    
-                except Exception as e:
-                    print(f"Error in batch {batch_index+1}: {e}")
-                    recovery_state["failed_batches"].append({
-                        "batch_id": batch_id,
-                        "keys": list(batch.keys()),
-                        "error": str(e)
-                    })
-                    save_recovery_state()
-                    print("Continuing with next batch...")
+                    futures[future] = (batch_index, batch_id, batch)
                 
-                pbar.update(1)
-                completion_percentage = int(100 * (batch_index + 1) / len(batches))
-                pbar.set_description(f"Translating: {completion_percentage}% complete")
-                # Force refresh the progress bar display
-                pbar.refresh()
+                for future in as_completed(futures):
+                    batch_index, batch_id, batch = futures[future]
+                    try:
+                        batch_result = future.result()
+                        
+                        unique_translated_dict.update(batch_result)
+                        recovery_state["translated_items"].update(batch_result)
+                        recovery_state["completed_batches"].append(batch_id)
+                        completed_batches.add(batch_id)
+                        save_recovery_state()
+                        
+                    except Exception as e:
+                        log.error("Error in batch %d: %s", batch_index+1, e)
+                        recovery_state["failed_batches"].append({
+                            "batch_id": batch_id,
+                            "keys": list(batch.keys()),
+                            "error": str(e)
+                        })
+                        save_recovery_state()
+                        log.info("Continuing with next batch...")
+                    
+                    completion_percentage = int(100 * (pbar.n + 1) / len(batches))
+                    pbar.set_description(f"Translating: {completion_percentage}% complete", refresh=False)
+                    pbar.update(1)
+        finally:
+            # Whatever finished is on disk before retries start (or an error propagates)
+            save_recovery_state(force=True)
         
         print(f"\nTranslation of unique content completed with {len(unique_translated_dict)} items out of {len(unique_text_dict)} unique items")
         
@@ -1055,7 +1675,7 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
                 
                 retry_batch = {k: text_dict[k] for k in keys if k in text_dict}
                 # Use even smaller chunks for Japanese
-                chunk_size = max(3, len(retry_batch) // 20 if target_language in ["ja", "zh", "ko"] else len(retry_batch) // 10)
+                chunk_size = max(3, len(retry_batch) // retry_divisor)
                 retry_items = list(retry_batch.items())
                 sub_batches = [dict(retry_items[i:i+chunk_size]) 
                                for i in range(0, len(retry_items), chunk_size)]
@@ -1064,17 +1684,21 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
                 
                 for i, sub_batch in enumerate(sub_batches):
                     sub_id = f"{batch_id}_sub_{i+1}"
+                    if sub_id in completed_batches:
+                        print(f"Skipping already completed sub-batch {sub_id}")
+                        continue
                     
                     try:
                         print(f"Processing sub-batch {i+1}/{len(sub_batches)} for failed batch {batch_id}")
                         sub_result = translate_batch(
-                            sub_batch, f"{batch_id}.{i+1}", slide_metadata, 
+                            sub_batch, f"{batch_id}.{i+1}", structured_context, 
                             source_language, target_language, api_key=api_key, 
-                            max_retries=3, cost_tracker=cost_tracker
+                            max_retries=3, cost_tracker=cost_tracker, client=client
                         )
                         unique_translated_dict.update(sub_result)
                         recovery_state["translated_items"].update(sub_result)
                         recovery_state["completed_batches"].append(sub_id)
+                        completed_batches.add(sub_id)
                         save_recovery_state()
                         
                     except Exception as e:
@@ -1083,14 +1707,14 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
                 
                 recovery_state["failed_batches"].remove(failed_batch)
                 save_recovery_state()
-        
-        full_translated_dict = {}
-        for key, value in unique_translated_dict.items():
-            full_translated_dict[key] = value
-        
-        for original_key, rep_key in duplicates_map.items():
-            if rep_key in unique_translated_dict and original_key != rep_key:
-                full_translated_dict[original_key] = unique_translated_dict[rep_key]
+    
+    # Fan each representative's translation out to all keys sharing its text in one bulk update
+    full_translated_dict = {}
+    for rep_key, original_keys in rep_to_originals.items():
+        translation = unique_translated_dict.get(rep_key)
+        if translation is not None:
+            full_translated_dict.update(dict.fromkeys(original_keys, translation))
+    full_translated_dict.update(passthrough)
     
     print(f"Reconstructed full translation dictionary with {len(full_translated_dict)} items")
     
@@ -1101,8 +1725,7 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
             print(f"Attempting to translate {len(missing_keys)} missing keys in a final batch...")
             missing_dict = {k: text_dict[k] for k in missing_keys if k in text_dict}
             
-            # Process final batch in smaller chunks for CJK languages
-            final_chunk_size = 50 if target_language in ["ja", "zh", "ko"] else 100
+            # Process final batch in smaller chunks for CJK languages (final_chunk_size)
             missing_items = list(missing_dict.items())
             
             # Break final batch into smaller manageable chunks
@@ -1121,9 +1744,9 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
                         
                         # Use the translate_batch function for consistent handling
                         chunk_result = translate_batch(
-                            chunk_dict, f"final_{chunk_idx+1}", slide_metadata,
+                            chunk_dict, f"final_{chunk_idx+1}", structured_context,
                             source_language, target_language, api_key=api_key,
-                            max_retries=3, cost_tracker=cost_tracker
+                            max_retries=3, cost_tracker=cost_tracker, client=client
                         )
                         
                         full_translated_dict.update(chunk_result)
@@ -1137,9 +1760,9 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
                 try:
                     # Use the translate_batch function for consistency
                     final_batch = translate_batch(
-                        missing_dict, "final", slide_metadata,
+                        missing_dict, "final", structured_context,
                         source_language, target_language, api_key=api_key,
-                        max_retries=3, cost_tracker=cost_tracker
+                        max_retries=3, cost_tracker=cost_tracker, client=client
                     )
                     
                     full_translated_dict.update(final_batch)
@@ -1152,6 +1775,8 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
             missing_keys = set(text_dict.keys()) - set(full_translated_dict.keys())
             if missing_keys:
                 print(f"Final warning: {len(missing_keys)} keys still not translated: {list(missing_keys)[:5]}...")
+                # Keep the source text rather than dropping these elements from the output
+                full_translated_dict.update({k: text_dict[k] for k in missing_keys})
             else:
                 print("All items successfully translated!")
     else:
@@ -1167,52 +1792,82 @@ def translate_text(text_dict, slide_metadata, source_language, target_language,
     print(f"Output cost: ${cost_tracker['total_output_cost']:.4f}")
     print(f"Total cost: ${cost_tracker['total_cost']:.4f}")
     
+    save_recovery_state(final=True)
+    
     return full_translated_dict
     
-def list_recovery_files():
-    """List all available recovery files and their status"""
+def list_recovery_files(max_age_days=None):
+    """
+    List all available recovery files and their status, newest first.
+    Files last modified more than max_age_days ago are skipped.
+    """
     recovery_dir = "translation_recovery"
     if not os.path.exists(recovery_dir):
         print("No recovery directory found.")
         return
     
-    recovery_files = [f for f in os.listdir(recovery_dir) if f.endswith(".json")]
+    with os.scandir(recovery_dir) as it:
+        entries = [(entry, entry.stat().st_mtime) for entry in it if entry.name.endswith((".json", ".json.summary"))]
+    summaries = {entry.name for entry, _ in entries if entry.name.endswith(".summary")}
+    recovery_files = [(entry, mtime) for entry, mtime in entries if entry.name.endswith(".json")]
+    if max_age_days is not None:
+        cutoff = time.time() - max_age_days * 86400
+        recovery_files = [(entry, mtime) for entry, mtime in recovery_files if mtime >= cutoff]
+    recovery_files.sort(key=lambda item: item[1], reverse=True)
     
     if not recovery_files:
         print("No recovery files found.")
         return
     
     print(f"Found {len(recovery_files)} recovery files:")
-    for f in recovery_files:
-        file_path = os.path.join(recovery_dir, f)
+    for entry, _ in recovery_files:
+        f = entry.name
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                total = data.get("total_items", 0)
-                translated = len(data.get("translated_items", {}))
-                failed = len(data.get("failed_batches", []))
-                progress = (translated / total * 100) if total > 0 else 0
-                
-                print(f"  {f}")
-                print(f"    Progress: {progress:.1f}% ({translated}/{total} items)")
-                print(f"    Failed batches: {failed}")
-                print(f"    Start time: {data.get('start_time', 'unknown')}")
-                print(f"    Last updated: {data.get('last_updated', 'unknown')}")
-                print()
+            summary = None
+            if f"{f}.summary" in summaries:
+                try:
+                    with open(f"{entry.path}.summary", 'rb') as file:
+                        summary = _json_loads(file.read())
+                except (OSError, ValueError):
+                    summary = None  # Unreadable sidecar: fall back to the full state
+            if summary is None:
+                with open(entry.path, 'rb') as file:
+                    data = _json_loads(file.read())
+                summary = {
+                    "total_items": data.get("total_items", 0),
+                    "translated": len(data.get("translated_items", {})),
+                    "failed": len(data.get("failed_batches", [])),
+                    "start_time": data.get("start_time", "unknown"),
+                    "last_updated": data.get("last_updated", "unknown")
+                }
+            total = summary["total_items"]
+            translated = summary["translated"]
+            failed = summary["failed"]
+            progress = (translated / total * 100) if total > 0 else 0
+            
+            print(f"  {f}")
+            print(f"    Progress: {progress:.1f}% ({translated}/{total} items)")
+            print(f"    Failed batches: {failed}")
+            print(f"    Start time: {summary['start_time']}")
+            print(f"    Last updated: {summary['last_updated']}")
+            print()
         except Exception as e:
             print(f"  {f} - Error reading file: {e}")
 
-def translate_pptx(input_file, output_file, source_language="en", target_language="fr", resume_file=None, api_key=None):
+def translate_pptx(input_file, output_file, source_language="en", target_language="fr", resume_file=None, api_key=None, max_workers=DEFAULT_TRANSLATION_WORKERS):
     """Main function to translate PowerPoint files with ultimate text extraction"""
+    # Load the deck once; extraction only reads it, so update_slides can write into the same object
+    prs = Presentation(input_file)
+    
     print(f"Extracting text from {input_file} with ultimate extraction...")
-    text_dict, slide_metadata = extract_text(input_file)
+    text_dict, slide_metadata = extract_text(input_file, prs=prs)
     print(f"Found {len(text_dict)} text elements across {len(slide_metadata)} slides")
     
     print(f"Translating from {source_language} to {target_language}...")
-    translated_texts = translate_text(text_dict, slide_metadata, source_language, target_language, resume_file, api_key=api_key)
+    translated_texts = translate_text(text_dict, slide_metadata, source_language, target_language, resume_file, api_key=api_key, max_workers=max_workers)
     
     print(f"Updating PowerPoint with translated text while preserving formatting...")
-    update_slides(input_file, output_file, translated_texts)
+    update_slides(input_file, output_file, translated_texts, prs=prs)
     
     print(f"Translation completed!")
     print(f"Translated presentation saved as: {output_file}")
@@ -1228,9 +1883,19 @@ if __name__ == "__main__":
     parser.add_argument("--source-language", help="Source language code (e.g., en)")
     parser.add_argument("--target-language", help="Target language code (e.g., ja)")
     parser.add_argument("--api-key", help="Claude API Key (can also be set as CLAUDE_API_KEY environment variable)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_TRANSLATION_WORKERS,
+                        help=f"Number of batches translated concurrently (default: {DEFAULT_TRANSLATION_WORKERS}, or TRANSLATE_CONCURRENCY)")
+    
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only log problems, not per-batch progress")
     
     args = parser.parse_args()
     
+    log_handler = _TqdmLogHandler()
+    log_handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    logging.basicConfig(handlers=[log_handler])
+    if args.quiet:
+        log.setLevel(logging.WARNING)
+    
     if args.list_recovery:
         list_recovery_files()
         sys.exit(0)
@@ -1265,4 +1930,4 @@ if __name__ == "__main__":
         target_language = input("Enter target language (e.g., fr for French): ")
     
     # Run the translation with all the provided parameters
-    translate_pptx(input_file, output_file, source_language, target_language, args.resume, api_key=args.api_key)
\ No newline at end of file
+    translate_pptx(input_file, output_file, source_language, target_language, args.resume, api_key=args.api_key, max_workers=args.workers)
\ No newline at end of file
@@ -5,6 +5,10 @@ Launcher script that allows running either the CLI version or Web UI
 import sys
 import os
 import argparse
+import runpy
+
+# Scripts launched from here live next to this file
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 def main():
     parser = argparse.ArgumentParser(description="Google Slides Translator")
@@ -12,18 +16,19 @@ def main():
     parser.add_argument("--port", type=int, default=5000, help="Port for web UI (default: 5000)")
     parser.add_argument("--host", default="127.0.0.1", help="Host for web UI (default: 127.0.0.1)")
     
-    args = parser.parse_args()
+    # Anything not understood here is passed on to the CLI script
+    args, cli_args = parser.parse_known_args()
     
     if args.web:
         print(f"Starting Web UI on http://{args.host}:{args.port}")
-        # Import the web UI module
-        from web_ui import app
+        # web-ui.py isn't an importable module name, so load it by path (its main block doesn't run)
+        app = runpy.run_path(os.path.join(SCRIPT_DIR, "web-ui.py"))["app"]
         app.run(host=args.host, port=args.port, debug=False)
     else:
-        # Import and run the CLI script
-        import app10
-        if __name__ == "__main__":
-            # The script will execute from its main block
+        # Run the CLI script's main block in this interpreter, with the remaining arguments
+        sys.path.insert(0, SCRIPT_DIR)
+        sys.argv = [os.path.join(SCRIPT_DIR, "app13.py")] + cli_args
+        runpy.run_module("app13", run_name="__main__")
 
 if __name__ == "__main__":
     main()
@@ -1,204 +1,345 @@
 import os
 import json
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+import time
+import uuid
+import hashlib
+import gzip
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, session, abort
 import threading
-import logging
+import contextvars
+from queue import Queue, Empty, Full
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from collections import deque
 import sys
 import io
 from contextlib import redirect_stdout
+from jinja2 import FileSystemBytecodeCache
+
+# Flask-Compress is optional; without it responses are gzipped by compress_response below
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+# redis is optional; it is only used when REDIS_URL is set (see "Job state in Redis" below)
+try:
+    import redis
+except ImportError:
+    redis = None
 
 # Import the main script functionality
 # Change this to match your actual script filename (without the .py extension)
 import app13 as translator_script
 
-app = Flask(__name__)
-app.secret_key = os.urandom(24)  # For flash messages and session
-
-# Ensure templates directory exists
-os.makedirs('templates', exist_ok=True)
-
-# Create templates/index.html
-with open('templates/index.html', 'w') as f:
-    f.write("""
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Google Slides Translator</title>
-    <meta name="viewport" content="width=device-width, initial-scale=1">
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        body { padding-top: 2rem; }
-        .progress { height: 25px; }
-        #consoleOutput {
-            background-color: #f8f9fa;
-            font-family: monospace;
-            padding: 1rem;
-            max-height: 400px;
-            overflow-y: auto;
-            white-space: pre-wrap;
-            font-size: 0.85rem;
-        }
-        .alert-fixed {
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 100%;
-            z-index: 9999;
-            border-radius: 0;
+# The root path is given explicitly because this file is also loaded by path (see wsgi.py),
+# where Flask can't work it out from the module name and would fall back to the working directory
+app = Flask(__name__, root_path=os.path.dirname(os.path.abspath(__file__)))
+# Signs the session cookie (job id and flash messages). A random key only works within
+# one process, so setups with several workers (REDIS_URL, see below) must set FLASK_SECRET_KEY
+app.secret_key = os.getenv("FLASK_SECRET_KEY")
+if not app.secret_key:
+    if os.getenv("REDIS_URL"):
+        raise RuntimeError("FLASK_SECRET_KEY must be set when REDIS_URL is, so every worker signs sessions with the same key")
+    app.secret_key = os.urandom(24)
+# The form is a handful of short fields; anything bigger is refused with a 413 before parsing
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024
+
+# The page lives in templates/index.html; its compiled bytecode is cached on disk so
+# each worker process and restart loads it instead of recompiling the template
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+
+# Bootstrap is served from static/vendor/bootstrap/ when its files have been downloaded
+# there (see the readme), otherwise from the CDN
+BOOTSTRAP_LOCAL = os.path.exists(os.path.join(app.static_folder, 'vendor', 'bootstrap', 'bootstrap.min.css'))
+
+@app.context_processor
+def inject_assets():
+    return {'bootstrap_local': BOOTSTRAP_LOCAL}
+
+# The page template is loaded and compiled once here; rendering the Template object
+# skips the loader lookup and up-to-date check on every request
+INDEX_TEMPLATE = app.jinja_env.get_template('index.html')
+
+# Without a job to show (and no flash messages) the page is always the same form, so it
+# is rendered once here and served as bytes with an ETag that lets browsers revalidate
+with app.test_request_context('/'):
+    STATIC_INDEX = render_template(INDEX_TEMPLATE, state=None).encode('utf-8')
+STATIC_INDEX_ETAG = hashlib.sha1(STATIC_INDEX).hexdigest()[:16]
+
+@app.after_request
+def add_cache_headers(response):
+    # Vendored assets never change under the same path, so browsers can keep them for a year
+    if request.path.startswith('/static/vendor/'):
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+# Progress payloads carry the console output, whose lines repeat a lot and compress well
+COMPRESS_MIMETYPES = ['application/json', 'text/html', 'text/css', 'application/javascript']
+COMPRESS_LEVEL = 6
+COMPRESS_MIN_SIZE = 512
+
+if Compress is not None:
+    app.config['COMPRESS_MIMETYPES'] = COMPRESS_MIMETYPES
+    app.config['COMPRESS_LEVEL'] = COMPRESS_LEVEL
+    app.config['COMPRESS_MIN_SIZE'] = COMPRESS_MIN_SIZE
+    Compress(app)
+else:
+    @app.after_request
+    def compress_response(response):
+        # Streams (the SSE progress stream, files) are left alone, as are bodies too small to gain
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code != 200
+                or response.mimetype not in COMPRESS_MIMETYPES
+                or 'Content-Encoding' in response.headers
+                or 'gzip' not in request.headers.get('Accept-Encoding', '')):
+            return response
+        body = response.get_data()
+        if len(body) < COMPRESS_MIN_SIZE:
+            return response
+        response.set_data(gzip.compress(body, compresslevel=COMPRESS_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+        return response
+
+# Console lines kept for the page; older output is dropped so payloads stay bounded
+CONSOLE_MAX_LINES = 500
+
+# Finished jobs are dropped this long after they end
+JOB_RETENTION_MINUTES = int(os.getenv("WEB_JOB_RETENTION_MINUTES", "30"))
+
+# Every submitted translation, keyed by job id. Each job is independent, so several
+# users can translate at once.
+JOBS = {}
+
+# Held for every change to a job (or to JOBS) and for every read, so readers always see
+# a consistent snapshot (e.g. never running=False together with a stale progress)
+JOBS_LOCK = threading.RLock()
+
+def new_job():
+    return {
+        'running': True,
+        'progress': 0,
+        'console_lines': deque(maxlen=CONSOLE_MAX_LINES),
+        'result_url': None,
+        'finished_at': None,
+        # Bumped on every state change. /progress serializes the state once per version
+        # and serves that body to every poller until the state changes again.
+        'version': 0,
+        'cache': (None, None),  # (version, JSON body)
+        # One queue per open progress stream; state changes are pushed to each
+        'subscribers': [],
+        # When the streams were last pushed to, and the timer for a push held back since
+        'last_push': 0.0,
+        'push_timer': None
+    }
+
+def public_state(job_id):
+    """JSON-ready snapshot of a job, with the console lines joined into one string"""
+    with JOBS_LOCK:
+        job = JOBS[job_id]
+        return {
+            'job_id': job_id,
+            'running': job['running'],
+            'progress': job['progress'],
+            'console_output': '\n'.join(job['console_lines']),
+            'result_url': job['result_url']
         }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1 class="mb-4">Google Slides Translator</h1>
-        
-        {% with messages = get_flashed_messages(with_categories=true) %}
-            {% if messages %}
-                {% for category, message in messages %}
-                    <div class="alert alert-{{ category }} alert-dismissible fade show" role="alert">
-                        {{ message }}
-                        <button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button>
-                    </div>
-                {% endfor %}
-            {% endif %}
-        {% endwith %}
-        
-        <div class="card mb-4">
-            <div class="card-header">
-                <h5>Translation Settings</h5>
-            </div>
-            <div class="card-body">
-                <form method="post" action="/translate">
-                    <div class="mb-3">
-                        <label for="presentation_id" class="form-label">Google Slides Presentation ID</label>
-                        <input type="text" class="form-control" id="presentation_id" name="presentation_id" required 
-                               placeholder="e.g., 1rppKpwoUKmf65wAg7J9gSVpL279IBX4EmbWM7yGiS6s">
-                        <div class="form-text">Find this in your Google Slides URL: https://docs.google.com/presentation/d/[PRESENTATION_ID]/edit</div>
-                    </div>
-                    <div class="row">
-                        <div class="col-md-6">
-                            <div class="mb-3">
-                                <label for="source_language" class="form-label">Source Language</label>
-                                <select class="form-select" id="source_language" name="source_language" required>
-                                    <option value="en" selected>English</option>
-                                    <option value="fr">French</option>
-                                    <option value="es">Spanish</option>
-                                    <option value="de">German</option>
-                                    <option value="it">Italian</option>
-                                    <option value="ja">Japanese</option>
-                                    <option value="ko">Korean</option>
-                                    <option value="zh">Chinese</option>
-                                    <option value="ru">Russian</option>
-                                    <option value="pt">Portuguese</option>
-                                </select>
-                            </div>
-                        </div>
-                        <div class="col-md-6">
-                            <div class="mb-3">
-                                <label for="target_language" class="form-label">Target Language</label>
-                                <select class="form-select" id="target_language" name="target_language" required>
-                                    <option value="en">English</option>
-                                    <option value="fr">French</option>
-                                    <option value="es">Spanish</option>
-                                    <option value="de">German</option>
-                                    <option value="it">Italian</option>
-                                    <option value="ja" selected>Japanese</option>
-                                    <option value="ko">Korean</option>
-                                    <option value="zh">Chinese</option>
-                                    <option value="ru">Russian</option>
-                                    <option value="pt">Portuguese</option>
-                                </select>
-                            </div>
-                        </div>
-                    </div>
-                    <div class="mb-3">
-                        <label for="api_key" class="form-label">Anthropic API Key (optional)</label>
-                        <input type="password" class="form-control" id="api_key" name="api_key" 
-                               placeholder="If not provided, will use CLAUDE_API_KEY from environment">
-                    </div>
-                    <button type="submit" class="btn btn-primary">Start Translation</button>
-                </form>
-            </div>
-        </div>
-        
-        {% if session.get('translation_running') %}
-        <div class="card mb-4">
-            <div class="card-header">
-                <h5>Translation Progress</h5>
-            </div>
-            <div class="card-body">
-                <div class="mb-3">
-                    <label class="form-label">Progress:</label>
-                    <div class="progress">
-                        <div id="progressBar" class="progress-bar" role="progressbar" style="width: {{ session.get('progress', 0) }}%;" 
-                             aria-valuenow="{{ session.get('progress', 0) }}" aria-valuemin="0" aria-valuemax="100">
-                            {{ session.get('progress', 0) }}%
-                        </div>
-                    </div>
-                </div>
-                <div class="mb-3">
-                    <label class="form-label">Console Output:</label>
-                    <div id="consoleOutput" class="border rounded">{{ session.get('console_output', '') }}</div>
-                </div>
-                {% if session.get('result_url') %}
-                <div class="mb-3">
-                    <a href="{{ session.get('result_url') }}" target="_blank" class="btn btn-success">
-                        Open Translated Presentation
-                    </a>
-                </div>
-                {% endif %}
-            </div>
-        </div>
-        {% endif %}
-    </div>
+
+# Translations run on this pool rather than on ad-hoc daemon threads: the route returns
+# right away, and a running translation is finished (not killed) when the server shuts down.
+# Jobs mostly wait on the Google and Anthropic APIs, so several can share the process.
+translation_executor = ThreadPoolExecutor(max_workers=int(os.getenv("WEB_TRANSLATION_WORKERS", "4")),
+                                          thread_name_prefix="translation")
+
+# Distinguishes this process's versions in ETags, since the counters restart with the server
+PROCESS_TAG = os.urandom(4).hex()
+
+# Progress streams are pushed to at most this often per job; changes in between (one per
+# tqdm update or printed line) are folded into the next push
+BROADCAST_MIN_INTERVAL = 0.1
+# States waiting for a slow stream client; past this the oldest are dropped
+SUBSCRIBER_QUEUE_SIZE = 16
+
+def broadcast_progress(job_id, force=False):
+    """Record a change to a job and push its state to every stream following it.
+    Pushes are coalesced to one per BROADCAST_MIN_INTERVAL unless force is set; a held-back
+    change is pushed by a timer, so the latest state always goes out."""
+    with JOBS_LOCK:
+        job = JOBS[job_id]
+        job['version'] += 1
+        wait = job['last_push'] + BROADCAST_MIN_INTERVAL - time.monotonic()
+        if not force and wait > 0:
+            if job['push_timer'] is None:
+                job['push_timer'] = threading.Timer(wait, push_progress, (job_id,))
+                job['push_timer'].daemon = True
+                job['push_timer'].start()
+            return
+    push_progress(job_id)
+
+def push_progress(job_id):
+    with JOBS_LOCK:
+        job = JOBS.get(job_id)
+        if job is None:
+            return
+        if job['push_timer'] is not None:
+            job['push_timer'].cancel()
+            job['push_timer'] = None
+        job['last_push'] = time.monotonic()
+        state = public_state(job_id)
+        subscribers = list(job['subscribers'])
+    if redis_client is not None:
+        redis_writer.submit(store_job_state, state)
+    for queue in subscribers:
+        try:
+            queue.put_nowait(state)
+        except Full:
+            # Every state is a full snapshot, so a lagging client only needs the newest:
+            # drop its oldest pending one to make room
+            try:
+                queue.get_nowait()
+                queue.put_nowait(state)
+            except (Empty, Full):
+                pass
+
+# Job state in Redis: with REDIS_URL set, every pushed state is also written to the hash
+# job:<id> and published on the channel of the same name. Jobs still run in the process
+# that accepted them, but any process (e.g. another gunicorn worker, or this one after a
+# restart) can then serve their page, /progress and progress stream.
+REDIS_URL = os.getenv("REDIS_URL")
+redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True) if redis is not None and REDIS_URL else None
+# Writes go through one thread, in order, so network round trips never happen under JOBS_LOCK
+redis_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="redis-writer")
+
+def store_job_state(state):
+    key = f"job:{state['job_id']}"
+    try:
+        pipe = redis_client.pipeline()
+        pipe.hset(key, mapping={
+            'running': int(state['running']),
+            'progress': state['progress'],
+            'console_output': state['console_output'],
+            'result_url': state['result_url'] or ''
+        })
+        # Same lifetime as finished jobs in memory, counted from the last update
+        pipe.expire(key, JOB_RETENTION_MINUTES * 60)
+        pipe.publish(key, json.dumps(state))
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Could not store state of job {state['job_id']} in Redis: {e}")
+
+def load_job_state(job_id):
+    """State of a job run by another process, from Redis; None if unknown"""
+    if redis_client is None or not job_id:
+        return None
+    try:
+        fields = redis_client.hgetall(f"job:{job_id}")
+    except redis.RedisError as e:
+        print(f"Could not read state of job {job_id} from Redis: {e}")
+        return None
+    if not fields:
+        return None
+    return {
+        'job_id': job_id,
+        'running': fields['running'] == '1',
+        'progress': int(fields['progress']),
+        'console_output': fields['console_output'],
+        'result_url': fields['result_url'] or None
+    }
+
+def reap_jobs():
+    """Background loop dropping finished jobs once they are older than JOB_RETENTION_MINUTES"""
+    while True:
+        time.sleep(60)
+        cutoff = time.time() - JOB_RETENTION_MINUTES * 60
+        with JOBS_LOCK:
+            for job_id in [jid for jid, job in JOBS.items()
+                           if job['finished_at'] and job['finished_at'] < cutoff]:
+                del JOBS[job_id]
+
+# The reaper is started by the first submission in each process rather than at import:
+# threads don't survive a fork, so one started while gunicorn preloads the app in the
+# master would be missing from every worker
+reaper_pid = [None]
+
+def ensure_reaper():
+    with JOBS_LOCK:
+        if reaper_pid[0] != os.getpid():
+            reaper_pid[0] = os.getpid()
+            threading.Thread(target=reap_jobs, name="job-reaper", daemon=True).start()
+
+# The job being run and its output sink, so the stdout capture and the tqdm replacement
+# below report to the right job. Context variables rather than thread-locals, because the
+# translator hands its batches to a thread pool in a copy of the calling context.
+current_job = contextvars.ContextVar('current_job', default=None)
+current_sink = contextvars.ContextVar('current_sink', default=None)
+
+class LineSink(io.TextIOBase):
+    """Text stream that appends each completed line to a job's console as it is written"""
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.partial = ''
     
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
-    {% if session.get('translation_running') %}
-    <script>
-        // Auto-refresh to update progress
-        setTimeout(function() {
-            window.location.reload();
-        }, 5000);  // Refresh every 5 seconds
-    </script>
-    {% endif %}
-</body>
-</html>
-    """)
-
-# Global variables to track translation process
-translation_state = {
-    'running': False,
-    'progress': 0,
-    'console_output': '',
-    'result_url': None
-}
+    def writable(self):
+        return True
+    
+    def write(self, text):
+        # Batch threads of the same job write here too, so the partial line is guarded as well
+        with JOBS_LOCK:
+            self.partial += text
+            if '\n' in self.partial:
+                *lines, self.partial = self.partial.split('\n')
+                self.add_lines(lines)
+        return len(text)
+    
+    def add_lines(self, lines):
+        with JOBS_LOCK:
+            JOBS[self.job_id]['console_lines'].extend(lines)
+            broadcast_progress(self.job_id)
+    
+    def close(self):
+        # Keep a last line that never got its newline
+        with JOBS_LOCK:
+            if self.partial:
+                self.add_lines([self.partial])
+                self.partial = ''
+        super().close()
 
-# Custom stream handler to capture console output
-class StringIOHandler(logging.StreamHandler):
-    def __init__(self):
-        self.string_io = io.StringIO()
-        super().__init__(self.string_io)
+# sys.stdout is shared by every thread, so it is replaced once by a proxy that sends each
+# translation's prints (from its own thread and its batch threads) to that job's buffer and
+# everything else to the console
+class ThreadStdout:
+    def __init__(self, console):
+        self.console = console
+    
+    def _target(self):
+        sink = current_sink.get()
+        return self.console if sink is None else sink
     
-    def get_output(self):
-        self.flush()
-        return self.string_io.getvalue()
+    def write(self, text):
+        return self._target().write(text)
+    
+    def flush(self):
+        self._target().flush()
+    
+    def __getattr__(self, name):
+        return getattr(self.console, name)
 
-# Create a custom stdout capture
+sys.stdout = ThreadStdout(sys.stdout)
+
+# Create a custom stdout capture; output reaches the job's console line by line while
+# the translation runs
 class CaptureStdout:
-    def __init__(self):
-        self.buffer = io.StringIO()
+    def __init__(self, job_id):
+        self.sink = LineSink(job_id)
     
     def __enter__(self):
-        self.old_stdout = sys.stdout
-        sys.stdout = self.buffer
+        self.token = current_sink.set(self.sink)
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        sys.stdout = self.old_stdout
-    
-    def get_output(self):
-        return self.buffer.getvalue()
+        current_sink.reset(self.token)
+        self.sink.close()
 
 # Modify the tqdm class to update progress in our state
 class WebUITqdm:
@@ -207,10 +348,21 @@ class WebUITqdm:
         self.n = 0
         self.description = kwargs.get('desc', '')
     
+    # The translator uses tqdm as a context manager
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
     def update(self, n):
-        self.n += n
-        if self.total > 0:
-            translation_state['progress'] = int(100 * self.n / self.total)
+        job_id = current_job.get()
+        # Under the lock, since updates may come from several threads at once
+        with JOBS_LOCK:
+            self.n += n
+            if self.total > 0 and job_id:
+                JOBS[job_id]['progress'] = int(100 * self.n / self.total)
+                broadcast_progress(job_id)
     
     def set_description(self, desc):
         self.description = desc
@@ -218,39 +370,32 @@ class WebUITqdm:
     def close(self):
         pass
 
+# Replace tqdm with our custom implementation. Done once for the whole process, since
+# swapping the module attribute per run would race between concurrent jobs.
+translator_script.tqdm = WebUITqdm
+
 # Modified translate function that updates progress
-def translate_with_progress(presentation_id, source_language, target_language, api_key=None):
-    global translation_state
-    
-    # Reset state
-    translation_state['running'] = True
-    translation_state['progress'] = 0
-    translation_state['console_output'] = 'Starting translation...\n'
-    translation_state['result_url'] = None
-    
-    # Set API key if provided
-    if api_key:
-        os.environ["CLAUDE_API_KEY"] = api_key
+def translate_with_progress(job_id, presentation_id, source_language, target_language, api_key=None):
+    with JOBS_LOCK:
+        JOBS[job_id]['console_lines'].append('Starting translation...')
+        broadcast_progress(job_id)
     
+    job_token = current_job.set(job_id)
     # Capture stdout
-    with CaptureStdout() as capture:
+    with CaptureStdout(job_id):
         try:
-            # Replace tqdm with our custom implementation
-            original_tqdm = translator_script.tqdm
-            translator_script.tqdm = WebUITqdm
-            
-            # Run the translation process
+            # Run the translation process. The API key goes to the translator directly
+            # rather than through os.environ, which every job shares.
             slides_service, drive_service = translator_script.authenticate_google()
             extracted_text, slide_metadata = translator_script.extract_text(slides_service, presentation_id)
-            translated_texts = translator_script.translate_text(extracted_text, slide_metadata, source_language, target_language)
+            translated_texts = translator_script.translate_text(extracted_text, slide_metadata, source_language, target_language,
+                                                               api_key=api_key or None)
             new_presentation_id = translator_script.update_slides(slides_service, drive_service, presentation_id, translated_texts, target_language)
             
             # Create the presentation URL
             presentation_url = f"https://docs.google.com/presentation/d/{new_presentation_id}/edit"
-            translation_state['result_url'] = presentation_url
-            
-            # Restore original tqdm
-            translator_script.tqdm = original_tqdm
+            with JOBS_LOCK:
+                JOBS[job_id]['result_url'] = presentation_url
             
             return True, presentation_url
             
@@ -259,55 +404,165 @@ def translate_with_progress(presentation_id, source_language, target_language, a
             print(error_msg)
             return False, error_msg
         finally:
-            # Update console output
-            translation_state['console_output'] += capture.get_output()
-            translation_state['running'] = False
+            current_job.reset(job_token)
+            with JOBS_LOCK:
+                job = JOBS[job_id]
+                job['running'] = False
+                job['finished_at'] = time.time()
+                # The final state is pushed right away, never held back
+                broadcast_progress(job_id, force=True)
+
+def job_state(job_id):
+    """Snapshot of a job held by this process, else from Redis; None if unknown"""
+    with JOBS_LOCK:
+        if job_id in JOBS:
+            return public_state(job_id)
+    # Outside the lock, which every running job needs for its output and progress
+    return load_job_state(job_id)
+
+def render_index(state=None):
+    if state is None and not app.debug and '_flashes' not in session:
+        response = app.response_class(STATIC_INDEX, mimetype='text/html')
+        response.set_etag(STATIC_INDEX_ETAG)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    # In debug mode the template is looked up each time so edits show without a restart
+    return render_template('index.html' if app.debug else INDEX_TEMPLATE, state=state)
 
 @app.route('/')
 def index():
-    # Update session with current translation state
-    session['translation_running'] = translation_state['running']
-    session['progress'] = translation_state['progress']
-    session['console_output'] = translation_state['console_output']
-    session['result_url'] = translation_state['result_url']
-    return render_template('index.html')
+    # The page shows the job last started from this browser, if it is still around
+    return render_index(job_state(session.get('job_id')))
+
+@app.route('/job/<job_id>')
+def job_page(job_id):
+    state = job_state(job_id)
+    if state is None:
+        abort(404)
+    return render_index(state)
+
+# Form fields of /translate and their labels
+FORM_FIELDS = {
+    'presentation_id': 'Presentation ID',
+    'source_language': 'Source Language',
+    'target_language': 'Target Language',
+    'api_key': 'API Key'
+}
+REQUIRED_FIELDS = ('presentation_id', 'source_language', 'target_language')
 
 @app.route('/translate', methods=['POST'])
 def start_translation():
-    if translation_state['running']:
-        flash('Translation is already in progress', 'warning')
-        return redirect(url_for('index'))
+    # The body is parsed once here; the worker gets plain strings
+    form = request.form
+    data = {field: form.get(field, '').strip() for field in FORM_FIELDS}
     
-    presentation_id = request.form.get('presentation_id')
-    source_language = request.form.get('source_language')
-    target_language = request.form.get('target_language')
-    api_key = request.form.get('api_key')
-    
-    if not presentation_id or not source_language or not target_language:
-        flash('Please fill all required fields', 'danger')
+    missing = [FORM_FIELDS[field] for field in REQUIRED_FIELDS if not data[field]]
+    if missing:
+        flash(f"Please fill all required fields: {', '.join(missing)}", 'danger')
         return redirect(url_for('index'))
     
-    # Start translation in a separate thread to not block the web server
-    thread = threading.Thread(
-        target=translate_with_progress,
-        args=(presentation_id, source_language, target_language, api_key)
-    )
-    thread.daemon = True
-    thread.start()
+    # The job is registered before it is handed to the pool, so its page and progress
+    # routes work from the first request after the redirect
+    job_id = uuid.uuid4().hex
+    with JOBS_LOCK:
+        JOBS[job_id] = new_job()
+    ensure_reaper()
+    translation_executor.submit(translate_with_progress, job_id, **data)
+    session['job_id'] = job_id
     
     flash('Translation started successfully', 'success')
-    return redirect(url_for('index'))
+    return redirect(url_for('job_page', job_id=job_id))
 
-@app.route('/progress')
-def get_progress():
-    return {
-        'running': translation_state['running'],
-        'progress': translation_state['progress'],
-        'console_output': translation_state['console_output'],
-        'result_url': translation_state['result_url']
-    }
+@app.route('/progress', defaults={'job_id': None})
+@app.route('/progress/<job_id>')
+def get_progress(job_id):
+    # Without an id, the job last started from this browser
+    job_id = job_id or session.get('job_id')
+    with JOBS_LOCK:
+        job = JOBS.get(job_id)
+        if job is not None:
+            version = job['version']
+            cached_version, body = job['cache']
+            if cached_version != version:
+                body = json.dumps(public_state(job_id))
+                job['cache'] = (version, body)
+    # Jobs run by another process are looked up in Redis once the lock is released
+    if job is None:
+        return remote_progress(job_id)
+    
+    # Browsers revalidate every poll; an unchanged state is answered with an empty 304
+    response = Response(body, mimetype='application/json')
+    response.set_etag(f"{PROCESS_TAG}-{job_id}-{version}")
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def remote_progress(job_id):
+    """/progress for a job run by another process, answered from Redis"""
+    state = load_job_state(job_id)
+    if state is None:
+        abort(404)
+    body = json.dumps(state)
+    response = Response(body, mimetype='application/json')
+    response.set_etag(hashlib.sha1(body.encode('utf-8')).hexdigest())
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def remote_stream(job_id):
+    """Progress stream for a job run by another process, fed by its Redis channel"""
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(f"job:{job_id}")
+    try:
+        # Read after subscribing, so no update falls between the two
+        state = load_job_state(job_id)
+        if state is None:
+            return
+        yield f"data: {json.dumps(state)}\n\n"
+        while True:
+            message = pubsub.get_message(timeout=15)
+            if message is None:
+                # Heartbeat keeps proxies from closing an idle connection
+                yield ": ping\n\n"
+                continue
+            yield f"data: {message['data']}\n\n"
+    finally:
+        pubsub.close()
+
+@app.route('/progress/stream', defaults={'job_id': None})
+@app.route('/progress/<job_id>/stream')
+def progress_stream(job_id):
+    """Server-Sent Events stream of a job's state, one event per change"""
+    job_id = job_id or session.get('job_id')
+    job = JOBS.get(job_id)
+    if job is None:
+        if load_job_state(job_id) is None:
+            abort(404)
+        return Response(remote_stream(job_id), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+    
+    def stream():
+        queue = Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with JOBS_LOCK:
+            job['subscribers'].append(queue)
+            # Current state first, so a page opened mid-run is up to date immediately
+            state = public_state(job_id)
+        try:
+            yield f"data: {json.dumps(state)}\n\n"
+            while True:
+                try:
+                    state = queue.get(timeout=15)
+                except Empty:
+                    # Heartbeat keeps proxies from closing an idle connection
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {json.dumps(state)}\n\n"
+        finally:
+            with JOBS_LOCK:
+                job['subscribers'].remove(queue)
+    
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
 if __name__ == '__main__':
     print("Starting Web UI on http://127.0.0.1:5000")
     print("Press Ctrl+C to stop")
-    app.run(debug=True)
+    # Development server only; set DEV=1 for the debugger and reloader. For real deployments
+    # serve wsgi:app with gunicorn (see the readme).
+    app.run(debug=bool(os.getenv('DEV')), threaded=True)
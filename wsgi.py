@@ -0,0 +1,18 @@
+"""
+WSGI entry point for serving the web UI with a production server, e.g.
+
+    gunicorn -k gevent -w 1 --worker-connections 1000 -b 0.0.0.0:5000 wsgi:app
+
+Translation jobs live in the server process, so keep a single worker (-w 1) unless
+REDIS_URL and FLASK_SECRET_KEY are set (see the readme).
+"""
+import os
+import sys
+import runpy
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# web-ui.py isn't an importable module name, so load it by path (its main block doesn't run);
+# it imports app13 from this directory
+sys.path.insert(0, SCRIPT_DIR)
+app = runpy.run_path(os.path.join(SCRIPT_DIR, "web-ui.py"))["app"]